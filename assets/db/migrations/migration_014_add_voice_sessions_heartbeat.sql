@@ -0,0 +1,10 @@
+-- Migration 014: Add voice_sessions.last_heartbeat_at for crash recovery checkpoints
+
+BEGIN;
+
+ALTER TABLE public.voice_sessions
+  ADD COLUMN IF NOT EXISTS last_heartbeat_at TIMESTAMP WITHOUT TIME ZONE;
+
+COMMIT;
+
+
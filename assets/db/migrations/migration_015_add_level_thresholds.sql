@@ -0,0 +1,37 @@
+-- Migration 015: Add level_thresholds so level/title can be derived inside SQL
+-- Values mirror core/leveling.py (REQUIRED_XP_PER_LEVELUP cumulative, LEVEL_TITLES).
+-- The bot re-syncs this table from core/leveling.py on startup.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.level_thresholds (
+  level INT PRIMARY KEY,
+  min_xp INT NOT NULL,
+  title TEXT NOT NULL
+);
+
+INSERT INTO public.level_thresholds (level, min_xp, title) VALUES
+  (1, 0, '마법학도'),
+  (2, 100, '견습마법사'),
+  (3, 250, '수습마법사'),
+  (4, 500, '초급마법사'),
+  (5, 900, '숙련마법사'),
+  (6, 1500, '중급마법사'),
+  (7, 2350, '상급마법사'),
+  (8, 3500, '정예마법사'),
+  (9, 5050, '대마법사'),
+  (10, 7050, '현자')
+ON CONFLICT (level) DO UPDATE SET min_xp = EXCLUDED.min_xp, title = EXCLUDED.title;
+
+REVOKE ALL ON TABLE public.level_thresholds FROM anon, authenticated;
+ALTER TABLE public.level_thresholds ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS level_thresholds_select_all ON public.level_thresholds;
+CREATE POLICY level_thresholds_select_all
+ON public.level_thresholds
+FOR SELECT
+USING (true);
+
+COMMIT;
+
+
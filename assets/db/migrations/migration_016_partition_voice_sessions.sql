@@ -0,0 +1,76 @@
+-- Migration 016: Partition voice_sessions by month (RANGE on started_at)
+-- 주의: 기존 테이블을 파티션 테이블로 옮기므로 실행 전 백업을 권장합니다.
+-- 이후 달의 파티션은 봇이 시작 시/매일 미리 생성합니다 (core.database.ensure_voice_session_partitions).
+
+BEGIN;
+
+LOCK TABLE public.voice_sessions IN ACCESS EXCLUSIVE MODE;
+
+-- Move the old table aside (index names are schema-wide)
+ALTER TABLE public.voice_sessions RENAME TO voice_sessions_unpartitioned;
+ALTER INDEX IF EXISTS public.voice_sessions_pkey RENAME TO voice_sessions_unpartitioned_pkey;
+ALTER INDEX IF EXISTS public.idx_sessions_user_guild RENAME TO idx_sessions_user_guild_unpartitioned;
+
+-- The primary key of a partitioned table must include the partition key
+CREATE TABLE public.voice_sessions (
+    session_id BIGINT NOT NULL DEFAULT nextval('public.voice_sessions_session_id_seq'),
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    started_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    ended_at TIMESTAMP WITHOUT TIME ZONE,
+    duration_seconds INT,
+    last_heartbeat_at TIMESTAMP WITHOUT TIME ZONE,
+    PRIMARY KEY (session_id, started_at),
+    CONSTRAINT fk_voice_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+) PARTITION BY RANGE (started_at);
+
+ALTER SEQUENCE public.voice_sessions_session_id_seq OWNED BY public.voice_sessions.session_id;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_user_guild ON public.voice_sessions(user_id, guild_id, started_at);
+
+-- Safety net for rows outside every monthly range
+CREATE TABLE IF NOT EXISTS public.voice_sessions_default PARTITION OF public.voice_sessions DEFAULT;
+ALTER TABLE public.voice_sessions_default ENABLE ROW LEVEL SECURITY;
+
+-- Monthly partitions from the oldest session up to 3 months ahead (KST)
+DO $$
+DECLARE
+    m DATE;
+    last_month DATE := (date_trunc('month', now() AT TIME ZONE 'Asia/Seoul') + interval '3 months')::date;
+    part TEXT;
+BEGIN
+    SELECT COALESCE(date_trunc('month', MIN(started_at))::date, date_trunc('month', now() AT TIME ZONE 'Asia/Seoul')::date)
+      INTO m
+      FROM public.voice_sessions_unpartitioned;
+    WHILE m <= last_month LOOP
+        part := format('voice_sessions_%s', to_char(m, 'YYYY_MM'));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.voice_sessions FOR VALUES FROM (%L) TO (%L)',
+            part, m, (m + interval '1 month')::date
+        );
+        EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', part);
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END
+$$;
+
+INSERT INTO public.voice_sessions (session_id, user_id, guild_id, started_at, ended_at, duration_seconds, last_heartbeat_at)
+SELECT session_id, user_id, guild_id, started_at, ended_at, duration_seconds, last_heartbeat_at
+FROM public.voice_sessions_unpartitioned;
+
+DROP TABLE public.voice_sessions_unpartitioned;
+
+-- Same access rules as migration 006/007
+REVOKE ALL ON TABLE public.voice_sessions FROM anon, authenticated;
+ALTER TABLE public.voice_sessions ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS voice_sessions_select_all ON public.voice_sessions;
+CREATE POLICY voice_sessions_select_all
+ON public.voice_sessions
+FOR SELECT
+USING (true);
+
+COMMIT;
+
+
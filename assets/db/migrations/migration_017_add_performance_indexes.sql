@@ -0,0 +1,28 @@
+-- Migration 017: Covering indexes for the bot's and dashboard's hot filters
+-- These run in a transaction: voice_sessions is partitioned (migration 016), and
+-- CREATE INDEX CONCURRENTLY is not supported on a partitioned table; level_thresholds
+-- has a few hundred rows. The chat_activity / reaction_usage indexes are built
+-- concurrently by migration 024.
+
+BEGIN;
+
+-- Open sessions: close/transition lookups per user, heartbeat and startup finalize
+CREATE INDEX IF NOT EXISTS idx_sessions_open
+  ON public.voice_sessions(user_id, guild_id) INCLUDE (started_at, last_heartbeat_at)
+  WHERE ended_at IS NULL;
+
+-- Per-user finished sessions by end time (profile stats, calendar, journal replay checks)
+CREATE INDEX IF NOT EXISTS idx_sessions_user_guild_ended
+  ON public.voice_sessions(user_id, guild_id, ended_at) INCLUDE (started_at, duration_seconds)
+  WHERE ended_at IS NOT NULL;
+
+-- Guild-wide time ranges (dashboard trends/leaderboards, guild daily max)
+CREATE INDEX IF NOT EXISTS idx_sessions_guild_ended
+  ON public.voice_sessions(guild_id, ended_at) INCLUDE (user_id, started_at, duration_seconds)
+  WHERE ended_at IS NOT NULL;
+
+-- Level lookup for an XP value (min_xp rises with level): a single backward index probe
+CREATE INDEX IF NOT EXISTS idx_level_thresholds_min_xp
+  ON public.level_thresholds(min_xp) INCLUDE (level, title);
+
+COMMIT;
@@ -0,0 +1,59 @@
+-- Migration 018: Per-user today/week/month seconds maintained at session close
+-- Each row holds the KST period starts it counts for; the bot resets a counter
+-- when a close lands in a newer period, readers treat a stale key as 0.
+-- The backfill assumes the bot is stopped while this runs.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.user_period_totals (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    day_start DATE NOT NULL,
+    day_seconds BIGINT NOT NULL DEFAULT 0,
+    week_start DATE NOT NULL,
+    week_seconds BIGINT NOT NULL DEFAULT 0,
+    month_start DATE NOT NULL,
+    month_seconds BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (user_id, guild_id),
+    CONSTRAINT fk_period_totals_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+-- Backfill the current periods from finished sessions (same rule as the old
+-- SUM over voice_sessions: a session counts in the period its end falls in)
+WITH k AS (
+    SELECT (now() AT TIME ZONE 'Asia/Seoul')::timestamp AS now_kst
+), b AS (
+    SELECT now_kst,
+           date_trunc('day', now_kst)::date AS d,
+           date_trunc('week', now_kst)::date AS w,
+           date_trunc('month', now_kst)::date AS m
+    FROM k
+)
+INSERT INTO public.user_period_totals
+    (user_id, guild_id, day_start, day_seconds, week_start, week_seconds, month_start, month_seconds, updated_at)
+SELECT vs.user_id, vs.guild_id,
+       b.d, COALESCE(SUM(vs.duration_seconds) FILTER (WHERE vs.ended_at >= b.d), 0),
+       b.w, COALESCE(SUM(vs.duration_seconds) FILTER (WHERE vs.ended_at >= b.w), 0),
+       b.m, COALESCE(SUM(vs.duration_seconds) FILTER (WHERE vs.ended_at >= b.m), 0),
+       b.now_kst
+FROM public.voice_sessions vs
+CROSS JOIN b
+WHERE vs.ended_at IS NOT NULL
+  AND vs.ended_at >= LEAST(b.w, b.m)
+  AND vs.started_at >= LEAST(b.w, b.m) - INTERVAL '31 days'
+GROUP BY vs.user_id, vs.guild_id, b.d, b.w, b.m, b.now_kst
+ON CONFLICT (user_id, guild_id) DO NOTHING;
+
+REVOKE ALL ON TABLE public.user_period_totals FROM anon, authenticated;
+ALTER TABLE public.user_period_totals ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS user_period_totals_select_all ON public.user_period_totals;
+CREATE POLICY user_period_totals_select_all
+ON public.user_period_totals
+FOR SELECT
+USING (true);
+
+COMMIT;
@@ -0,0 +1,34 @@
+-- Migration 019: Per-year study-day bitsets (one BIT(366) row per user/guild/year)
+-- Bit (366 - day_of_year) is set for every daily_streaks date; core/streaks.py
+-- reads them back. daily_streaks stays the source rows; the bot writes both.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.user_streak_bitsets (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    year INT NOT NULL,
+    days BIT(366) NOT NULL,
+    PRIMARY KEY (user_id, guild_id, year),
+    CONSTRAINT fk_streak_bitsets_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+INSERT INTO public.user_streak_bitsets (user_id, guild_id, year, days)
+SELECT user_id, guild_id, extract(year from streak_date)::int,
+       bit_or(set_bit(repeat('0', 366)::bit(366), 366 - extract(doy from streak_date)::int, 1))
+FROM public.daily_streaks
+GROUP BY user_id, guild_id, extract(year from streak_date)::int
+ON CONFLICT (user_id, guild_id, year) DO UPDATE SET days = user_streak_bitsets.days | EXCLUDED.days;
+
+REVOKE ALL ON TABLE public.user_streak_bitsets FROM anon, authenticated;
+ALTER TABLE public.user_streak_bitsets ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS user_streak_bitsets_select_all ON public.user_streak_bitsets;
+CREATE POLICY user_streak_bitsets_select_all
+ON public.user_streak_bitsets
+FOR SELECT
+USING (true);
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- Migration 020: Streak counters on users, maintained when a streak day is inserted
+-- current_streak is the run ending at last_streak_date; readers show it only while
+-- last_streak_date is today or yesterday (KST).
+
+BEGIN;
+
+ALTER TABLE public.users
+  ADD COLUMN IF NOT EXISTS current_streak INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS longest_streak INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS last_streak_date DATE;
+
+-- Gaps-and-islands backfill: consecutive dates share streak_date - row_number()
+WITH numbered AS (
+    SELECT user_id, guild_id, streak_date,
+           streak_date - (ROW_NUMBER() OVER (PARTITION BY user_id, guild_id ORDER BY streak_date))::int AS island
+    FROM public.daily_streaks
+), islands AS (
+    SELECT user_id, guild_id, MAX(streak_date) AS last_day, COUNT(*)::int AS days
+    FROM numbered
+    GROUP BY user_id, guild_id, island
+), per_user AS (
+    SELECT user_id, guild_id,
+           MAX(days) AS longest,
+           MAX(last_day) AS last_day,
+           (ARRAY_AGG(days ORDER BY last_day DESC))[1] AS last_run
+    FROM islands
+    GROUP BY user_id, guild_id
+)
+UPDATE public.users u
+SET current_streak = p.last_run,
+    longest_streak = p.longest,
+    last_streak_date = p.last_day
+FROM per_user p
+WHERE u.user_id = p.user_id AND u.guild_id = p.guild_id;
+
+COMMIT;
@@ -0,0 +1,90 @@
+-- Migration 021: Per-guild snapshot tables for guild-wide reads
+-- user_daily_totals holds each user's seconds per KST day (sessions split at 00:00);
+-- guild_daily_max, guild_leaderboards and guild_level_counts are derived from it and
+-- from users/user_period_totals. The bot keeps them current (core.snapshots) and
+-- rebuilds them at startup, so this migration creates them empty.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.user_daily_totals (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    seconds BIGINT NOT NULL DEFAULT 0,
+    sessions INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, guild_id, day),
+    CONSTRAINT fk_daily_totals_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+-- largest single-user day per guild and year (fetch_guild_per_user_daily_max_hours_kst)
+CREATE TABLE IF NOT EXISTS public.guild_daily_max (
+    guild_id BIGINT NOT NULL,
+    year INT NOT NULL,
+    max_seconds BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    PRIMARY KEY (guild_id, year)
+);
+
+-- top N per guild and period; rows whose period_start is not the current period are stale
+CREATE TABLE IF NOT EXISTS public.guild_leaderboards (
+    guild_id BIGINT NOT NULL,
+    period TEXT NOT NULL CHECK (period IN ('today', 'week', 'month', 'all')),
+    period_start DATE NOT NULL,
+    user_id BIGINT NOT NULL,
+    seconds BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, period, user_id),
+    CONSTRAINT fk_leaderboards_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_guild_leaderboards_rank
+    ON public.guild_leaderboards (guild_id, period, period_start, seconds DESC);
+
+CREATE TABLE IF NOT EXISTS public.guild_level_counts (
+    guild_id BIGINT NOT NULL,
+    level INT NOT NULL,
+    users INT NOT NULL,
+    PRIMARY KEY (guild_id, level)
+);
+
+REVOKE ALL ON TABLE public.user_daily_totals FROM anon, authenticated;
+ALTER TABLE public.user_daily_totals ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS user_daily_totals_select_all ON public.user_daily_totals;
+CREATE POLICY user_daily_totals_select_all
+ON public.user_daily_totals
+FOR SELECT
+USING (true);
+
+REVOKE ALL ON TABLE public.guild_daily_max FROM anon, authenticated;
+ALTER TABLE public.guild_daily_max ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS guild_daily_max_select_all ON public.guild_daily_max;
+CREATE POLICY guild_daily_max_select_all
+ON public.guild_daily_max
+FOR SELECT
+USING (true);
+
+REVOKE ALL ON TABLE public.guild_leaderboards FROM anon, authenticated;
+ALTER TABLE public.guild_leaderboards ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS guild_leaderboards_select_all ON public.guild_leaderboards;
+CREATE POLICY guild_leaderboards_select_all
+ON public.guild_leaderboards
+FOR SELECT
+USING (true);
+
+REVOKE ALL ON TABLE public.guild_level_counts FROM anon, authenticated;
+ALTER TABLE public.guild_level_counts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS guild_level_counts_select_all ON public.guild_level_counts;
+CREATE POLICY guild_level_counts_select_all
+ON public.guild_level_counts
+FOR SELECT
+USING (true);
+
+COMMIT;
@@ -0,0 +1,40 @@
+-- Migration 022: Daily rollups of compacted voice_sessions
+-- core.compaction moves finished sessions older than a cutoff out of voice_sessions into
+-- these per-user, per-KST-day aggregates (scripts/compact_sessions.py). Every reader
+-- that sums voice_sessions adds the matching rollup columns, so totals stay the same:
+--   seconds / sessions: time on that day with sessions split at 00:00, and how many
+--                       sessions had time on it (grass calendar, user_daily_totals)
+--   ended_sessions / ended_seconds: sessions that ended that day and SUM(duration_seconds)
+--                       (dashboard daily/monthly trends and rankings, keyed by ended_at)
+-- Rows only hold compacted sessions; sessions still in voice_sessions are never counted here.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.voice_session_rollups (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    seconds BIGINT NOT NULL DEFAULT 0,
+    sessions INT NOT NULL DEFAULT 0,
+    ended_sessions INT NOT NULL DEFAULT 0,
+    ended_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, guild_id, day),
+    CONSTRAINT fk_session_rollups_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+-- guild-wide dashboard reads (guild calendar, monthly ranking, available months)
+CREATE INDEX IF NOT EXISTS idx_session_rollups_guild_day
+    ON public.voice_session_rollups (guild_id, day);
+
+REVOKE ALL ON TABLE public.voice_session_rollups FROM anon, authenticated;
+ALTER TABLE public.voice_session_rollups ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS voice_session_rollups_select_all ON public.voice_session_rollups;
+CREATE POLICY voice_session_rollups_select_all
+ON public.voice_session_rollups
+FOR SELECT
+USING (true);
+
+COMMIT;
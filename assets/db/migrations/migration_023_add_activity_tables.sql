@@ -0,0 +1,57 @@
+-- Migration 023: Create chat_activity, reaction_usage and the users profile columns
+-- The original deployment created these by hand, so on a freshly migrated database
+-- (e.g. STORAGE_BACKEND=embedded) every chat/reaction write and profile sync failed.
+-- Everything is IF NOT EXISTS: existing deployments already have them. Their indexes
+-- are built by migration 024 outside a transaction (CONCURRENTLY), since on those
+-- deployments the tables are already large.
+
+BEGIN;
+
+-- profile columns written by core.profile_sync (upsert_user_profiles)
+ALTER TABLE public.users
+    ADD COLUMN IF NOT EXISTS joined_at DATE,
+    ADD COLUMN IF NOT EXISTS profile_image TEXT,
+    ADD COLUMN IF NOT EXISTS dormitory TEXT;
+
+-- one row per user and KST day they chatted (dashboard chat DAU)
+CREATE TABLE IF NOT EXISTS public.chat_activity (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    activity_date DATE NOT NULL,
+    PRIMARY KEY (user_id, guild_id, activity_date),
+    CONSTRAINT fk_chat_activity_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+-- reactions a user gave per emoji and KST day
+CREATE TABLE IF NOT EXISTS public.reaction_usage (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    emoji TEXT NOT NULL,
+    usage_date DATE NOT NULL,
+    count INT NOT NULL DEFAULT 1,
+    PRIMARY KEY (user_id, guild_id, emoji, usage_date),
+    CONSTRAINT fk_reaction_usage_user
+        FOREIGN KEY (user_id, guild_id) REFERENCES public.users(user_id, guild_id)
+        ON DELETE CASCADE
+);
+
+REVOKE ALL ON TABLE public.chat_activity FROM anon, authenticated;
+REVOKE ALL ON TABLE public.reaction_usage FROM anon, authenticated;
+ALTER TABLE public.chat_activity ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.reaction_usage ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS chat_activity_select_all ON public.chat_activity;
+CREATE POLICY chat_activity_select_all
+ON public.chat_activity
+FOR SELECT
+USING (true);
+
+DROP POLICY IF EXISTS reaction_usage_select_all ON public.reaction_usage;
+CREATE POLICY reaction_usage_select_all
+ON public.reaction_usage
+FOR SELECT
+USING (true);
+
+COMMIT;
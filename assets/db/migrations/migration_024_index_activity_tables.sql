@@ -0,0 +1,12 @@
+-- migrate:no-transaction
+-- Migration 024: Index chat_activity / reaction_usage without blocking chat and reaction writes
+-- Dashboard chat DAU and reaction rankings filter by guild and date. CONCURRENTLY
+-- builds the index while writes continue, so this file runs outside a transaction.
+-- If a build fails it leaves an INVALID index that IF NOT EXISTS would skip: drop
+-- that index (DROP INDEX CONCURRENTLY) before running the migrations again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_activity_guild_date
+    ON public.chat_activity (guild_id, activity_date) INCLUDE (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reaction_usage_guild_date
+    ON public.reaction_usage (guild_id, usage_date) INCLUDE (user_id, count);
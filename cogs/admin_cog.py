@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core.database import get_pool_stats
+from core.query_stats import get_query_stats, reset_query_stats
+from core.change_feed import get_change_feed_stats
+from core.read_cache import get_read_cache_stats
+
+
+def format_query_stats(top: int = 10) -> str:
+    """Render the most expensive query call sites and pool waits as a code block."""
+    lines = [f"{'site':<40} {'calls':>6} {'avg':>7} {'p95':>7} {'max':>7} {'rows':>7} {'wait':>7}"]
+    for s in get_query_stats(top=top):
+        p95 = "inf" if s["p95_ms"] == float("inf") else f"{s['p95_ms']:.0f}"
+        lines.append(
+            f"{s['site'][:40]:<40} {s['calls']:>6} {s['avg_ms']:>7.1f} {p95:>7} {s['max_ms']:>7.1f} {s['rows']:>7} {s['pool_wait_ms']:>7.1f}"
+        )
+    lines.append("")
+    for kind, p in get_pool_stats().items():
+        lines.append(
+            f"pool {kind:<6} size={p['size']}/{p['max']} idle={p['idle']} acquires={p['acquires']} "
+            f"wait_avg={p['wait_ms_avg']:.1f}ms wait_max={p['wait_ms_max']:.1f}ms"
+        )
+    rc = get_read_cache_stats()
+    lines.append(
+        f"read_cache entries={rc['entries']} guilds={rc['guilds']} hit_rate={rc['hit_rate'] * 100:.1f}% "
+        f"evictions={rc['evictions']} expirations={rc['expirations']} invalidations={rc['invalidations']} stale_skips={rc['stale_skips']}"
+    )
+    for name, fs in rc["functions"].items():
+        lines.append(f"  {name:<20} hits={fs['hits']} misses={fs['misses']}")
+    cf = get_change_feed_stats()
+    lines.append(
+        f"change_feed listening={cf['listening']} connects={cf['connects']} received={cf['received']} "
+        f"own={cf['own']} published={cf['published']} publish_failed={cf['publish_failed']}"
+    )
+    # 디스코드 메시지 길이 제한(2000자) 안에 맞춤
+    body = "\n".join(lines)[:1900]
+    return f"```\n{body}\n```"
+
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @app_commands.command(name="db통계", description="DB 쿼리 지연/풀 대기 통계를 보여줍니다 (관리자)")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    async def db_stats(self, interaction: discord.Interaction, reset: bool = False):
+        text = format_query_stats()
+        if reset:
+            reset_query_stats()
+            text += "\n통계를 초기화했습니다."
+        await interaction.response.send_message(text, ephemeral=True)
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(AdminCog(bot))
@@ -11,6 +11,7 @@ KST = timezone(timedelta(hours=9))
 import os
 
 from core.database import fetch_user_stats, fetch_month_streak_days
+from core.student_numbers import build_join_index, has_join_index, lookup_student_no
 from core.leveling import compute_level_progress
 from core.imaging import (
     render_profile_card,
@@ -63,6 +64,20 @@ def pick_house_name(member: discord.Member) -> str | None:
     return None
 
 
+def compute_student_no(member: discord.Member) -> str | None:
+    """학번: KST 가입일(YYMMDD) + 같은 날 가입자 중 순번(2자리).
+
+    Uses the per-guild join-date index (built from the member cache on first use)
+    so the lookup is a bisect instead of a scan over all members.
+    """
+    if not member.joined_at:
+        return None
+    guild = member.guild
+    if not has_join_index(guild.id):
+        build_join_index(guild.id, ((m.id, m.joined_at) for m in guild.members if m.joined_at and not m.bot))
+    return lookup_student_no(guild.id, member.id, member.joined_at)
+
+
 def _load_keywords_from_env(var_name: str, default: list[str]) -> list[str]:
     raw = os.getenv(var_name, "").strip()
     if not raw:
@@ -181,15 +196,7 @@ class ProfileCog(commands.Cog):
         joined = getattr(target, "joined_at", None)
         student_no = stats.get("student_no") or ""
         if not student_no and joined:
-            base = joined.astimezone(KST).strftime("%y%m%d")
-            same_day = [m for m in interaction.guild.members if m.joined_at and m.joined_at.date() == joined.date() and not m.bot]
-            same_day_sorted = sorted(same_day, key=lambda m: (m.joined_at, m.id))
-            try:
-                idx = next(i for i, m in enumerate(same_day_sorted) if m.id == target.id)
-            except StopIteration:
-                idx = 0
-            suffix = f"{idx + 1:02d}"
-            student_no = f"{base}{suffix}"
+            student_no = compute_student_no(target)
             # Save back to DB for future reads
             try:
                 await set_user_student_no(target.id, interaction.guild.id, student_no)
@@ -214,6 +221,8 @@ class ProfileCog(commands.Cog):
             subtitle_line2=subtitle_line2,
             house_name=house_name,
             voost_visible=has_scholar_role(target),
+            current_streak=stats.get("current_streak", 0),
+            longest_streak=stats.get("longest_streak", 0),
         )
         # Fetch month streak for stats+calendar section
         month = await fetch_month_streak_days(target.id, interaction.guild.id)
@@ -276,15 +285,7 @@ class ProfileCog(commands.Cog):
         joined = getattr(target, "joined_at", None)
         student_no = stats.get("student_no") or ""
         if not student_no and joined:
-            base = joined.astimezone(KST).strftime("%y%m%d")
-            same_day = [m for m in interaction.guild.members if m.joined_at and m.joined_at.date() == joined.date() and not m.bot]
-            same_day_sorted = sorted(same_day, key=lambda m: (m.joined_at, m.id))
-            try:
-                idx = next(i for i, m in enumerate(same_day_sorted) if m.id == target.id)
-            except StopIteration:
-                idx = 0
-            suffix = f"{idx + 1:02d}"
-            student_no = f"{base}{suffix}"
+            student_no = compute_student_no(target)
             # Save back to DB for future reads
             try:
                 await set_user_student_no(target.id, interaction.guild.id, student_no)
@@ -309,6 +310,8 @@ class ProfileCog(commands.Cog):
             subtitle_line2=subtitle_line2,
             house_name=house_name,
             voost_visible=has_scholar_role(target),
+            current_streak=stats.get("current_streak", 0),
+            longest_streak=stats.get("longest_streak", 0),
         )
         # Fetch month streak for stats+calendar section
         month = await fetch_month_streak_days(target.id, interaction.guild.id)
@@ -352,26 +355,41 @@ class ProfileCog(commands.Cog):
                 fetch_guild_per_user_daily_max_hours_kst,
                 ensure_user,
             )
+            from core import grass_cache
+
+            # cap: 12시간 고정 (12시간 이상이면 최대 색상)
+            cap_hours = 12.0
+            username = target.nick or target.display_name or str(target)
+            house_name = pick_house_name(target)
+            avatar = getattr(target, "display_avatar", None)
+            # 지난 연도는 데이터가 바뀌지 않으므로 렌더된 PNG를 디스크 캐시에서 바로 보냄
+            past_year = y < datetime.now(KST).year
+            render_key = grass_cache.render_key(username, house_name, cap_hours, avatar.key if avatar else None)
+            png = grass_cache.load_png(interaction.guild.id, target.id, y, render_key) if past_year else None
+            if png is not None:
+                file = discord.File(BytesIO(png), filename=f"grass_{y}.png")
+                await interaction.response.send_message(file=file, ephemeral=True)
+                return
+
             # Prepare small avatar for title icon
             from PIL import Image
-            avatar_bytes = await target.display_avatar.read() if getattr(target, "display_avatar", None) else None
+            avatar_bytes = await avatar.read() if avatar else None
             avatar_img = Image.open(BytesIO(avatar_bytes)).convert("RGBA") if avatar_bytes else None
             await ensure_user(target.id, interaction.guild.id)
             # 데이터 조회
             data = await fetch_user_calendar_year_kst(target.id, interaction.guild.id, y)
-            # cap: 12시간 고정 (12시간 이상이면 최대 색상)
-            cap_hours = 12.0
 
             # 이미지 렌더
-            house_name = pick_house_name(target)
             buf = render_annual_grass_image(
-                username=target.nick or target.display_name or str(target),
+                username=username,
                 year=y,
                 days=[(d["date"], int(d["seconds"])) for d in data],
                 cap_hours=cap_hours,
                 house_name=house_name,
                 avatar_image=avatar_img,
             )
+            if past_year:
+                grass_cache.store_png(interaction.guild.id, target.id, y, render_key, buf.getvalue())
             file = discord.File(buf, filename=f"grass_{y}.png")
             await interaction.response.send_message(file=file, ephemeral=True)
         except Exception as exc:
@@ -0,0 +1,182 @@
+"""Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+Writes to user data publish (guild, user, kind) on the CHANNEL notification
+channel from inside their own transaction, so the message is delivered exactly
+when the write commits: per-user writes in core.database call pg_notify in the
+write statement itself (notify_sql/change_payload) or notify() on the
+transaction's connection, scripts use notify() on theirs. Batch paths without
+a per-user transaction use publish() after committing. The
+bot runs run_listener(), which keeps a dedicated LISTEN connection and drops the
+matching core.read_cache entries, so reads can be cached for long without
+serving what another process changed. Messages a process sent itself are
+ignored on receipt since it already invalidated locally.
+
+Payload: {"o": origin, "g": guild_id | null, "u": [user_id, ...] | null, "k": kind};
+a null user list means the whole guild, a null guild means everything.
+Notifications sent while the listener is disconnected are lost, so each
+(re)connect clears the local cache. CACHE_NOTIFY=0 turns both sides off.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Dict, Iterable, Optional
+
+import asyncpg
+
+from core import read_cache
+
+CHANNEL = "studycard_changes"
+# pg_notify payloads are limited to 8000 bytes; ~20 bytes per user id
+_USERS_PER_MESSAGE = 300
+_ORIGIN = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_stats: Dict[str, int] = {"published": 0, "publish_failed": 0, "received": 0, "own": 0, "malformed": 0, "connects": 0}
+_connected = False
+
+
+def enabled() -> bool:
+    return os.getenv("CACHE_NOTIFY", "1").strip().lower() not in ("0", "false", "off")
+
+
+def get_listen_url() -> str:
+    """DSN for the LISTEN connection: CACHE_LISTEN_URL or DATABASE_URL (must not be a transaction-mode pooler)."""
+    from core.database import get_database_url
+
+    return os.getenv("CACHE_LISTEN_URL", "").strip() or get_database_url()
+
+
+def _payloads(guild_id: Optional[int], user_ids: Optional[Iterable[int]], kind: str) -> list[str]:
+    base = {"o": _ORIGIN, "g": guild_id, "k": kind}
+    if guild_id is None or user_ids is None:
+        return [json.dumps({**base, "u": None})]
+    users = sorted({int(u) for u in user_ids})
+    return [
+        json.dumps({**base, "u": users[i:i + _USERS_PER_MESSAGE]})
+        for i in range(0, len(users), _USERS_PER_MESSAGE)
+    ]
+
+
+def change_payload(guild_id: int, user_id: int, kind: str) -> Optional[str]:
+    """Payload for a single-user change sent by a statement through notify_sql(); None when CACHE_NOTIFY is off."""
+    if not enabled():
+        return None
+    _stats["published"] += 1
+    return _payloads(guild_id, [user_id], kind)[0]
+
+
+def notify_sql(payload_param: str) -> str:
+    """SELECT that queues the change_payload() bound to payload_param (no-op for NULL).
+
+    Use it as a CTE of the write statement and read it from the final SELECT:
+    a plain SELECT in a WITH clause only runs when referenced.
+    """
+    return f"SELECT pg_notify('{CHANNEL}', {payload_param}::text) WHERE {payload_param}::text IS NOT NULL"
+
+
+async def notify(conn: asyncpg.Connection, guild_id: Optional[int], user_ids: Optional[Iterable[int]], kind: str) -> None:
+    """Queue change notifications on conn (sent on commit, or immediately outside a transaction)."""
+    if not enabled():
+        return
+    for payload in _payloads(guild_id, user_ids, kind):
+        await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+        _stats["published"] += 1
+
+
+def invalidate_local(guild_id: Optional[int], user_ids: Optional[Iterable[int]]) -> None:
+    """Drop this process's cached reads for the change (other processes learn through NOTIFY)."""
+    if guild_id is None:
+        read_cache.clear()
+    elif user_ids is None:
+        read_cache.invalidate_guild(guild_id)
+    else:
+        for user_id in user_ids:
+            read_cache.invalidate_user(int(user_id), guild_id)
+
+
+async def publish(guild_id: Optional[int], user_ids: Optional[Iterable[int]], kind: str) -> None:
+    """Invalidate cached reads here, then notify other processes on a separate connection.
+
+    For batch writes that already committed; a per-user write should notify
+    inside its own transaction instead and only call invalidate_local().
+
+    A failed NOTIFY is logged, not raised: the write itself succeeded and the
+    other processes' TTL still bounds how long they serve the old value.
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    invalidate_local(guild_id, user_ids)
+    if not enabled():
+        return
+    from core.database import acquire
+
+    try:
+        async with acquire() as conn:
+            await notify(conn, guild_id, user_ids, kind)
+    except Exception as exc:
+        _stats["publish_failed"] += 1
+        logging.warning("Cache change notification failed (%s): %s", kind, exc)
+
+
+def apply_payload(payload: str) -> None:
+    """Invalidate local caches for one received notification."""
+    _stats["received"] += 1
+    try:
+        msg = json.loads(payload)
+        origin = msg.get("o")
+        guild_id = msg.get("g")
+        user_ids = msg.get("u")
+    except (ValueError, AttributeError):
+        _stats["malformed"] += 1
+        return
+    if origin == _ORIGIN:
+        _stats["own"] += 1
+        return
+    invalidate_local(int(guild_id) if guild_id is not None else None, user_ids)
+
+
+def _on_notification(_conn, _pid: int, _channel: str, payload: str) -> None:
+    apply_payload(payload)
+
+
+async def run_listener(dsn: Optional[str] = None, retry_sec: float = 5.0, ping_sec: float = 60.0) -> None:
+    """LISTEN on CHANNEL until cancelled, reconnecting after failures."""
+    global _connected
+    while True:
+        conn: Optional[asyncpg.Connection] = None
+        try:
+            conn = await asyncpg.connect(dsn or await asyncio.to_thread(get_listen_url), statement_cache_size=0)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _c: closed.set())
+            await conn.add_listener(CHANNEL, _on_notification)
+            # anything published while we were not listening is unknown
+            read_cache.clear()
+            _connected = True
+            _stats["connects"] += 1
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), timeout=ping_sec)
+                except asyncio.TimeoutError:
+                    # an idle socket can die silently; a round trip surfaces it
+                    await conn.execute("SELECT 1")
+            logging.warning("Cache change listener connection closed; reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logging.warning("Cache change listener failed: %s", exc)
+        finally:
+            _connected = False
+            if conn is not None and not conn.is_closed():
+                try:
+                    await conn.close()
+                except Exception:
+                    conn.terminate()
+        await asyncio.sleep(retry_sec)
+
+
+def get_change_feed_stats() -> Dict[str, object]:
+    return {**_stats, "listening": _connected}
@@ -0,0 +1,324 @@
+"""Cold-data compaction of old voice_sessions into daily rollups (migration 022).
+
+Finished sessions that ended before the cutoff (00:00 KST, COMPACT_SESSIONS_AFTER_DAYS
+days ago; default 365) are deleted from voice_sessions and added into
+voice_session_rollups, one row per user and KST day:
+
+- seconds / sessions: time on the day with sessions split at 00:00 and how many
+  sessions had time on it (grass calendar, core.snapshots user_daily_totals)
+- ended_sessions / ended_seconds: sessions that ended on the day and their
+  SUM(duration_seconds) (dashboard trends and rankings keyed by ended_at)
+
+Readers add the rollup columns to what they compute from voice_sessions. Each
+session is in exactly one of the two tables, so every total comes out the same.
+Per-session detail (entry logs, hour heatmap, length histogram) is gone for
+compacted days, and the raw rows can be exported to gzip CSV first.
+
+Each batch runs in one transaction: select the oldest rows, optionally export
+them, move them, then compare a digest of the affected user-days before and
+after. A mismatch rolls the batch back. A run that stops halfway can simply be
+started again, because the rows still in voice_sessions are its progress.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import io
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_stats: Dict[str, Any] = {"batches": 0, "sessions": 0, "exported_files": 0, "check_failures": 0, "last_run_at": None}
+
+_EXPORT_COLUMNS = ("session_id", "user_id", "guild_id", "started_at", "ended_at", "duration_seconds")
+
+
+class CompactionCheckError(RuntimeError):
+    """The before/after digest of a batch differed; the batch was rolled back."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip())
+    except Exception:
+        return default
+
+
+def age_days() -> int:
+    return max(1, _env_int("COMPACT_SESSIONS_AFTER_DAYS", 365))
+
+
+def batch_size() -> int:
+    return max(1, _env_int("COMPACT_BATCH_SIZE", 5000))
+
+
+def get_export_dir() -> Optional[Path]:
+    """COMPACT_EXPORT_DIR: where raw rows are written before compaction; unset = no export."""
+    raw = os.getenv("COMPACT_EXPORT_DIR", "").strip()
+    return Path(raw) if raw and raw.lower() not in ("off", "0", "false", "none") else None
+
+
+def cutoff_for(days: Optional[int] = None, now: Optional[datetime] = None) -> datetime:
+    """00:00 KST of the day `days` days ago; sessions that ended before it are compacted."""
+    from core.database import now_kst_naive
+
+    now = now or now_kst_naive()
+    day = (now - timedelta(days=days if days is not None else age_days())).date()
+    return datetime(day.year, day.month, day.day)
+
+
+# Oldest finished sessions before the cutoff; started_at < cutoff lets the planner prune partitions
+_SELECT_BATCH = """
+    SELECT session_id, user_id, guild_id, started_at, ended_at, duration_seconds
+    FROM voice_sessions
+    WHERE ended_at IS NOT NULL AND ended_at < $1 AND started_at < $1
+      AND ($3::bigint IS NULL OR guild_id = $3)
+    ORDER BY started_at, session_id
+    LIMIT $2
+    FOR UPDATE
+"""
+
+# (user, guild, first day, last day) each batch user touched, on either attribution
+_SCOPE_CTE = """
+    scope AS (
+        SELECT user_id, guild_id, MIN(started_at)::date AS first_day,
+               GREATEST(MAX(ended_at), MAX(started_at))::date AS last_day
+        FROM unnest($1::bigint[], $2::bigint[], $3::timestamp[], $4::timestamp[])
+             AS b(user_id, guild_id, started_at, ended_at)
+        GROUP BY user_id, guild_id
+    )"""
+
+# Split at 00:00 into per-day seconds; same rule as fetch_user_calendar_year_kst.
+# {sessions} yields user_id, guild_id, started_at, ended_at, duration_seconds.
+_ROLLUP_SQL = """
+    split AS (
+        SELECT s.user_id, s.guild_id, g.d::date AS day,
+               EXTRACT(EPOCH FROM (
+                   LEAST(s.ended_at, g.d + INTERVAL '1 day') - GREATEST(s.started_at, g.d)
+               ))::bigint AS seconds
+        FROM ({sessions}) s
+        CROSS JOIN LATERAL generate_series(
+            date_trunc('day', s.started_at), date_trunc('day', s.ended_at), INTERVAL '1 day'
+        ) AS g(d)
+    ), rollup AS (
+        SELECT user_id, guild_id, day,
+               SUM(seconds)::bigint AS seconds, SUM(sessions)::int AS sessions,
+               SUM(ended_sessions)::int AS ended_sessions, SUM(ended_seconds)::bigint AS ended_seconds
+        FROM (
+            SELECT user_id, guild_id, day, seconds, 1 AS sessions, 0 AS ended_sessions, 0 AS ended_seconds
+            FROM split WHERE seconds > 0
+            UNION ALL
+            SELECT user_id, guild_id, ended_at::date, 0, 0, 1, COALESCE(duration_seconds, 0)
+            FROM ({sessions}) s
+        ) parts
+        GROUP BY user_id, guild_id, day
+    )"""
+
+# Digest of what readers see for the scope: voice_sessions plus voice_session_rollups
+_DIGEST = f"""
+    WITH {_SCOPE_CTE}, {_ROLLUP_SQL.format(sessions='''
+        SELECT v.user_id, v.guild_id, v.started_at, v.ended_at, v.duration_seconds
+        FROM scope c
+        JOIN voice_sessions v ON v.user_id = c.user_id AND v.guild_id = c.guild_id
+        WHERE v.ended_at IS NOT NULL
+          AND v.ended_at >= c.first_day
+          AND v.started_at < c.last_day + 1
+          AND v.started_at >= c.first_day - $5::interval
+    ''')}, combined AS (
+        SELECT t.user_id, t.guild_id, t.day,
+               SUM(t.seconds) AS seconds, SUM(t.sessions) AS sessions,
+               SUM(t.ended_sessions) AS ended_sessions, SUM(t.ended_seconds) AS ended_seconds
+        FROM (
+            SELECT user_id, guild_id, day, seconds, sessions, ended_sessions, ended_seconds FROM rollup
+            UNION ALL
+            SELECT r.user_id, r.guild_id, r.day, r.seconds, r.sessions, r.ended_sessions, r.ended_seconds
+            FROM scope c
+            JOIN voice_session_rollups r ON r.user_id = c.user_id AND r.guild_id = c.guild_id
+        ) t
+        JOIN scope c ON c.user_id = t.user_id AND c.guild_id = t.guild_id
+        WHERE t.day BETWEEN c.first_day AND c.last_day
+        GROUP BY t.user_id, t.guild_id, t.day
+    )
+    SELECT COUNT(*) AS days, md5(COALESCE(string_agg(
+        concat_ws(':', user_id, guild_id, day, seconds, sessions, ended_sessions, ended_seconds),
+        ',' ORDER BY user_id, guild_id, day), '')) AS digest
+    FROM combined
+"""
+
+_MOVE_BATCH = f"""
+    WITH moved AS (
+        DELETE FROM voice_sessions v
+        USING unnest($1::bigint[], $2::timestamp[]) AS b(session_id, started_at)
+        WHERE v.session_id = b.session_id AND v.started_at = b.started_at
+        RETURNING v.user_id, v.guild_id, v.started_at, v.ended_at, v.duration_seconds
+    ), {_ROLLUP_SQL.format(sessions='SELECT * FROM moved')}, written AS (
+        INSERT INTO voice_session_rollups AS r (user_id, guild_id, day, seconds, sessions, ended_sessions, ended_seconds)
+        SELECT user_id, guild_id, day, seconds, sessions, ended_sessions, ended_seconds FROM rollup
+        ON CONFLICT (user_id, guild_id, day) DO UPDATE
+        SET seconds = r.seconds + EXCLUDED.seconds,
+            sessions = r.sessions + EXCLUDED.sessions,
+            ended_sessions = r.ended_sessions + EXCLUDED.ended_sessions,
+            ended_seconds = r.ended_seconds + EXCLUDED.ended_seconds
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM moved) AS moved, (SELECT COUNT(*) FROM written) AS days
+"""
+
+
+def _write_export(path: Path, rows: list) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_EXPORT_COLUMNS)
+    for r in rows:
+        writer.writerow([
+            r["session_id"],
+            r["user_id"],
+            r["guild_id"],
+            r["started_at"].isoformat(),
+            r["ended_at"].isoformat(),
+            r["duration_seconds"],
+        ])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", newline="") as f:
+        f.write(buf.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _export_path(export_dir: Path, rows: list) -> Path:
+    # selection order is deterministic, so a retried batch overwrites its own file
+    first = rows[0]
+    return export_dir / f"{first['started_at']:%Y-%m}" / f"voice_sessions_{first['started_at']:%Y%m%d%H%M%S}_{first['session_id']}.csv.gz"
+
+
+async def compact_batch(
+    cutoff: datetime,
+    limit: Optional[int] = None,
+    guild_id: Optional[int] = None,
+    export_dir: Optional[Path] = None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Move one batch of sessions ended before cutoff into rollups. Returns {sessions, days}.
+
+    {sessions: 0} means nothing is left to compact. With dry_run the batch
+    (export file included) is checked and then rolled back.
+    """
+    from core.database import VOICE_SESSION_MAX_SPAN, acquire
+
+    export_path: Optional[Path] = None
+    async with acquire("batch") as conn:
+        tx = conn.transaction()
+        await tx.start()
+        try:
+            rows = await conn.fetch(_SELECT_BATCH, cutoff, limit or batch_size(), guild_id)
+            if not rows:
+                await tx.rollback()
+                return {"sessions": 0, "days": 0}
+            scope_args = (
+                [r["user_id"] for r in rows],
+                [r["guild_id"] for r in rows],
+                [r["started_at"] for r in rows],
+                [r["ended_at"] for r in rows],
+                VOICE_SESSION_MAX_SPAN,
+            )
+            before = await conn.fetchrow(_DIGEST, *scope_args)
+            if export_dir is not None:
+                export_path = _export_path(export_dir, rows)
+                await asyncio.to_thread(_write_export, export_path, rows)
+            moved = await conn.fetchrow(
+                _MOVE_BATCH,
+                [r["session_id"] for r in rows],
+                [r["started_at"] for r in rows],
+            )
+            after = await conn.fetchrow(_DIGEST, *scope_args)
+            if int(moved["moved"]) != len(rows) or tuple(before) != tuple(after):
+                _stats["check_failures"] += 1
+                raise CompactionCheckError(
+                    f"batch from session {rows[0]['session_id']}: moved {moved['moved']}/{len(rows)}, "
+                    f"digest {before['days']}:{before['digest']} -> {after['days']}:{after['digest']}"
+                )
+            if dry_run:
+                await tx.rollback()
+            else:
+                await tx.commit()
+        except BaseException:
+            await tx.rollback()
+            if export_path is not None:
+                export_path.unlink(missing_ok=True)
+            raise
+    if dry_run and export_path is not None:
+        export_path.unlink(missing_ok=True)
+    if not dry_run:
+        _stats["batches"] += 1
+        _stats["sessions"] += len(rows)
+        _stats["exported_files"] += 1 if export_path is not None else 0
+    return {"sessions": len(rows), "days": int(moved["days"])}
+
+
+async def compact_sessions(
+    days: Optional[int] = None,
+    limit: Optional[int] = None,
+    guild_id: Optional[int] = None,
+    export_dir: Optional[Path] = None,
+    max_batches: Optional[int] = None,
+    pause_sec: float = 0.0,
+) -> Dict[str, Any]:
+    """Compact in batches until nothing older than the cutoff is left (or max_batches)."""
+    from core.database import now_kst_naive
+
+    cutoff = cutoff_for(days)
+    total = {"cutoff": cutoff, "batches": 0, "sessions": 0, "days": 0}
+    while max_batches is None or total["batches"] < max_batches:
+        result = await compact_batch(cutoff, limit, guild_id, export_dir)
+        if not result["sessions"]:
+            break
+        total["batches"] += 1
+        total["sessions"] += result["sessions"]
+        total["days"] += result["days"]
+        logging.info("Compacted %s sessions into %s user-days (before %s)", result["sessions"], result["days"], cutoff)
+        if pause_sec > 0:
+            # leave room for the bot's own writes between batches
+            await asyncio.sleep(pause_sec)
+    _stats["last_run_at"] = now_kst_naive()
+    return total
+
+
+_PARTITION_RE = re.compile(r"^voice_sessions_(\d{4})_(\d{2})$")
+
+
+async def drop_empty_partitions(before: datetime) -> list[str]:
+    """Drop monthly voice_sessions partitions that end on or before `before` and hold no rows."""
+    from core.database import acquire
+
+    dropped: list[str] = []
+    async with acquire("batch") as conn:
+        names = await conn.fetch(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('public.voice_sessions') ORDER BY c.relname"
+        )
+        for r in names:
+            m = _PARTITION_RE.match(r["relname"])
+            if not m:
+                continue
+            year, month = int(m.group(1)), int(m.group(2))
+            month_end = datetime(year + month // 12, month % 12 + 1, 1)
+            if month_end > before:
+                continue
+            async with conn.transaction():
+                # the lock keeps a late insert from landing between the check and the drop
+                await conn.execute(f"LOCK TABLE public.{r['relname']} IN ACCESS EXCLUSIVE MODE")
+                if await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM public.{r['relname']})"):
+                    continue
+                await conn.execute(f"DROP TABLE public.{r['relname']}")
+            dropped.append(r["relname"])
+    return dropped
+
+
+def get_compaction_stats() -> Dict[str, Any]:
+    return dict(_stats)
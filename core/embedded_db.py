@@ -0,0 +1,80 @@
+"""Embedded local Postgres for single-guild deployments (STORAGE_BACKEND=embedded).
+
+Instead of a hosted database, the bot starts a private Postgres server from
+EMBEDDED_DB_DIR (default data/pgdata) through the optional `pgserver` package
+(requirements-embedded.txt) and talks to it over a unix socket, so every query skips the network round trip.
+It is the same engine as production, so core.database, the migrations and the
+statements run unchanged; only the Supabase roles the RLS migrations grant to
+(anon, authenticated) are created here first.
+
+Several processes (bot, scripts) may use the directory at once; pgserver stops
+the server when the last of them exits. Data moves between this and a hosted
+database with scripts/copy_database.py.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+_DEFAULT_DIR = Path(__file__).resolve().parents[1] / "data" / "pgdata"
+DATABASE_NAME = "studycard"
+# roles referenced by the Supabase-oriented RLS migrations (006, 007, ...)
+SUPABASE_ROLES = ("anon", "authenticated")
+
+_lock = threading.Lock()
+_dsn: Optional[str] = None
+
+
+def storage_backend() -> str:
+    """STORAGE_BACKEND: 'postgres' (DATABASE_URL, default) or 'embedded'."""
+    raw = os.getenv("STORAGE_BACKEND", "postgres").strip().lower()
+    if raw in ("", "postgres", "postgresql", "hosted"):
+        return "postgres"
+    if raw in ("embedded", "local"):
+        return "embedded"
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {raw!r} (expected 'postgres' or 'embedded')")
+
+
+def enabled() -> bool:
+    return storage_backend() == "embedded"
+
+
+def get_data_dir() -> Path:
+    raw = os.getenv("EMBEDDED_DB_DIR", "").strip()
+    return Path(raw) if raw else _DEFAULT_DIR
+
+
+def _bootstrap_sql() -> str:
+    roles = "\n".join(
+        f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{r}') "
+        f"THEN CREATE ROLE {r} NOLOGIN; END IF; END $$;"
+        for r in SUPABASE_ROLES
+    )
+    database = (
+        f"SELECT 'CREATE DATABASE {DATABASE_NAME}' "
+        f"WHERE NOT EXISTS (SELECT 1 FROM pg_database WHERE datname = '{DATABASE_NAME}')\\gexec"
+    )
+    # roles are cluster-wide, so creating them from the maintenance database is enough
+    return f"{roles}\n{database}\n"
+
+
+def get_dsn() -> str:
+    """Start (or attach to) the embedded server and return its DSN. Blocks on first call (async code: asyncio.to_thread)."""
+    global _dsn
+    with _lock:
+        if _dsn is None:
+            try:
+                import pgserver
+            except ImportError as exc:
+                raise RuntimeError(
+                    "STORAGE_BACKEND=embedded needs the optional 'pgserver' package "
+                    "(pip install -r requirements-embedded.txt)"
+                ) from exc
+            data_dir = get_data_dir()
+            data_dir.mkdir(parents=True, exist_ok=True)
+            server = pgserver.get_server(data_dir)
+            server.psql(_bootstrap_sql())
+            _dsn = server.get_uri(database=DATABASE_NAME)
+    return _dsn
@@ -0,0 +1,112 @@
+"""On-disk cache for past-year grass (/잔디) data and images.
+
+A year before the current KST year no longer changes, so its calendar rows
+(fetch_user_calendar_year_kst) and rendered PNGs are kept under
+GRASS_CACHE_DIR (default data/grass_cache, 'off' disables):
+
+    <guild_id>/<user_id>/<year>/calendar.json
+    <guild_id>/<user_id>/<year>/<render key>.png
+
+The render key hashes everything drawn besides the data (name, house theme,
+color cap, avatar hash), so a renamed user or new avatar gets a new image.
+The few writes that can still touch a past year (a session closed across New
+Year, journal replay, user deletion) call invalidate(); admin backfills run
+scripts/invalidate_grass_cache.py. Files are written atomically (tmp + rename).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+_DEFAULT_DIR = Path(__file__).resolve().parents[1] / "data" / "grass_cache"
+# bump when render_annual_grass_image output changes so old PNGs are not served
+RENDER_VERSION = 1
+
+
+def get_cache_dir() -> Optional[Path]:
+    """Return the cache root from GRASS_CACHE_DIR (default data/grass_cache); None if 'off'."""
+    raw = os.getenv("GRASS_CACHE_DIR", "").strip()
+    if raw.lower() in ("off", "0", "false", "none"):
+        return None
+    return Path(raw) if raw else _DEFAULT_DIR
+
+
+def _year_dir(guild_id: int, user_id: int, year: int) -> Optional[Path]:
+    root = get_cache_dir()
+    return root / str(guild_id) / str(user_id) / str(year) if root else None
+
+
+def render_key(username: str, house_name: Optional[str], cap_hours: float, avatar_key: Optional[str]) -> str:
+    raw = json.dumps([RENDER_VERSION, username, house_name, cap_hours, avatar_key], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_calendar(guild_id: int, user_id: int, year: int) -> Optional[list[dict]]:
+    d = _year_dir(guild_id, user_id, year)
+    if d is None:
+        return None
+    try:
+        with open(d / "calendar.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logging.warning("Ignoring unreadable grass cache %s: %s", d, exc)
+        return None
+
+
+def store_calendar(guild_id: int, user_id: int, year: int, rows: list[dict]) -> None:
+    d = _year_dir(guild_id, user_id, year)
+    if d is None:
+        return
+    try:
+        _write_atomic(d / "calendar.json", json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+    except OSError as exc:
+        logging.warning("Failed to write grass cache %s: %s", d, exc)
+
+
+def load_png(guild_id: int, user_id: int, year: int, key: str) -> Optional[bytes]:
+    d = _year_dir(guild_id, user_id, year)
+    if d is None:
+        return None
+    try:
+        return (d / f"{key}.png").read_bytes()
+    except OSError:
+        return None
+
+
+def store_png(guild_id: int, user_id: int, year: int, key: str, png: bytes) -> None:
+    d = _year_dir(guild_id, user_id, year)
+    if d is None:
+        return
+    try:
+        _write_atomic(d / f"{key}.png", png)
+    except OSError as exc:
+        logging.warning("Failed to write grass cache %s: %s", d, exc)
+
+
+def invalidate(guild_id: Optional[int] = None, user_id: Optional[int] = None, year: Optional[int] = None) -> int:
+    """Remove cached years matching the given filters (None = any). Returns directories removed."""
+    root = get_cache_dir()
+    if root is None or not root.exists():
+        return 0
+    removed = 0
+    for guild_dir in root.glob(str(guild_id) if guild_id is not None else "*"):
+        for user_dir in guild_dir.glob(str(user_id) if user_id is not None else "*"):
+            for year_dir in user_dir.glob(str(year) if year is not None else "*"):
+                shutil.rmtree(year_dir, ignore_errors=True)
+                removed += 1
+    return removed
@@ -240,6 +240,8 @@ def render_profile_card(
     subtitle_line2: str | None = None,
     house_name: str | None = None,
     voost_visible: bool = True,
+    current_streak: int = 0,
+    longest_streak: int = 0,
 ) -> BytesIO:
     width, height = 800, 360
     theme = _resolve_house_theme(house_name)
@@ -433,6 +435,11 @@ def render_profile_card(
         # Fallback: below the bar (original position)
         draw.text((bar_x + bar_w - t_w, bar_y + bar_h + under_gap), prog_text, fill=text, font=xp_font_small)
 
+    # Streak line under the bar (left-aligned; the fallback progress label sits on the right)
+    if current_streak > 0 or longest_streak > 0:
+        streak_text = f"연속 {current_streak}일 · 최장 {longest_streak}일"
+        draw.text((bar_x, bar_y + bar_h + under_gap), streak_text, fill=text, font=xp_font_small)
+
     # (moved watermark to stats panel for visual balance)
 
     buf = BytesIO()
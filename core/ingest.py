@@ -0,0 +1,171 @@
+"""Gateway event ingestion queue.
+
+Discord event handlers enqueue small typed events and return immediately; a
+pool of workers performs the database work. Events are partitioned by
+(guild_id, user_id) so a single user's events are still processed in order.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Awaitable, Callable, ClassVar, Dict, Optional
+
+
+@dataclass(kw_only=True)
+class IngestEvent:
+    guild_id: int
+    user_id: int
+    enqueued_at: float = field(default=0.0, compare=False)
+
+    # Droppable events are discarded when their queue is full; the rest wait for space.
+    droppable: ClassVar[bool] = False
+
+
+@dataclass(kw_only=True)
+class VoiceTransition(IngestEvent):
+    """A voice join/leave/move already resolved against the in-memory session map."""
+
+    kind: str  # "join" | "leave" | "move"
+    at: datetime
+    started_at: Optional[datetime] = None  # start of the session being closed
+    record_previous: bool = False
+    start_next: bool = False
+    discard_previous: bool = False  # short leave: delete the open session instead of recording it
+    before_channel: Optional[int] = None
+    after_channel: Optional[int] = None
+    journal_seq: int = 0  # voice journal entry to acknowledge once applied (0 = not journaled)
+
+
+@dataclass(kw_only=True)
+class ChatActivity(IngestEvent):
+    activity_date: date
+
+    droppable: ClassVar[bool] = True
+
+
+@dataclass(kw_only=True)
+class ReactionUsage(IngestEvent):
+    emoji: str
+    usage_date: date
+
+    droppable: ClassVar[bool] = True
+
+
+@dataclass(kw_only=True)
+class PostXp(IngestEvent):
+    amount: int
+    announce: bool = False  # send a level-up message when the award crosses a level
+
+
+Handler = Callable[[IngestEvent], Awaitable[None]]
+
+_handlers: Dict[type, Handler] = {}
+_queues: list[asyncio.Queue] = []
+_workers: list[asyncio.Task] = []
+_stats: Dict[str, float] = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "dropped": 0,
+    "backpressure_waits": 0,
+    "lag_ms_total": 0.0,
+    "lag_ms_max": 0.0,
+}
+
+
+def register_handler(event_type: type, handler: Handler) -> None:
+    _handlers[event_type] = handler
+
+
+async def _dispatch(event: IngestEvent) -> None:
+    handler = _handlers.get(type(event))
+    if handler is None:
+        logging.warning("No ingest handler registered for %s", type(event).__name__)
+        return
+    await handler(event)
+
+
+async def _worker(queue: asyncio.Queue) -> None:
+    while True:
+        event: IngestEvent = await queue.get()
+        try:
+            lag_ms = (time.monotonic() - event.enqueued_at) * 1000.0
+            _stats["lag_ms_total"] += lag_ms
+            _stats["lag_ms_max"] = max(_stats["lag_ms_max"], lag_ms)
+            await _dispatch(event)
+            _stats["processed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _stats["failed"] += 1
+            logging.warning("Ingest handler failed for %s: %s", type(event).__name__, exc)
+        finally:
+            queue.task_done()
+
+
+def start_ingest_workers(num_workers: int = 4, queue_size: int = 1000) -> None:
+    """Start the keyed worker pool (idempotent). Must be called from a running event loop."""
+    if _workers:
+        return
+    for _ in range(max(1, num_workers)):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        _queues.append(queue)
+        _workers.append(asyncio.create_task(_worker(queue)))
+
+
+async def stop_ingest_workers(timeout: float = 10.0) -> None:
+    """Drain pending events (up to timeout seconds) and stop the workers."""
+    if not _workers:
+        return
+    try:
+        await asyncio.wait_for(asyncio.gather(*(q.join() for q in _queues)), timeout=timeout)
+    except asyncio.TimeoutError:
+        logging.warning("Ingest queue drain timed out with %s events pending", sum(q.qsize() for q in _queues))
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queues.clear()
+
+
+async def enqueue(event: IngestEvent) -> bool:
+    """Queue an event for its (guild, user) partition. Returns False if it was dropped.
+
+    Without running workers the event is processed inline so callers never lose work.
+    """
+    if not _queues:
+        await _dispatch(event)
+        return True
+    queue = _queues[hash((event.guild_id, event.user_id)) % len(_queues)]
+    event.enqueued_at = time.monotonic()
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        if event.droppable:
+            _stats["dropped"] += 1
+            return False
+        _stats["backpressure_waits"] += 1
+        await queue.put(event)
+    _stats["enqueued"] += 1
+    return True
+
+
+def get_ingest_stats() -> Dict[str, float]:
+    """Return queue depth, throughput, drop and lag metrics."""
+    depths = [q.qsize() for q in _queues]
+    processed = int(_stats["processed"]) + int(_stats["failed"])
+    return {
+        "workers": len(_workers),
+        "depth": sum(depths),
+        "max_partition_depth": max(depths) if depths else 0,
+        "enqueued": int(_stats["enqueued"]),
+        "processed": int(_stats["processed"]),
+        "failed": int(_stats["failed"]),
+        "dropped": int(_stats["dropped"]),
+        "backpressure_waits": int(_stats["backpressure_waits"]),
+        "lag_ms_avg": (_stats["lag_ms_total"] / processed) if processed else 0.0,
+        "lag_ms_max": _stats["lag_ms_max"],
+    }
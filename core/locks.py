@@ -0,0 +1,68 @@
+"""Striped per-user asyncio locks.
+
+Writes that lock a users row take the stripe lock for (user_id, guild_id)
+before borrowing a pool connection, so concurrent writers for the same user
+wait in-process instead of holding connections while blocked on row locks.
+Memory is bounded by the stripe count; unrelated users may share a stripe.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, Tuple
+
+
+def _stripe_count() -> int:
+    try:
+        return max(1, int(os.getenv("USER_LOCK_STRIPES", "256").strip()))
+    except Exception:
+        return 256
+
+
+_locks: list[asyncio.Lock] = [asyncio.Lock() for _ in range(_stripe_count())]
+_stats: Dict[str, int] = {"acquired": 0, "contended": 0}
+
+
+def _stripe_of(user_id: int, guild_id: int) -> int:
+    return hash((guild_id, user_id)) % len(_locks)
+
+
+async def _acquire(index: int) -> None:
+    lock = _locks[index]
+    _stats["acquired"] += 1
+    if lock.locked():
+        _stats["contended"] += 1
+    await lock.acquire()
+
+
+@asynccontextmanager
+async def user_lock(user_id: int, guild_id: int) -> AsyncIterator[None]:
+    """Serialize mutations for one (user_id, guild_id) pair within this process."""
+    index = _stripe_of(user_id, guild_id)
+    await _acquire(index)
+    try:
+        yield
+    finally:
+        _locks[index].release()
+
+
+@asynccontextmanager
+async def user_locks(pairs: Iterable[Tuple[int, int]]) -> AsyncIterator[None]:
+    """Hold the locks of many (user_id, guild_id) pairs; stripes are taken in index order to avoid deadlocks."""
+    indexes = sorted({_stripe_of(user_id, guild_id) for user_id, guild_id in pairs})
+    async with AsyncExitStack() as stack:
+        for index in indexes:
+            await _acquire(index)
+            stack.callback(_locks[index].release)
+        yield
+
+
+def get_lock_stats() -> Dict[str, float]:
+    acquired = _stats["acquired"]
+    return {
+        "stripes": len(_locks),
+        "acquired": acquired,
+        "contended": _stats["contended"],
+        "contention_rate": (_stats["contended"] / acquired) if acquired else 0.0,
+    }
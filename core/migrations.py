@@ -0,0 +1,228 @@
+"""Versioned schema migrations with an applied-migrations ledger.
+
+Migrations are the assets/db/migrations/migration_NNN_<name>.sql files, applied
+in version order. public.schema_migrations records each applied version with a
+checksum of its file, so a deploy runs only the pending files and one-shot data
+rewrites (e.g. migration_012 UTC->KST) are never replayed.
+
+Each migration runs in its own transaction together with its ledger row; the
+files' own top-level BEGIN;/COMMIT; lines are dropped for that. A file whose
+first line is `-- migrate:no-transaction` runs statement by statement outside a
+transaction instead (needed for CREATE INDEX CONCURRENTLY); write such files so
+that re-running them is harmless, since a failure can leave them half applied.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import asyncpg
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "assets" / "db" / "migrations"
+NO_TRANSACTION_DIRECTIVE = "-- migrate:no-transaction"
+
+_FILE_RE = re.compile(r"^migration_(\d+)_(.+)\.sql$")
+_TX_LINE_RE = re.compile(r"^[ \t]*(BEGIN|COMMIT)[ \t]*;[ \t]*$", re.IGNORECASE | re.MULTILINE)
+# one deploy at a time; arbitrary constant shared by every runner
+_ADVISORY_LOCK_KEY = 73104172025
+
+
+@dataclass(kw_only=True, frozen=True)
+class Migration:
+    version: str
+    name: str
+    path: Path
+    sql: str
+    checksum: str
+    transactional: bool
+
+
+def discover_migrations(directory: Optional[Path] = None) -> list[Migration]:
+    """Read every migration file in version order."""
+    directory = directory or MIGRATIONS_DIR
+    found: Dict[str, Migration] = {}
+    for path in sorted(directory.glob("migration_*.sql")):
+        m = _FILE_RE.match(path.name)
+        if not m:
+            continue
+        version = m.group(1)
+        if version in found:
+            raise RuntimeError(f"Duplicate migration version {version}: {found[version].path.name}, {path.name}")
+        # checksum over LF text so a CRLF checkout does not look like an edited file
+        sql = path.read_text(encoding="utf-8-sig").replace("\r\n", "\n")
+        found[version] = Migration(
+            version=version,
+            name=path.name,
+            path=path,
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            transactional=not sql.lstrip().startswith(NO_TRANSACTION_DIRECTIVE),
+        )
+    return [found[v] for v in sorted(found, key=int)]
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a script on top-level semicolons (quotes, comments and $$ bodies respected)."""
+    statements: list[str] = []
+    buf: list[str] = []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = n if end == -1 else end
+            buf.append(sql[i:end])
+            i = end
+            continue
+        if ch == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and not sql.startswith("''", end):
+                    break
+                end += 2 if sql.startswith("''", end) else 1
+            buf.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        if ch == "$":
+            tag = re.match(r"\$[A-Za-z_0-9]*\$", sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                end = n if end == -1 else end + len(tag.group(0))
+                buf.append(sql[i:end])
+                i = end
+                continue
+        if ch == ";":
+            statements.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+        i += 1
+    statements.append("".join(buf))
+    # drop comment-only / empty chunks
+    return [s.strip() for s in statements if re.sub(r"--[^\n]*", "", s).strip()]
+
+
+async def ensure_ledger(conn: asyncpg.Connection) -> None:
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            execution_ms INTEGER NOT NULL DEFAULT 0,
+            baseline BOOLEAN NOT NULL DEFAULT FALSE
+        );
+        -- 내부 관리용 테이블: 정책 없이 RLS만 켜서 anon/authenticated 에 노출하지 않음
+        ALTER TABLE public.schema_migrations ENABLE ROW LEVEL SECURITY;
+        """
+    )
+
+
+async def fetch_applied(conn: asyncpg.Connection) -> Dict[str, asyncpg.Record]:
+    if not await conn.fetchval("SELECT to_regclass('public.schema_migrations') IS NOT NULL"):
+        return {}
+    rows = await conn.fetch("SELECT version, name, checksum, applied_at, execution_ms, baseline FROM public.schema_migrations")
+    return {r["version"]: r for r in rows}
+
+
+async def _record(conn: asyncpg.Connection, migration: Migration, execution_ms: int, baseline: bool) -> None:
+    from core.database import now_kst_naive
+
+    await conn.execute(
+        """
+        INSERT INTO public.schema_migrations (version, name, checksum, applied_at, execution_ms, baseline)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        """,
+        migration.version,
+        migration.name,
+        migration.checksum,
+        now_kst_naive(),
+        execution_ms,
+        baseline,
+    )
+
+
+async def _apply(conn: asyncpg.Connection, migration: Migration) -> int:
+    started = time.perf_counter()
+    if migration.transactional:
+        async with conn.transaction():
+            await conn.execute(_TX_LINE_RE.sub("", migration.sql))
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            await _record(conn, migration, elapsed_ms, baseline=False)
+        return elapsed_ms
+    for statement in split_statements(migration.sql):
+        await conn.execute(statement)
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    await _record(conn, migration, elapsed_ms, baseline=False)
+    return elapsed_ms
+
+
+async def run_migrations(
+    conn: asyncpg.Connection,
+    migrations: list[Migration],
+    baseline: Optional[str] = None,
+    dry_run: bool = False,
+    log: Callable[[str], None] = print,
+) -> list[Migration]:
+    """Apply pending migrations in order. Returns the migrations applied (or that would be).
+
+    baseline marks every migration up to and including that version as applied
+    without running it; use it once on a database that was migrated by hand
+    before the ledger existed. Without it, a database that already has tables
+    but an empty ledger is refused so old data rewrites are not replayed.
+    Raises RuntimeError on a checksum mismatch or an applied version whose file
+    is gone.
+    """
+    await conn.execute("SELECT pg_advisory_lock($1)", _ADVISORY_LOCK_KEY)
+    try:
+        if not dry_run:
+            await ensure_ledger(conn)
+        applied = await fetch_applied(conn)
+        done = set(applied)
+        known = {m.version for m in migrations}
+
+        for version, row in sorted(applied.items()):
+            if version not in known:
+                raise RuntimeError(f"Applied migration {row['name']} is missing from {MIGRATIONS_DIR}")
+        for m in migrations:
+            row = applied.get(m.version)
+            if row is not None and row["checksum"] != m.checksum:
+                raise RuntimeError(
+                    f"Checksum mismatch for {m.name}: the file changed after it was applied. "
+                    "Add a new migration instead of editing an applied one."
+                )
+
+        if baseline is not None:
+            if int(baseline) not in {int(m.version) for m in migrations}:
+                raise RuntimeError(f"Unknown baseline version {baseline}")
+            for m in migrations:
+                if int(m.version) > int(baseline) or m.version in done:
+                    continue
+                log(f"baseline  {m.name}")
+                if not dry_run:
+                    await _record(conn, m, 0, baseline=True)
+                done.add(m.version)
+        elif not applied:
+            has_tables = await conn.fetchval("SELECT to_regclass('public.users') IS NOT NULL")
+            if has_tables:
+                raise RuntimeError(
+                    "The database already has tables but schema_migrations is empty. "
+                    "Run once with --baseline <last applied version> to record the existing schema."
+                )
+
+        pending = [m for m in migrations if m.version not in done]
+        for m in pending:
+            if dry_run:
+                log(f"pending   {m.name}{'' if m.transactional else ' (no transaction)'}")
+                continue
+            elapsed_ms = await _apply(conn, m)
+            log(f"applied   {m.name} ({elapsed_ms} ms)")
+        return pending
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", _ADVISORY_LOCK_KEY)
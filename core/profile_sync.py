@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from core.database import (
+    PROFILE_CLEARABLE_COLUMNS,
+    PROFILE_COLUMNS,
+    fetch_user_profiles,
+    is_user_known,
+    upsert_user_profiles,
+)
+
+
+# (guild_id, user_id) -> fingerprint of the last persisted value per PROFILE_COLUMNS entry.
+# None in a slot means "unknown", which always counts as changed; a stored NULL has the fingerprint of None.
+_fingerprints: dict[tuple[int, int], list[Optional[int]]] = {}
+_seeded_guilds: set[int] = set()
+_sync_stats: Dict[str, int] = {"checked": 0, "written": 0}
+
+
+def _fingerprint(value: object) -> int:
+    return hash(value)
+
+
+def _writes(col: str, fields: Dict[str, object]) -> bool:
+    """True if fields carries a value for col that upsert_user_profiles writes (None clears clearable columns)."""
+    return col in fields and (fields[col] is not None or col in PROFILE_CLEARABLE_COLUMNS)
+
+
+def _remember(user_id: int, guild_id: int, fields: Dict[str, object]) -> None:
+    fp = _fingerprints.setdefault((guild_id, user_id), [None] * len(PROFILE_COLUMNS))
+    for idx, col in enumerate(PROFILE_COLUMNS):
+        if _writes(col, fields):
+            fp[idx] = _fingerprint(fields[col])
+
+
+def _changed_fields(user_id: int, guild_id: int, fields: Dict[str, object]) -> Dict[str, object]:
+    """Return the subset of fields whose value differs from the last persisted one.
+
+    Only the given fields are compared. None clears nickname, profile_image and
+    dormitory (e.g. the house role was removed); for student_no and joined_at it
+    is "no information" and never written. A user missing from the known-user
+    cache (e.g. deleted since) is treated as having nothing persisted.
+    """
+    fp = _fingerprints.get((guild_id, user_id)) if is_user_known(user_id, guild_id) else None
+    changed: Dict[str, object] = {}
+    for idx, col in enumerate(PROFILE_COLUMNS):
+        if not _writes(col, fields):
+            continue
+        value = fields[col]
+        if fp is None or fp[idx] != _fingerprint(value):
+            changed[col] = value
+    return changed
+
+
+def forget_profile(user_id: int, guild_id: int) -> None:
+    _fingerprints.pop((guild_id, user_id), None)
+
+
+def get_profile_sync_stats() -> Dict[str, int]:
+    """Return counts of profiles checked vs actually written since startup."""
+    return {**_sync_stats, "tracked": len(_fingerprints)}
+
+
+async def seed_guild_fingerprints(guild_id: int) -> int:
+    """Load persisted profile columns for a guild so the first sync only writes real diffs."""
+    rows = await fetch_user_profiles(guild_id)
+    for user_id, fields in rows.items():
+        _fingerprints[(guild_id, user_id)] = [_fingerprint(fields.get(col)) for col in PROFILE_COLUMNS]
+    _seeded_guilds.add(guild_id)
+    return len(rows)
+
+
+async def sync_user_profile(user_id: int, guild_id: int, **fields: object) -> bool:
+    """Persist only the given profile fields that changed. Returns True if a write happened."""
+    _sync_stats["checked"] += 1
+    changed = _changed_fields(user_id, guild_id, fields)
+    if not changed:
+        return False
+    await upsert_user_profiles(guild_id, {user_id: changed})
+    _remember(user_id, guild_id, changed)
+    _sync_stats["written"] += 1
+    return True
+
+
+async def sync_guild_profiles(guild_id: int, profiles: Dict[int, Dict[str, object]]) -> int:
+    """Diff a guild's member profiles against persisted values and upsert changed rows at once.
+
+    Returns the number of users written.
+    """
+    if guild_id not in _seeded_guilds:
+        await seed_guild_fingerprints(guild_id)
+    changed_rows: Dict[int, Dict[str, object]] = {}
+    for user_id, fields in profiles.items():
+        _sync_stats["checked"] += 1
+        changed = _changed_fields(user_id, guild_id, fields)
+        if changed:
+            changed_rows[user_id] = changed
+    if not changed_rows:
+        return 0
+    await upsert_user_profiles(guild_id, changed_rows)
+    for user_id, changed in changed_rows.items():
+        _remember(user_id, guild_id, changed)
+    _sync_stats["written"] += len(changed_rows)
+    return len(changed_rows)
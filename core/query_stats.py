@@ -0,0 +1,202 @@
+"""Per-call-site query instrumentation for core.database.
+
+Connections handed out by core.database.acquire() are wrapped in
+InstrumentedConnection, which times execute/fetch/fetchrow/fetchval/
+executemany and attributes them to the calling function (e.g.
+fetch_user_calendar_year_kst). Queries slower than DB_SLOW_QUERY_MS are
+logged with their parameters redacted to type names.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_sites: Dict[str, Dict[str, Any]] = {}
+
+
+def _slow_query_ms() -> float:
+    try:
+        return float(os.getenv("DB_SLOW_QUERY_MS", "200").strip())
+    except Exception:
+        return 200.0
+
+
+def _site(name: str) -> Dict[str, Any]:
+    site = _sites.get(name)
+    if site is None:
+        site = {
+            "calls": 0,
+            "errors": 0,
+            "rows": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "pool_wait_ms": 0.0,
+            "buckets": [0] * (len(BUCKETS_MS) + 1),
+        }
+        _sites[name] = site
+    return site
+
+
+def _redact(args: tuple) -> str:
+    """Describe parameters without their values (user ids, nicknames, ...)."""
+    parts = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            parts.append(f"<{type(arg).__name__}[{len(arg)}]>")
+        else:
+            parts.append(f"<{type(arg).__name__}>")
+    return ", ".join(parts)
+
+
+def _row_count(method: str, result: Any) -> int:
+    if method == "fetch":
+        return len(result)
+    if method in ("fetchrow", "fetchval"):
+        return 0 if result is None else 1
+    if method == "execute" and isinstance(result, str):
+        # asyncpg status tag, e.g. "UPDATE 3" / "INSERT 0 5"
+        tail = result.rsplit(" ", 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    return 0
+
+
+def record_pool_wait(site_name: str, waited_ms: float) -> None:
+    _site(site_name)["pool_wait_ms"] += waited_ms
+
+
+def record_query(site_name: str, method: str, query: str, args: tuple, elapsed_ms: float, rows: int, failed: bool) -> None:
+    site = _site(site_name)
+    site["calls"] += 1
+    site["rows"] += rows
+    site["total_ms"] += elapsed_ms
+    site["max_ms"] = max(site["max_ms"], elapsed_ms)
+    if failed:
+        site["errors"] += 1
+    for i, bound in enumerate(BUCKETS_MS):
+        if elapsed_ms <= bound:
+            site["buckets"][i] += 1
+            break
+    else:
+        site["buckets"][-1] += 1
+
+    if elapsed_ms >= _slow_query_ms():
+        logging.warning(
+            "Slow query: site=%s method=%s %.1fms rows=%s sql=%s params=(%s)",
+            site_name,
+            method,
+            elapsed_ms,
+            rows,
+            " ".join(query.split())[:300],
+            _redact(args),
+        )
+
+
+def _percentile_ms(buckets: list[int], calls: int, pct: float) -> float:
+    """Upper bound of the bucket containing the pct-th call (histogram estimate)."""
+    if calls <= 0:
+        return 0.0
+    target = calls * pct
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= target:
+            return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+def get_query_stats(top: Optional[int] = None) -> list[Dict[str, Any]]:
+    """Return per-call-site stats sorted by total time (most expensive first)."""
+    out = []
+    for name, site in _sites.items():
+        calls = site["calls"]
+        out.append({
+            "site": name,
+            "calls": calls,
+            "errors": site["errors"],
+            "rows": site["rows"],
+            "total_ms": site["total_ms"],
+            "avg_ms": (site["total_ms"] / calls) if calls else 0.0,
+            "max_ms": site["max_ms"],
+            "p50_ms": _percentile_ms(site["buckets"], calls, 0.50),
+            "p95_ms": _percentile_ms(site["buckets"], calls, 0.95),
+            "pool_wait_ms": site["pool_wait_ms"],
+            "buckets": list(site["buckets"]),
+        })
+    out.sort(key=lambda s: s["total_ms"], reverse=True)
+    return out[:top] if top else out
+
+
+def reset_query_stats() -> None:
+    _sites.clear()
+
+
+def caller_name(depth: int = 2) -> str:
+    """Name of the function `depth` frames up (1 = the function calling caller_name)."""
+    try:
+        return sys._getframe(depth).f_code.co_name
+    except ValueError:
+        return "<unknown>"
+
+
+async def timed_call(conn: "InstrumentedConnection", site_name: str, method: str, query: str, args: tuple, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run one query call and record it (plus any pending pool wait) under site_name."""
+    if conn._pending_wait_ms:
+        record_pool_wait(site_name, conn._pending_wait_ms)
+        conn._pending_wait_ms = 0.0
+    t0 = time.perf_counter()
+    failed = False
+    result: Any = None
+    try:
+        result = await call()
+        return result
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        rows = 0 if failed else _row_count(method, result)
+        record_query(site_name, method, query, args, elapsed_ms, rows, failed)
+
+
+class InstrumentedConnection:
+    """Thin proxy over an asyncpg connection that records per-call-site query stats.
+
+    Anything other than the query methods (transaction(), etc.) is delegated as is.
+    """
+
+    def __init__(self, conn: Any, pool_wait_ms: float = 0.0) -> None:
+        self._conn = conn
+        # attributed to the first call site that uses this connection
+        self._pending_wait_ms = pool_wait_ms
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    @property
+    def raw(self) -> Any:
+        """The wrapped (uninstrumented) connection."""
+        return self._conn
+
+    async def _run(self, method: str, site_name: str, query: str, args: tuple, kwargs: dict) -> Any:
+        return await timed_call(self, site_name, method, query, args, lambda: getattr(self._conn, method)(query, *args, **kwargs))
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("execute", caller_name(), query, args, kwargs)
+
+    async def executemany(self, query: str, args: Any, **kwargs: Any) -> Any:
+        return await self._run("executemany", caller_name(), query, (args,), kwargs)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("fetch", caller_name(), query, args, kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("fetchrow", caller_name(), query, args, kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self._run("fetchval", caller_name(), query, args, kwargs)
@@ -0,0 +1,181 @@
+"""In-process TTL/LRU cache for per-user read queries in core.database.
+
+Entries are keyed by (function, user_id, guild_id, period) and grouped per
+guild, each guild holding at most READ_CACHE_MAX_PER_GUILD entries (least
+recently used evicted first). Write paths call invalidate_user() after they
+commit (via core.change_feed, which also tells other processes), which drops
+every entry of that user and bumps the user's generation; a read that started
+before the write then refuses to store its (older) result. The TTL
+(READ_CACHE_TTL_SECONDS, 0 disables the cache) is a backstop for writes whose
+notification was lost.
+
+Cached functions read from the primary, not the DATABASE_READ_URL replica: a
+miss right after an invalidation would otherwise refill the cache with the
+replica's lagging copy and keep serving it until the TTL.
+
+Cached values are shared between callers and must not be mutated.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default)).strip()))
+    except Exception:
+        return default
+
+
+def _ttl_seconds() -> float:
+    return _env_float("READ_CACHE_TTL_SECONDS", 300.0)
+
+
+def _max_per_guild() -> int:
+    return max(1, int(_env_float("READ_CACHE_MAX_PER_GUILD", 2000)))
+
+
+# guild_id -> OrderedDict[(function, user_id, period)] -> (expires_at, value)
+_entries: Dict[int, "OrderedDict[Tuple[str, int, Hashable], Tuple[float, Any]]"] = {}
+# (user_id, guild_id) -> cached keys of that user, for exact invalidation
+_user_keys: Dict[Tuple[int, int], set] = {}
+# (user_id, guild_id) -> write count (one int per user ever written), plus a global
+# epoch bumped by clear(); reads compare both before storing
+_generations: Dict[Tuple[int, int], int] = {}
+_epoch = [0]
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "stale_skips": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+_function_stats: Dict[str, Dict[str, int]] = {}
+
+_MISS = object()
+
+
+def _drop(guild_id: int, key: Tuple[str, int, Hashable]) -> None:
+    guild = _entries.get(guild_id)
+    if guild is None or guild.pop(key, None) is None:
+        return
+    keys = _user_keys.get((key[1], guild_id))
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _user_keys[(key[1], guild_id)]
+    if not guild:
+        del _entries[guild_id]
+
+
+def _lookup(function: str, user_id: int, guild_id: int, period: Hashable) -> Any:
+    fstats = _function_stats.setdefault(function, {"hits": 0, "misses": 0})
+    key = (function, user_id, period)
+    guild = _entries.get(guild_id)
+    item = guild.get(key) if guild is not None else None
+    if item is not None and item[0] <= time.monotonic():
+        _drop(guild_id, key)
+        _stats["expirations"] += 1
+        item = None
+    if item is None:
+        _stats["misses"] += 1
+        fstats["misses"] += 1
+        return _MISS
+    guild.move_to_end(key)
+    _stats["hits"] += 1
+    fstats["hits"] += 1
+    return item[1]
+
+
+def _generation(user_id: int, guild_id: int) -> Tuple[int, int]:
+    return _epoch[0], _generations.get((user_id, guild_id), 0)
+
+
+def _store(function: str, user_id: int, guild_id: int, period: Hashable, value: Any, generation: Tuple[int, int]) -> None:
+    if _generation(user_id, guild_id) != generation:
+        # a write for this user finished while the query ran; its result may predate it
+        _stats["stale_skips"] += 1
+        return
+    key = (function, user_id, period)
+    guild = _entries.setdefault(guild_id, OrderedDict())
+    guild[key] = (time.monotonic() + _ttl_seconds(), value)
+    guild.move_to_end(key)
+    _user_keys.setdefault((user_id, guild_id), set()).add(key)
+    _stats["stores"] += 1
+    limit = _max_per_guild()
+    while len(guild) > limit:
+        _drop(guild_id, next(iter(guild)))
+        _stats["evictions"] += 1
+
+
+def cached_read(function: str, period: Callable[..., Hashable] = lambda *args, **kwargs: None):
+    """Cache an async (user_id, guild_id, ...) read; period(*rest) completes the key.
+
+    None results (e.g. no users row yet) are not cached.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(user_id: int, guild_id: int, *args, **kwargs):
+            if _ttl_seconds() <= 0:
+                return await func(user_id, guild_id, *args, **kwargs)
+            key_period = period(*args, **kwargs)
+            value = _lookup(function, user_id, guild_id, key_period)
+            if value is not _MISS:
+                return value
+            generation = _generation(user_id, guild_id)
+            value = await func(user_id, guild_id, *args, **kwargs)
+            if value is not None:
+                _store(function, user_id, guild_id, key_period, value, generation)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_user(user_id: int, guild_id: int) -> None:
+    """Drop every cached read of one user; call after the write has committed."""
+    pair = (user_id, guild_id)
+    _generations[pair] = _generations.get(pair, 0) + 1
+    keys = _user_keys.pop(pair, None)
+    if not keys:
+        return
+    guild = _entries.get(guild_id)
+    if guild is not None:
+        for key in keys:
+            guild.pop(key, None)
+        if not guild:
+            del _entries[guild_id]
+    _stats["invalidations"] += len(keys)
+
+
+def invalidate_guild(guild_id: int) -> None:
+    """Drop every cached read of one guild (bulk writes without a user list)."""
+    _epoch[0] += 1
+    guild = _entries.pop(guild_id, None)
+    if not guild:
+        return
+    for _function, user_id, _period in guild:
+        _user_keys.pop((user_id, guild_id), None)
+    _stats["invalidations"] += len(guild)
+
+
+def clear() -> None:
+    """Drop everything (bulk recomputes such as backfill_streak_counters)."""
+    _epoch[0] += 1
+    _stats["invalidations"] += sum(len(g) for g in _entries.values())
+    _entries.clear()
+    _user_keys.clear()
+
+
+def get_read_cache_stats() -> Dict[str, Any]:
+    """Return entry counts, hit/miss/eviction counters, hit rate (0.0~1.0) and per-function hits."""
+    hits = _stats["hits"]
+    lookups = hits + _stats["misses"]
+    return {
+        **_stats,
+        "entries": sum(len(g) for g in _entries.values()),
+        "guilds": len(_entries),
+        "max_guild_entries": max((len(g) for g in _entries.values()), default=0),
+        "hit_rate": (hits / lookups) if lookups else 0.0,
+        "functions": {name: dict(s) for name, s in _function_stats.items()},
+    }
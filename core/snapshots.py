@@ -0,0 +1,324 @@
+"""Per-guild snapshot tables for guild-wide reads (migration 021).
+
+- user_daily_totals: seconds / session count per user per KST day (sessions split at 00:00)
+- guild_daily_max: the largest user_daily_totals.seconds per guild and year
+- guild_leaderboards: top SNAPSHOT_TOP_N users per guild for today/week/month/all
+- guild_level_counts: users per level per guild
+
+Session closes in core.database queue the affected (user, guild, day range)
+here; flush_snapshots() (bot background job) recomputes those user-days from
+voice_sessions plus voice_session_rollups (compacted days) and merges the users
+into the guild snapshots. Within a period the values only grow, so merging just
+the changed users keeps the top-N lists and the yearly max exact; writes that
+lower a value (purge, delete) mark the whole guild for a refresh instead.
+rebuild_snapshots() recomputes everything from voice_sessions, the rollups and
+users (bot startup and nightly), which also repairs changes queued in a process
+that crashed before flushing.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+from typing import Dict, Tuple
+
+PERIODS = ("today", "week", "month", "all")
+
+_dirty_days: Dict[Tuple[int, int], Tuple[date, date]] = {}
+_level_guilds: set[int] = set()
+_stale_guilds: set[int] = set()
+_stats: Dict[str, object] = {"flushes": 0, "rebuilds": 0, "user_days": 0, "guild_refreshes": 0, "last_rebuild_at": None}
+
+
+def top_n() -> int:
+    try:
+        return max(1, int(os.getenv("SNAPSHOT_TOP_N", "20").strip()))
+    except Exception:
+        return 20
+
+
+def _queue_days(pair: Tuple[int, int], first: date, last: date) -> None:
+    prev = _dirty_days.get(pair)
+    if prev is not None:
+        first, last = min(first, prev[0]), max(last, prev[1])
+    _dirty_days[pair] = (first, last)
+
+
+def note_session_closed(user_id: int, guild_id: int, started_at: datetime, ended_at: datetime) -> None:
+    """Queue the KST days a closed session touched (call after the close committed)."""
+    _queue_days((user_id, guild_id), started_at.date(), max(started_at, ended_at).date())
+
+
+def note_levels_changed(guild_id: int) -> None:
+    """A user's level changed or a user was added: recount the guild's level histogram."""
+    _level_guilds.add(guild_id)
+
+
+def note_guild_stale(guild_id: int) -> None:
+    """A value went down (purge/delete): refresh every snapshot of the guild."""
+    _stale_guilds.add(guild_id)
+
+
+def pending() -> int:
+    return len(_dirty_days) + len(_level_guilds) + len(_stale_guilds)
+
+
+# Split sessions at 00:00 into per-day seconds; same rule as fetch_user_calendar_year_kst.
+# {sessions} must yield user_id, guild_id, started_at, ended_at of finished sessions and
+# {rollups} the matching voice_session_rollups rows (compacted sessions, core.compaction).
+_DAILY_SQL = """
+    split AS (
+        SELECT s.user_id, s.guild_id, g.d::date AS day,
+               EXTRACT(EPOCH FROM (
+                   LEAST(s.ended_at, g.d + INTERVAL '1 day') - GREATEST(s.started_at, g.d)
+               ))::bigint AS seconds
+        FROM ({sessions}) s
+        CROSS JOIN LATERAL generate_series(
+            date_trunc('day', s.started_at), date_trunc('day', s.ended_at), INTERVAL '1 day'
+        ) AS g(d)
+    ), daily AS (
+        SELECT user_id, guild_id, day, SUM(seconds)::bigint AS seconds, SUM(sessions)::int AS sessions
+        FROM (
+            SELECT user_id, guild_id, day, seconds, 1 AS sessions FROM split WHERE seconds > 0
+            UNION ALL
+            SELECT r.user_id, r.guild_id, r.day, r.seconds, r.sessions FROM ({rollups}) r WHERE r.sessions > 0
+        ) parts
+        GROUP BY user_id, guild_id, day
+    )"""
+
+_DIRTY_CTE = "dirty AS (SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::date[], $4::date[]) AS d(user_id, guild_id, first_day, last_day))"
+
+# A close may end an open session that started earlier than the caller knew (e.g. one
+# left open across a restart); widen each range back to the start of any session ending in it.
+_WIDEN_DIRTY_DAYS = f"""
+    WITH {_DIRTY_CTE}
+    SELECT d.user_id, d.guild_id, d.last_day,
+           LEAST(d.first_day, (
+               SELECT MIN(v.started_at)::date FROM voice_sessions v
+               WHERE v.user_id = d.user_id AND v.guild_id = d.guild_id
+                 AND v.ended_at >= d.first_day AND v.ended_at < d.last_day + 1
+                 AND v.started_at >= d.first_day - $5::interval
+           )) AS first_day
+    FROM dirty d
+"""
+
+_CLEAR_DIRTY_DAYS = f"""
+    WITH {_DIRTY_CTE}
+    DELETE FROM user_daily_totals t
+    USING dirty d
+    WHERE t.user_id = d.user_id AND t.guild_id = d.guild_id AND t.day BETWEEN d.first_day AND d.last_day
+"""
+
+# Recompute the dirty user-days and raise guild_daily_max where a day beat it
+_REFRESH_DIRTY_DAYS = f"""
+    WITH {_DIRTY_CTE}, {_DAILY_SQL.format(sessions='''
+        SELECT v.user_id, v.guild_id, v.started_at, v.ended_at
+        FROM dirty d
+        JOIN voice_sessions v ON v.user_id = d.user_id AND v.guild_id = d.guild_id
+        WHERE v.ended_at IS NOT NULL
+          AND v.ended_at >= d.first_day
+          AND v.started_at < d.last_day + 1
+          AND v.started_at >= d.first_day - $5::interval
+    ''', rollups='''
+        SELECT r.* FROM dirty d
+        JOIN voice_session_rollups r ON r.user_id = d.user_id AND r.guild_id = d.guild_id
+        WHERE r.day BETWEEN d.first_day AND d.last_day
+    ''')}, written AS (
+        INSERT INTO user_daily_totals (user_id, guild_id, day, seconds, sessions)
+        SELECT t.user_id, t.guild_id, t.day, t.seconds, t.sessions
+        FROM daily t
+        JOIN dirty d ON d.user_id = t.user_id AND d.guild_id = t.guild_id AND t.day BETWEEN d.first_day AND d.last_day
+        RETURNING user_id, guild_id, day, seconds
+    )
+    INSERT INTO guild_daily_max AS m (guild_id, year, max_seconds, user_id, day)
+    SELECT DISTINCT ON (guild_id, EXTRACT(YEAR FROM day))
+           guild_id, EXTRACT(YEAR FROM day)::int, seconds, user_id, day
+    FROM written
+    ORDER BY guild_id, EXTRACT(YEAR FROM day), seconds DESC
+    ON CONFLICT (guild_id, year) DO UPDATE
+    SET max_seconds = EXCLUDED.max_seconds, user_id = EXCLUDED.user_id, day = EXCLUDED.day
+    WHERE EXCLUDED.max_seconds > m.max_seconds
+"""
+
+_REBUILD_DAILY = f"""
+    WITH {_DAILY_SQL.format(sessions='''
+        SELECT user_id, guild_id, started_at, ended_at FROM voice_sessions WHERE ended_at IS NOT NULL
+    ''', rollups='SELECT * FROM voice_session_rollups')}
+    INSERT INTO user_daily_totals (user_id, guild_id, day, seconds, sessions)
+    SELECT user_id, guild_id, day, seconds, sessions FROM daily
+"""
+
+# Per-user value of every period; {users} yields user_id, guild_id rows. $N = now (KST)
+_PERIOD_VALUES = """
+    b AS (
+        SELECT date_trunc('day', {now}::timestamp)::date AS d,
+               date_trunc('week', {now}::timestamp)::date AS w,
+               date_trunc('month', {now}::timestamp)::date AS m
+    ), cand AS (
+        SELECT u.guild_id, u.user_id, p.period, p.period_start, p.seconds
+        FROM ({users}) c
+        JOIN users u ON u.user_id = c.user_id AND u.guild_id = c.guild_id
+        LEFT JOIN user_period_totals pt ON pt.user_id = u.user_id AND pt.guild_id = u.guild_id
+        CROSS JOIN b
+        CROSS JOIN LATERAL (VALUES
+            ('today', b.d, CASE WHEN pt.day_start = b.d THEN pt.day_seconds ELSE 0 END),
+            ('week', b.w, CASE WHEN pt.week_start = b.w THEN pt.week_seconds ELSE 0 END),
+            ('month', b.m, CASE WHEN pt.month_start = b.m THEN pt.month_seconds ELSE 0 END),
+            ('all', DATE '2000-01-01', COALESCE(u.total_seconds, 0)::bigint)
+        ) AS p(period, period_start, seconds)
+        WHERE p.seconds > 0
+    )"""
+
+_MERGE_LEADERS = f"""
+    WITH {_PERIOD_VALUES.format(now='$3', users='SELECT * FROM unnest($1::bigint[], $2::bigint[]) AS c(user_id, guild_id)')}
+    INSERT INTO guild_leaderboards AS l (guild_id, period, period_start, user_id, seconds)
+    SELECT guild_id, period, period_start, user_id, seconds FROM cand
+    ON CONFLICT (guild_id, period, user_id) DO UPDATE
+    SET period_start = EXCLUDED.period_start, seconds = EXCLUDED.seconds
+"""
+
+# Drop rows of a finished period first, then everything past top N
+_TRIM_STALE_LEADERS = """
+    DELETE FROM guild_leaderboards
+    WHERE guild_id = ANY($1::bigint[])
+      AND period_start < CASE period
+          WHEN 'today' THEN date_trunc('day', $2::timestamp)::date
+          WHEN 'week' THEN date_trunc('week', $2::timestamp)::date
+          WHEN 'month' THEN date_trunc('month', $2::timestamp)::date
+          ELSE period_start END
+"""
+
+_TRIM_LEADERS = """
+    DELETE FROM guild_leaderboards l
+    USING (
+        SELECT guild_id, period, user_id,
+               ROW_NUMBER() OVER (PARTITION BY guild_id, period ORDER BY seconds DESC, user_id) AS rn
+        FROM guild_leaderboards
+        WHERE guild_id = ANY($1::bigint[])
+    ) r
+    WHERE l.guild_id = r.guild_id AND l.period = r.period AND l.user_id = r.user_id AND r.rn > $2
+"""
+
+_REFRESH_LEADERS = f"""
+    WITH {_PERIOD_VALUES.format(now='$2', users='SELECT user_id, guild_id FROM users WHERE guild_id = ANY($1::bigint[])')}, ranked AS (
+        SELECT cand.*, ROW_NUMBER() OVER (PARTITION BY guild_id, period ORDER BY seconds DESC, user_id) AS rn
+        FROM cand
+    )
+    INSERT INTO guild_leaderboards (guild_id, period, period_start, user_id, seconds)
+    SELECT guild_id, period, period_start, user_id, seconds FROM ranked WHERE rn <= $3
+"""
+
+_REFRESH_LEVELS = """
+    INSERT INTO guild_level_counts (guild_id, level, users)
+    SELECT guild_id, level, COUNT(*)::int FROM users WHERE guild_id = ANY($1::bigint[]) GROUP BY guild_id, level
+"""
+
+_REFRESH_DAILY_MAX = """
+    INSERT INTO guild_daily_max (guild_id, year, max_seconds, user_id, day)
+    SELECT DISTINCT ON (guild_id, EXTRACT(YEAR FROM day))
+           guild_id, EXTRACT(YEAR FROM day)::int, seconds, user_id, day
+    FROM user_daily_totals
+    WHERE guild_id = ANY($1::bigint[])
+    ORDER BY guild_id, EXTRACT(YEAR FROM day), seconds DESC
+"""
+
+
+async def _refresh_levels(conn, guild_ids: list[int]) -> None:
+    await conn.execute("DELETE FROM guild_level_counts WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    await conn.execute(_REFRESH_LEVELS, guild_ids)
+
+
+async def _refresh_guilds(conn, guild_ids: list[int], now: datetime) -> None:
+    """Recompute leaderboards, level counts and yearly daily max of whole guilds."""
+    await conn.execute("DELETE FROM guild_leaderboards WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    await conn.execute(_REFRESH_LEADERS, guild_ids, now, top_n())
+    await _refresh_levels(conn, guild_ids)
+    await conn.execute("DELETE FROM guild_daily_max WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    await conn.execute(_REFRESH_DAILY_MAX, guild_ids)
+    _stats["guild_refreshes"] += len(guild_ids)  # type: ignore[operator]
+
+
+async def flush_snapshots() -> int:
+    """Apply everything queued since the last flush in one transaction. Returns user-days refreshed.
+
+    On failure the queue is put back so the next flush retries it.
+    """
+    from core.database import VOICE_SESSION_MAX_SPAN, acquire, now_kst_naive
+
+    if not pending():
+        return 0
+    dirty = dict(_dirty_days)
+    levels = set(_level_guilds)
+    stale = set(_stale_guilds)
+    _dirty_days.clear()
+    _level_guilds.clear()
+    _stale_guilds.clear()
+    now = now_kst_naive()
+    try:
+        async with acquire("batch") as conn:
+            async with conn.transaction():
+                if dirty:
+                    pairs = list(dirty)
+                    args = (
+                        [u for u, _ in pairs],
+                        [g for _, g in pairs],
+                        [dirty[p][0] for p in pairs],
+                        [dirty[p][1] for p in pairs],
+                    )
+                    rows = await conn.fetch(_WIDEN_DIRTY_DAYS, *args, VOICE_SESSION_MAX_SPAN)
+                    args = (
+                        [r["user_id"] for r in rows],
+                        [r["guild_id"] for r in rows],
+                        [r["first_day"] for r in rows],
+                        [r["last_day"] for r in rows],
+                    )
+                    await conn.execute(_CLEAR_DIRTY_DAYS, *args)
+                    await conn.execute(_REFRESH_DIRTY_DAYS, *args, VOICE_SESSION_MAX_SPAN)
+                    merge = [p for p in pairs if p[1] not in stale]
+                    if merge:
+                        guilds = sorted({g for _, g in merge})
+                        await conn.execute(_MERGE_LEADERS, [u for u, _ in merge], [g for _, g in merge], now)
+                        await conn.execute(_TRIM_STALE_LEADERS, guilds, now)
+                        await conn.execute(_TRIM_LEADERS, guilds, top_n())
+                if stale:
+                    await _refresh_guilds(conn, sorted(stale), now)
+                if levels - stale:
+                    await _refresh_levels(conn, sorted(levels - stale))
+    except BaseException:
+        for pair, (first, last) in dirty.items():
+            _queue_days(pair, first, last)
+        _level_guilds.update(levels)
+        _stale_guilds.update(stale)
+        raise
+    _stats["flushes"] += 1  # type: ignore[operator]
+    days = sum((last - first).days + 1 for first, last in dirty.values())
+    _stats["user_days"] += days  # type: ignore[operator]
+    return days
+
+
+async def rebuild_snapshots() -> int:
+    """Recompute every snapshot table from voice_sessions and users. Returns the guild count.
+
+    Changes queued before the rebuild started are covered by it and dropped.
+    """
+    from core.database import acquire, now_kst_naive
+
+    _dirty_days.clear()
+    _level_guilds.clear()
+    _stale_guilds.clear()
+    now = now_kst_naive()
+    async with acquire("batch") as conn:
+        async with conn.transaction():
+            await conn.execute("DELETE FROM user_daily_totals")
+            await conn.execute(_REBUILD_DAILY)
+            guild_ids = [int(r["guild_id"]) for r in await conn.fetch("SELECT DISTINCT guild_id FROM users")]
+            await conn.execute("DELETE FROM guild_leaderboards WHERE guild_id <> ALL($1::bigint[])", guild_ids)
+            await conn.execute("DELETE FROM guild_level_counts WHERE guild_id <> ALL($1::bigint[])", guild_ids)
+            await conn.execute("DELETE FROM guild_daily_max WHERE guild_id <> ALL($1::bigint[])", guild_ids)
+            await _refresh_guilds(conn, guild_ids, now)
+    _stats["rebuilds"] += 1  # type: ignore[operator]
+    _stats["last_rebuild_at"] = now
+    return len(guild_ids)
+
+
+def get_snapshot_stats() -> Dict[str, object]:
+    return {**_stats, "pending": pending()}
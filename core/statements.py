@@ -0,0 +1,108 @@
+"""Registry of hot SQL statements prepared on every pooled connection at pool init.
+
+DB_STATEMENT_MODE selects how registered statements run:
+- prepared (default): the pool init callback (warm_statements) prepares every
+  registered statement into the new connection's asyncpg statement cache, so
+  even the first call on a connection only binds and executes a named
+  server-side statement, and later calls reuse its cached plan in any pool
+  checkout. (asyncpg invalidates PreparedStatement objects from conn.prepare()
+  whenever the connection is released to the pool, so the statement cache is
+  the public way to keep a statement prepared across checkouts.)
+- pooler: for PgBouncer/Supabase transaction-mode poolers, where named
+  prepared statements do not survive between transactions. asyncpg's
+  statement cache is disabled and statements run as plain SQL text.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from typing import Any, Dict
+
+import asyncpg
+
+# name -> sql
+_REGISTRY: Dict[str, str] = {}
+
+# asyncpg's default (100) is shared with every ad-hoc query on the connection;
+# leave room so the least recently used entries evicted are not the hot ones
+_STATEMENT_CACHE_SIZE = 256
+
+
+def register_statement(name: str, sql: str) -> str:
+    """Register a hot statement; returns the name for use with fetch/fetchrow/execute below."""
+    _REGISTRY[name] = sql
+    return name
+
+
+def get_statement_sql(name: str) -> str:
+    return _REGISTRY[name]
+
+
+def registered_statements() -> Dict[str, str]:
+    return dict(_REGISTRY)
+
+
+def statement_mode() -> str:
+    mode = os.getenv("DB_STATEMENT_MODE", "prepared").strip().lower()
+    return "pooler" if mode == "pooler" else "prepared"
+
+
+def pool_options(kind: str) -> Dict[str, Any]:
+    """Extra asyncpg.create_pool keyword arguments for a pool of the given kind."""
+    if statement_mode() == "pooler":
+        return {"statement_cache_size": 0}
+    return {"statement_cache_size": _STATEMENT_CACHE_SIZE, "init": warm_statements}
+
+
+async def warm_statements(conn: asyncpg.Connection) -> int:
+    """Prepare every registered statement into conn's statement cache. Returns how many are cached.
+
+    asyncpg has no public call that fills the cache without executing, so each
+    statement runs once with NULL arguments inside a read-only transaction that
+    is rolled back: the server parses it (asyncpg keeps the named statement,
+    which survives the rollback) and then refuses any write it would make.
+    """
+    warmed = 0
+    for name, sql in _REGISTRY.items():
+        params = max((int(n) for n in re.findall(r"\$(\d+)", sql)), default=0)
+        tr = conn.transaction(readonly=True)
+        await tr.start()
+        try:
+            await conn.fetch(sql, *([None] * params))
+            warmed += 1
+        except asyncpg.ReadOnlySQLTransactionError:
+            warmed += 1
+        except Exception as exc:
+            # e.g. a migration not applied yet: the first real call prepares it instead
+            logging.warning("Could not prepare statement %s: %s", name, exc)
+        finally:
+            await tr.rollback()
+    return warmed
+
+
+async def _run(conn: Any, method: str, name: str, args: tuple) -> Any:
+    from core.query_stats import InstrumentedConnection, caller_name, timed_call
+
+    sql = get_statement_sql(name)
+    if isinstance(conn, InstrumentedConnection):
+        # frames: caller_name <- _run <- fetch/fetchrow/... <- the core.database function
+        site_name = caller_name(3)
+        return await timed_call(conn, site_name, method, sql, args, lambda: getattr(conn.raw, method)(sql, *args))
+    return await getattr(conn, method)(sql, *args)
+
+
+async def fetch(conn: Any, name: str, *args: Any) -> Any:
+    return await _run(conn, "fetch", name, args)
+
+
+async def fetchrow(conn: Any, name: str, *args: Any) -> Any:
+    return await _run(conn, "fetchrow", name, args)
+
+
+async def fetchval(conn: Any, name: str, *args: Any) -> Any:
+    return await _run(conn, "fetchval", name, args)
+
+
+async def execute(conn: Any, name: str, *args: Any) -> Any:
+    return await _run(conn, "execute", name, args)
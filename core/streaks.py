@@ -0,0 +1,95 @@
+"""Study-day bitsets: one BIT(366) per (user, guild, year) in user_streak_bitsets.
+
+SQL sets bit (366 - day_of_year) so that, read back as an integer, bit k is
+day k+1 of the year (Jan 1 = bit 0). Everything below works on those integers
+(or on a window integer where bit k = window start + k days) with shifts and
+masks instead of per-day rows.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+YEAR_BITS = 366
+
+# mask for the day `day` of its year, as a BIT(366) expression ({day} is a date expression)
+BIT_FOR_DAY_SQL = "set_bit(repeat('0', 366)::bit(366), 366 - extract(doy from {day})::int, 1)"
+
+
+def bits_from_db(value: object) -> int:
+    """Convert a BIT(366) value (asyncpg BitString) into the day-indexed integer."""
+    if value is None:
+        return 0
+    raw = bytes(value.bytes)  # type: ignore[attr-defined]
+    return int.from_bytes(raw, "big") >> (len(raw) * 8 - YEAR_BITS)
+
+
+def _days_in_year(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def month_days(year_bits: int, year: int, month: int) -> set[int]:
+    """Day numbers (1..31) of the month that are set."""
+    first = date(year, month, 1)
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    start = first.timetuple().tm_yday - 1
+    span = (nxt - first).days
+    return {k + 1 for k in _iter_bits((year_bits >> start) & ((1 << span) - 1))}
+
+
+def window_bits(bitsets: Dict[int, int], start: date, end: date) -> int:
+    """Integer where bit k means start + k days was a study day (start..end inclusive)."""
+    out = 0
+    offset = 0
+    for year in range(start.year, end.year + 1):
+        lo = (start.timetuple().tm_yday - 1) if year == start.year else 0
+        hi = (end.timetuple().tm_yday - 1) if year == end.year else _days_in_year(year) - 1
+        chunk = (bitsets.get(year, 0) >> lo) & ((1 << (hi - lo + 1)) - 1)
+        out |= chunk << offset
+        offset += hi - lo + 1
+    return out
+
+
+def window_dates(bits: int, start: date) -> set[date]:
+    return {start + timedelta(days=k) for k in _iter_bits(bits)}
+
+
+def current_streak(bits: int, last_index: int) -> int:
+    """Consecutive set days ending at bit last_index, or at the day before if that one is unset."""
+    if last_index < 0:
+        return 0
+    if not (bits >> last_index) & 1:
+        last_index -= 1
+        if last_index < 0 or not (bits >> last_index) & 1:
+            return 0
+    zeros = ~bits & ((1 << (last_index + 1)) - 1)
+    return last_index + 1 - zeros.bit_length()
+
+
+def longest_streak(bits: int) -> int:
+    """Longest run of set bits (each step shortens every run by one)."""
+    n = 0
+    while bits:
+        bits &= bits >> 1
+        n += 1
+    return n
+
+
+def streak_summary(bitsets: Dict[int, int], today: date) -> Dict[str, Optional[int]]:
+    """current / longest streak across all stored years, runs crossing New Year included."""
+    if not bitsets:
+        return {"current": 0, "longest": 0}
+    start = date(min(bitsets), 1, 1)
+    end = max(today, date(max(bitsets), 12, 31))
+    bits = window_bits(bitsets, start, end)
+    return {
+        "current": current_streak(bits, (today - start).days),
+        "longest": longest_streak(bits),
+    }
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+# 한국 시간대 (KST, UTC+9)
+KST = timezone(timedelta(hours=9))
+
+
+# guild_id -> join date -> [(joined_at, user_id), ...] kept sorted.
+# Same-day grouping uses joined_at.date() exactly as the original member scan did,
+# so existing student numbers stay stable.
+_join_index: dict[int, dict[date, list[tuple[datetime, int]]]] = {}
+
+
+def has_join_index(guild_id: int) -> bool:
+    return guild_id in _join_index
+
+
+def build_join_index(guild_id: int, members: Iterable[tuple[int, datetime]]) -> int:
+    """(Re)build a guild's join-date index from (user_id, joined_at) pairs of non-bot members.
+
+    Returns the number of indexed members.
+    """
+    by_day: dict[date, list[tuple[datetime, int]]] = {}
+    count = 0
+    for user_id, joined_at in members:
+        if joined_at is None:
+            continue
+        by_day.setdefault(joined_at.date(), []).append((joined_at, user_id))
+        count += 1
+    for entries in by_day.values():
+        entries.sort()
+    _join_index[guild_id] = by_day
+    return count
+
+
+def add_member_to_index(guild_id: int, user_id: int, joined_at: Optional[datetime]) -> None:
+    """Insert a joining member; no-op if the guild is not indexed yet or already present."""
+    index = _join_index.get(guild_id)
+    if index is None or joined_at is None:
+        return
+    entries = index.setdefault(joined_at.date(), [])
+    key = (joined_at, user_id)
+    pos = bisect_left(entries, key)
+    if pos < len(entries) and entries[pos] == key:
+        return
+    insort(entries, key)
+
+
+def remove_member_from_index(guild_id: int, user_id: int, joined_at: Optional[datetime]) -> None:
+    index = _join_index.get(guild_id)
+    if index is None or joined_at is None:
+        return
+    entries = index.get(joined_at.date())
+    if not entries:
+        return
+    key = (joined_at, user_id)
+    pos = bisect_left(entries, key)
+    if pos < len(entries) and entries[pos] == key:
+        del entries[pos]
+    if not entries:
+        del index[joined_at.date()]
+
+
+def lookup_student_no(guild_id: int, user_id: int, joined_at: Optional[datetime]) -> Optional[str]:
+    """Return 학번: KST join date (YYMMDD) + 2-digit order among same-day joiners.
+
+    Falls back to order 01 when the member is not in the index, like the member scan did.
+    """
+    if joined_at is None:
+        return None
+    base = joined_at.astimezone(KST).strftime("%y%m%d")
+    entries = _join_index.get(guild_id, {}).get(joined_at.date(), [])
+    key = (joined_at, user_id)
+    pos = bisect_left(entries, key)
+    idx = pos if pos < len(entries) and entries[pos] == key else 0
+    return f"{base}{idx + 1:02d}"
@@ -0,0 +1,262 @@
+"""Append-only local journal of voice session events.
+
+Each voice join/leave/move is appended here before any database work and
+acknowledged once the database write succeeded. Unacknowledged entries are
+replayed idempotently on startup (and retried periodically after failures),
+so study time survives database outages and bot crashes. Events of one
+(user, guild) are applied in journal order: while an earlier one waits for a
+retry, later ones are held back with it (see held_back).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Optional
+
+
+_DEFAULT_PATH = Path(__file__).resolve().parents[1] / "data" / "voice_journal.jsonl"
+# Rewrite the file once everything is acknowledged and it grew beyond this size
+_COMPACT_BYTES = 1024 * 1024
+
+_file: Optional[IO[str]] = None
+_path: Optional[Path] = None
+_next_seq = 1
+_pending: Dict[int, dict] = {}  # seq -> event record, appended but not yet acknowledged
+_failed: set[int] = set()
+_dirty = False
+_stats: Dict[str, int] = {"appended": 0, "acked": 0, "replayed": 0, "replay_failed": 0, "held_back": 0}
+
+
+def get_journal_path() -> Optional[Path]:
+    """Return the journal path from VOICE_JOURNAL_PATH (default data/voice_journal.jsonl); None if 'off'."""
+    raw = os.getenv("VOICE_JOURNAL_PATH", "").strip()
+    if raw.lower() in ("off", "0", "false", "none"):
+        return None
+    return Path(raw) if raw else _DEFAULT_PATH
+
+
+def _read_pending(path: Path) -> tuple[Dict[int, dict], int]:
+    """Return (unacknowledged records by seq, highest seq seen)."""
+    records: Dict[int, dict] = {}
+    max_seq = 0
+    if not path.exists():
+        return records, max_seq
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # torn final line from a crash mid-write
+                continue
+            if "ack" in entry:
+                records.pop(int(entry["ack"]), None)
+                continue
+            seq = int(entry["seq"])
+            records[seq] = entry
+            max_seq = max(max_seq, seq)
+    return records, max_seq
+
+
+def _rewrite(records: Dict[int, dict]) -> None:
+    """Atomically replace the journal with only the given records and reopen it for append."""
+    global _file
+    assert _path is not None
+    if _file is not None:
+        _file.close()
+    tmp = _path.with_suffix(_path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for seq in sorted(records):
+            f.write(json.dumps(records[seq], ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _path)
+    _file = open(_path, "a", encoding="utf-8")
+
+
+def open_voice_journal(path: Optional[Path] = None) -> int:
+    """Open (or create) the journal and load unacknowledged events. Returns how many are pending."""
+    global _file, _path, _next_seq
+    if _file is not None:
+        return len(_pending)
+    _path = path or get_journal_path()
+    if _path is None:
+        return 0
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    records, max_seq = _read_pending(_path)
+    _pending.clear()
+    _pending.update(records)
+    _next_seq = max_seq + 1
+    _rewrite(_pending)
+    return len(_pending)
+
+
+def append_voice_event(
+    op: str,
+    guild_id: int,
+    user_id: int,
+    at: datetime,
+    started_at: Optional[datetime] = None,
+    record_previous: bool = False,
+    start_next: bool = False,
+    discard_previous: bool = False,
+) -> int:
+    """Append a voice event (buffered; fsync happens in batches). Returns its seq, 0 if disabled."""
+    global _next_seq, _dirty
+    if _file is None:
+        return 0
+    seq = _next_seq
+    _next_seq += 1
+    record = {
+        "seq": seq,
+        "op": op,
+        "guild_id": guild_id,
+        "user_id": user_id,
+        "at": at.isoformat(),
+        "started_at": started_at.isoformat() if started_at else None,
+        "record_previous": record_previous,
+        "start_next": start_next,
+        "discard_previous": discard_previous,
+    }
+    _file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _pending[seq] = record
+    _dirty = True
+    _stats["appended"] += 1
+    return seq
+
+
+def ack_voice_event(seq: int) -> None:
+    global _dirty
+    if _file is None or _pending.pop(seq, None) is None:
+        return
+    _failed.discard(seq)
+    _file.write(json.dumps({"ack": seq}) + "\n")
+    _dirty = True
+    _stats["acked"] += 1
+
+
+def mark_voice_event_failed(seq: int) -> None:
+    """Remember an event whose database write failed so the retry loop replays it."""
+    if seq in _pending:
+        _failed.add(seq)
+
+
+def _user_key(record: dict) -> tuple[int, int]:
+    return int(record["user_id"]), int(record["guild_id"])
+
+
+def held_back(seq: int) -> bool:
+    """Hold back an event while an earlier event of the same (user, guild) waits for a retry.
+
+    Applying it first would reorder the user's events: a leave recorded before
+    its failed join is retried lets the join open a fresh session that a later
+    close credits from the wrong start. A held event is marked failed, so the
+    retry loop applies it right after the earlier one.
+    """
+    record = _pending.get(seq)
+    if record is None:
+        return False
+    key = _user_key(record)
+    if not any(s < seq and s in _pending and _user_key(_pending[s]) == key for s in _failed):
+        return False
+    _failed.add(seq)
+    _stats["held_back"] += 1
+    return True
+
+
+async def flush_voice_journal() -> None:
+    """Flush buffered entries and fsync them (off the event loop)."""
+    global _dirty
+    if _file is None or not _dirty:
+        return
+    _dirty = False
+    _file.flush()
+    await asyncio.to_thread(os.fsync, _file.fileno())
+
+
+async def apply_voice_event(record: dict) -> None:
+    """Apply a journaled event to the database idempotently."""
+    from core.database import discard_voice_session, record_voice_session, start_voice_session, voice_session_closed_at
+
+    user_id = int(record["user_id"])
+    guild_id = int(record["guild_id"])
+    at = datetime.fromisoformat(record["at"])
+    started_at = datetime.fromisoformat(record["started_at"]) if record.get("started_at") else None
+    if record.get("record_previous") and started_at:
+        if not await voice_session_closed_at(user_id, guild_id, at):
+            duration = int((at - started_at).total_seconds())
+            await record_voice_session(user_id, guild_id, started_at, at, duration, match_started_at=True)
+    if record.get("discard_previous") and started_at:
+        await discard_voice_session(user_id, guild_id, started_at)
+    if record.get("start_next"):
+        await start_voice_session(user_id, guild_id, at, if_absent=True)
+
+
+async def replay_voice_journal(only_failed: bool = False) -> tuple[int, int]:
+    """Replay unacknowledged (or only previously failed) events in order. Returns (applied, failed).
+
+    After a failure the user's later events in this pass count as failed too and
+    stay queued behind it.
+    """
+    seqs = sorted(_failed if only_failed else _pending)
+    applied = failed = 0
+    blocked: set[tuple[int, int]] = set()
+    for seq in seqs:
+        record = _pending.get(seq)
+        if record is None:
+            continue
+        key = _user_key(record)
+        if key in blocked:
+            failed += 1
+            _failed.add(seq)
+            continue
+        try:
+            await apply_voice_event(record)
+        except Exception as exc:
+            failed += 1
+            _failed.add(seq)
+            blocked.add(key)
+            logging.warning("Voice journal replay failed for seq %s: %s", seq, exc)
+            continue
+        ack_voice_event(seq)
+        applied += 1
+    _stats["replayed"] += applied
+    _stats["replay_failed"] += failed
+    await flush_voice_journal()
+    return applied, failed
+
+
+async def run_voice_journal_maintenance(fsync_interval_ms: int = 200, retry_interval_sec: int = 60) -> None:
+    """Background loop: batched fsync, periodic retry of failed events, compaction when idle."""
+    loop = asyncio.get_running_loop()
+    next_retry = loop.time() + retry_interval_sec
+    while True:
+        await asyncio.sleep(max(0.01, fsync_interval_ms / 1000.0))
+        try:
+            await flush_voice_journal()
+            if _failed and loop.time() >= next_retry:
+                next_retry = loop.time() + retry_interval_sec
+                await replay_voice_journal(only_failed=True)
+            if _file is not None and not _pending and _file.tell() > _COMPACT_BYTES:
+                _rewrite({})
+        except Exception as exc:
+            logging.warning("Voice journal maintenance failed: %s", exc)
+
+
+async def close_voice_journal() -> None:
+    global _file
+    if _file is None:
+        return
+    await flush_voice_journal()
+    _file.close()
+    _file = None
+
+
+def get_voice_journal_stats() -> Dict[str, int]:
+    return {**_stats, "pending": len(_pending), "failed": len(_failed)}
@@ -115,7 +115,7 @@ export default async function UserPage({ params, searchParams }: { params: Param
 
       <div className="panel" style={{ marginBottom: 16 }}>
         <div className="title" style={{ marginBottom: 8 }}>{detail?.nickname ?? "(닉네임 없음)"}</div>
-        <div className="subtle">UserID: {detail?.user_id} · 학번: {detail?.student_no ?? "-"} · 레벨: {detail?.level_name ?? "-"} · 총시간: {secondsToHours(detail?.total_seconds || 0)} · 최근접속: {detail?.last_seen_at ?? "-"}</div>
+        <div className="subtle">UserID: {detail?.user_id} · 학번: {detail?.student_no ?? "-"} · 레벨: {detail?.level_name ?? "-"} · 총시간: {secondsToHours(detail?.total_seconds || 0)} · 최근접속: {detail?.last_seen_at ?? "-"} · 연속: {detail?.current_streak ?? 0}일 (최장 {detail?.longest_streak ?? 0}일)</div>
       </div>
 
       <div className="panel" style={{ marginBottom: 16 }}>
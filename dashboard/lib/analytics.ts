@@ -60,12 +60,20 @@ export async function fetchDailyTrend(guildId: bigint, days = 30): Promise<Daily
     // 음성 DAU 조회
     const { rows: voiceRows } = await client.query(
       `
-      SELECT to_char(date_trunc('day', ended_at), 'YYYY-MM-DD') AS day_label,
-             SUM(duration_seconds) AS seconds,
+      SELECT to_char(d, 'YYYY-MM-DD') AS day_label,
+             SUM(seconds) AS seconds,
              COUNT(DISTINCT user_id) AS dau
-      FROM voice_sessions
-      WHERE guild_id=$1 AND ended_at IS NOT NULL
-        AND ended_at >= $2::timestamp
+      FROM (
+        SELECT date_trunc('day', ended_at) AS d, user_id, duration_seconds AS seconds
+        FROM voice_sessions
+        WHERE guild_id=$1 AND ended_at IS NOT NULL
+          AND ended_at >= $2::timestamp
+        UNION ALL
+        -- 압축된 세션 (voice_session_rollups, 종료일 기준 합계)
+        SELECT day::timestamp, user_id, ended_seconds
+        FROM voice_session_rollups
+        WHERE guild_id=$1 AND ended_sessions > 0 AND day >= date_trunc('day', $2::timestamp)
+      ) t
       GROUP BY day_label
       ORDER BY day_label
       `,
@@ -124,27 +132,18 @@ export async function fetchLeaderboard(
     // KST 기준 현재 시간
     const nowParam = nowKST().toISOString().slice(0, 19).replace('T', ' ');
 
-    const boundColumn = period === "week" ? "week_start" : "month_start";
-    const fieldExpr = `CASE WHEN vs.ended_at >= (SELECT ${boundColumn} FROM bounds) THEN vs.duration_seconds END`;
-
-    // DB가 이미 KST naive datetime으로 저장되어 있으므로 timezone 변환 불필요
+    // 봇이 유지하는 guild_leaderboards 스냅샷 (상위 SNAPSHOT_TOP_N명, 수십 초 지연 가능).
+    // 지난 기간 행이 아직 정리되지 않았을 수 있으므로 period_start 로 현재 기간만 고른다.
+    const startExpr = period === "week" ? "date_trunc('week', $3::timestamp)" : "date_trunc('month', $3::timestamp)";
     const sql = `
-      WITH bounds AS (
-        SELECT
-          date_trunc('week', $2::timestamp) AS week_start,
-          date_trunc('month', $2::timestamp) AS month_start
-      )
-      SELECT u.user_id::text AS user_id, u.nickname,
-             COALESCE(SUM(${fieldExpr}), 0) AS value_seconds
-      FROM users u
-      LEFT JOIN voice_sessions vs
-        ON vs.user_id=u.user_id AND vs.guild_id=u.guild_id AND vs.ended_at IS NOT NULL
-      WHERE u.guild_id=$1
-      GROUP BY u.user_id, u.nickname
-      ORDER BY value_seconds DESC
+      SELECT l.user_id::text AS user_id, u.nickname, l.seconds AS value_seconds
+      FROM guild_leaderboards l
+      JOIN users u ON u.user_id=l.user_id AND u.guild_id=l.guild_id
+      WHERE l.guild_id=$1 AND l.period=$2 AND l.period_start=${startExpr}::date
+      ORDER BY l.seconds DESC, l.user_id
       LIMIT 20
     `;
-    const { rows } = await client.query(sql, [guildId.toString(), nowParam]);
+    const { rows } = await client.query(sql, [guildId.toString(), period, nowParam]);
     return rows.map((r) => ({
       user_id: String(r.user_id),
       nickname: r.nickname ?? null,
@@ -163,23 +162,10 @@ export async function fetchLevelDistribution(guildId: bigint): Promise<LevelBuck
   try {
     const { rows } = await client.query(
       `
-      SELECT level, COUNT(*)::int AS users
-      FROM (
-        SELECT CASE
-          WHEN COALESCE(xp,0) < 100 THEN 0
-          WHEN xp < 150 THEN 1
-          WHEN xp < 250 THEN 2
-          WHEN xp < 400 THEN 3
-          WHEN xp < 600 THEN 4
-          WHEN xp < 850 THEN 5
-          WHEN xp < 1150 THEN 6
-          WHEN xp < 1550 THEN 7
-          WHEN xp < 2000 THEN 8
-          ELSE 9
-        END AS level
-        FROM users WHERE guild_id=$1
-      ) t
-      GROUP BY level
+      -- users.level 기준 집계 스냅샷 (core.snapshots 가 레벨 변경 시 갱신)
+      SELECT level, users
+      FROM guild_level_counts
+      WHERE guild_id=$1
       ORDER BY level
       `,
       [guildId.toString()]
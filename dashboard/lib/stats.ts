@@ -64,6 +64,8 @@ export type UserDetail = {
   xp: number;
   total_seconds: number;
   last_seen_at: string | null;
+  current_streak: number;
+  longest_streak: number;
 };
 
 export type UserEntryLog = {
@@ -128,17 +130,17 @@ export async function fetchGuildUserStats(
         u.level_name,
         COALESCE(u.xp, 0) AS xp,
         COALESCE(u.total_seconds, 0) AS total_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT today_start FROM bounds) THEN vs.duration_seconds END), 0) AS today_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT week_start FROM bounds) THEN vs.duration_seconds END), 0) AS week_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT month_start FROM bounds) THEN vs.duration_seconds END), 0) AS month_seconds,
+        -- 봇이 세션 종료 시 갱신하는 기간별 누적; 기간 키가 지났으면 0
+        CASE WHEN pt.day_start = (SELECT today_start FROM bounds)::date THEN pt.day_seconds ELSE 0 END AS today_seconds,
+        CASE WHEN pt.week_start = (SELECT week_start FROM bounds)::date THEN pt.week_seconds ELSE 0 END AS week_seconds,
+        CASE WHEN pt.month_start = (SELECT month_start FROM bounds)::date THEN pt.month_seconds ELSE 0 END AS month_seconds,
         COALESCE(tr.total_reaction_count, 0) AS total_reaction_count,
         COALESCE(mr.month_reaction_count, 0) AS month_reaction_count,
         to_char(u.last_seen_at, 'YYYY-MM-DD HH24:MI') AS last_seen_at
       FROM users u
-      LEFT JOIN voice_sessions vs
-        ON vs.user_id = u.user_id
-       AND vs.guild_id = u.guild_id
-       AND vs.ended_at IS NOT NULL
+      LEFT JOIN user_period_totals pt
+        ON pt.user_id = u.user_id
+       AND pt.guild_id = u.guild_id
       LEFT JOIN total_reactions tr
         ON tr.user_id = u.user_id
        AND tr.guild_id = u.guild_id
@@ -147,7 +149,6 @@ export async function fetchGuildUserStats(
        AND mr.guild_id = u.guild_id
       WHERE u.guild_id = $1
       ${filterSql}
-      GROUP BY u.user_id, u.nickname, u.student_no, u.status, u.level_name, u.xp, u.total_seconds, u.last_seen_at, tr.total_reaction_count, mr.month_reaction_count
       ORDER BY xp DESC, total_seconds DESC
       LIMIT $2
     `;
@@ -265,17 +266,17 @@ export async function fetchGuildUserStatsPaged(
         u.level_name,
         COALESCE(u.xp, 0) AS xp,
         COALESCE(u.total_seconds, 0) AS total_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT today_start FROM bounds) THEN vs.duration_seconds END), 0) AS today_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT week_start FROM bounds) THEN vs.duration_seconds END), 0) AS week_seconds,
-        COALESCE(SUM(CASE WHEN vs.ended_at >= (SELECT month_start FROM bounds) THEN vs.duration_seconds END), 0) AS month_seconds,
+        -- 봇이 세션 종료 시 갱신하는 기간별 누적; 기간 키가 지났으면 0
+        CASE WHEN pt.day_start = (SELECT today_start FROM bounds)::date THEN pt.day_seconds ELSE 0 END AS today_seconds,
+        CASE WHEN pt.week_start = (SELECT week_start FROM bounds)::date THEN pt.week_seconds ELSE 0 END AS week_seconds,
+        CASE WHEN pt.month_start = (SELECT month_start FROM bounds)::date THEN pt.month_seconds ELSE 0 END AS month_seconds,
         COALESCE(tr.total_reaction_count, 0) AS total_reaction_count,
         COALESCE(mr.month_reaction_count, 0) AS month_reaction_count,
         to_char(u.last_seen_at, 'YYYY-MM-DD HH24:MI') AS last_seen_at
       FROM users u
-      LEFT JOIN voice_sessions vs
-        ON vs.user_id = u.user_id
-       AND vs.guild_id = u.guild_id
-       AND vs.ended_at IS NOT NULL
+      LEFT JOIN user_period_totals pt
+        ON pt.user_id = u.user_id
+       AND pt.guild_id = u.guild_id
       LEFT JOIN total_reactions tr
         ON tr.user_id = u.user_id
        AND tr.guild_id = u.guild_id
@@ -284,7 +285,6 @@ export async function fetchGuildUserStatsPaged(
        AND mr.guild_id = u.guild_id
       WHERE u.guild_id = $1
       ${query.length > 0 ? " AND (u.nickname ILIKE $2 OR u.student_no ILIKE $2 OR CAST(u.user_id AS TEXT) ILIKE $2) " : ""}
-      GROUP BY u.user_id, u.nickname, u.student_no, u.status, u.level_name, u.xp, u.total_seconds, u.last_seen_at, tr.total_reaction_count, mr.month_reaction_count
       ORDER BY ${sortKey} ${sortOrder} NULLS LAST
       LIMIT $${limitIdx}
       OFFSET $${offsetIdx}
@@ -324,7 +324,10 @@ export async function fetchUserDetail(guildId: bigint, userId: bigint): Promise<
       `
       SELECT u.user_id, u.nickname, u.student_no, u.status, u.level_name, COALESCE(u.xp,0) AS xp,
              COALESCE(u.total_seconds,0) AS total_seconds,
-             to_char(u.last_seen_at, 'YYYY-MM-DD HH24:MI') AS last_seen_at
+             to_char(u.last_seen_at, 'YYYY-MM-DD HH24:MI') AS last_seen_at,
+             -- 마지막 스트릭 일자가 오늘/어제(KST)일 때만 진행 중인 연속 기록
+             CASE WHEN u.last_streak_date >= (now() AT TIME ZONE 'Asia/Seoul')::date - 1 THEN u.current_streak ELSE 0 END AS current_streak,
+             u.longest_streak
       FROM users u
       WHERE u.guild_id=$1 AND u.user_id=$2
       `,
@@ -341,6 +344,8 @@ export async function fetchUserDetail(guildId: bigint, userId: bigint): Promise<
       xp: Number(r.xp ?? 0),
       total_seconds: Number(r.total_seconds ?? 0),
       last_seen_at: (r.last_seen_at as string | null) ?? null,
+      current_streak: Number(r.current_streak ?? 0),
+      longest_streak: Number(r.longest_streak ?? 0),
     };
   } finally {
     client.release();
@@ -396,10 +401,17 @@ export async function fetchUserDailyTrend(
     // DB가 이미 KST naive datetime으로 저장되어 있으므로 timezone 변환 불필요
     const { rows } = await client.query(
       `
-      SELECT date_trunc('day', ended_at) AS d,
-             SUM(duration_seconds) AS seconds
-      FROM voice_sessions
-      WHERE guild_id=$1 AND user_id=$2 AND ended_at IS NOT NULL AND ended_at >= $3::timestamp
+      SELECT d, SUM(seconds) AS seconds
+      FROM (
+        SELECT date_trunc('day', ended_at) AS d, duration_seconds AS seconds
+        FROM voice_sessions
+        WHERE guild_id=$1 AND user_id=$2 AND ended_at IS NOT NULL AND ended_at >= $3::timestamp
+        UNION ALL
+        -- 압축된 세션 (voice_session_rollups, 종료일 기준 합계)
+        SELECT day::timestamp, ended_seconds
+        FROM voice_session_rollups
+        WHERE guild_id=$1 AND user_id=$2 AND ended_sessions > 0 AND day >= date_trunc('day', $3::timestamp)
+      ) t
       GROUP BY d
       ORDER BY d
       `,
@@ -489,12 +501,20 @@ export async function fetchUserMonthlyTrend(
           interval '1 month'
         ) AS m
       ), agg AS (
-        SELECT date_trunc('month', ended_at) AS m,
-               SUM(duration_seconds) AS seconds
-        FROM voice_sessions
-        WHERE guild_id=$1 AND user_id=$2 AND ended_at IS NOT NULL
-          AND ended_at >= (SELECT start_month FROM month_bounds)
-          AND ended_at <  ((SELECT end_month FROM month_bounds) + interval '1 month')
+        SELECT m, SUM(seconds) AS seconds
+        FROM (
+          SELECT date_trunc('month', ended_at) AS m, duration_seconds AS seconds
+          FROM voice_sessions
+          WHERE guild_id=$1 AND user_id=$2 AND ended_at IS NOT NULL
+            AND ended_at >= (SELECT start_month FROM month_bounds)
+            AND ended_at <  ((SELECT end_month FROM month_bounds) + interval '1 month')
+          UNION ALL
+          SELECT date_trunc('month', day::timestamp), ended_seconds
+          FROM voice_session_rollups
+          WHERE guild_id=$1 AND user_id=$2 AND ended_sessions > 0
+            AND day >= (SELECT start_month FROM month_bounds)
+            AND day <  ((SELECT end_month FROM month_bounds) + interval '1 month')
+        ) t
         GROUP BY m
       )
       SELECT to_char(months.m, 'YYYY-MM') AS month,
@@ -561,7 +581,7 @@ export async function fetchUserCalendarYear(
           ))::bigint AS seconds
         FROM split_by_date
         WHERE ended_at > date_boundary AND started_at < date_boundary + interval '1 day'
-      ), daily_agg AS (
+      ), session_agg AS (
         SELECT
           d,
           SUM(seconds)::bigint AS seconds,
@@ -569,6 +589,18 @@ export async function fetchUserCalendarYear(
         FROM daily_split
         WHERE seconds > 0
         GROUP BY d
+      ), daily_agg AS (
+        -- 압축된 세션은 voice_session_rollups 의 일별 합계로 더함
+        SELECT d, SUM(seconds)::bigint AS seconds, SUM(sessions)::bigint AS sessions
+        FROM (
+          SELECT d, seconds, sessions FROM session_agg
+          UNION ALL
+          SELECT day::timestamp, seconds, sessions
+          FROM voice_session_rollups
+          WHERE guild_id=$1 AND user_id=$2 AND sessions > 0
+            AND day >= (SELECT s FROM bounds) AND day < (SELECT e FROM bounds)
+        ) parts
+        GROUP BY d
       ), days AS (
         SELECT generate_series((SELECT s FROM bounds), (SELECT e FROM bounds) - interval '1 day', interval '1 day') AS d
       )
@@ -616,12 +648,20 @@ export async function fetchGuildCalendarYear(
           interval '1 day'
         ) AS d
       ), daily AS (
-        SELECT date_trunc('day', ended_at) AS d,
-               SUM(duration_seconds) AS seconds
-        FROM voice_sessions
-        WHERE guild_id=$1 AND ended_at IS NOT NULL
-          AND ended_at >= (SELECT start_day FROM day_bounds)
-          AND ended_at <  ((SELECT end_day FROM day_bounds) + interval '1 day')
+        SELECT d, SUM(seconds) AS seconds
+        FROM (
+          SELECT date_trunc('day', ended_at) AS d, duration_seconds AS seconds
+          FROM voice_sessions
+          WHERE guild_id=$1 AND ended_at IS NOT NULL
+            AND ended_at >= (SELECT start_day FROM day_bounds)
+            AND ended_at <  ((SELECT end_day FROM day_bounds) + interval '1 day')
+          UNION ALL
+          SELECT day::timestamp, ended_seconds
+          FROM voice_session_rollups
+          WHERE guild_id=$1 AND ended_sessions > 0
+            AND day >= (SELECT start_day FROM day_bounds)
+            AND day <  ((SELECT end_day FROM day_bounds) + interval '1 day')
+        ) t
         GROUP BY d
       )
       SELECT to_char(days.d, 'YYYY-MM-DD') AS date,
@@ -647,62 +687,10 @@ export async function fetchGuildPerUserDailyMaxHours(
   const pool = getPool();
   const client = await pool.connect();
   try {
-    // KST 기준 연도의 시작/끝 (00:00 자정 경계)
-    const startStr = `${year}-01-01 00:00:00`;
-    const endStr = `${year + 1}-01-01 00:00:00`;
-
-    // DB가 이미 KST naive datetime으로 저장되어 있으므로 timezone 변환 불필요
+    // KST 연도별 "한 유저의 하루 최대 공부 시간" 스냅샷 (core.snapshots 가 세션 종료 시 갱신)
     const { rows } = await client.query(
-      `
-      WITH bounds AS (
-        SELECT
-          $2::timestamp AS s,
-          $3::timestamp AS e
-      ), sessions_in_range AS (
-        SELECT
-          user_id,
-          started_at,
-          ended_at,
-          session_id
-        FROM voice_sessions
-        WHERE guild_id=$1
-          AND ended_at IS NOT NULL
-          AND ended_at >= (SELECT s FROM bounds)
-          AND started_at < (SELECT e FROM bounds)
-      ), split_by_date AS (
-        SELECT
-          user_id,
-          session_id,
-          started_at,
-          ended_at,
-          generate_series(
-            date_trunc('day', started_at),
-            date_trunc('day', ended_at),
-            interval '1 day'
-          ) AS date_boundary
-        FROM sessions_in_range
-      ), daily_split AS (
-        SELECT
-          user_id,
-          date_boundary AS d,
-          EXTRACT(EPOCH FROM (
-            LEAST(ended_at, date_boundary + interval '1 day') -
-            GREATEST(started_at, date_boundary)
-          ))::bigint AS seconds
-        FROM split_by_date
-        WHERE ended_at > date_boundary AND started_at < date_boundary + interval '1 day'
-      ), daily AS (
-        SELECT user_id,
-               d,
-               SUM(seconds)::bigint AS seconds
-        FROM daily_split
-        WHERE seconds > 0
-        GROUP BY user_id, d
-      )
-      SELECT COALESCE(MAX(seconds), 0) AS max_seconds
-      FROM daily
-      `,
-      [guildId.toString(), startStr, endStr]
+      `SELECT max_seconds FROM guild_daily_max WHERE guild_id=$1 AND year=$2`,
+      [guildId.toString(), year]
     );
     const maxSeconds = Number(rows?.[0]?.max_seconds ?? 0);
     const hours = Math.round(((maxSeconds / 3600)) * 100) / 100;
@@ -772,9 +760,13 @@ export async function fetchUserAvailableYears(
     // DB가 이미 KST naive datetime으로 저장되어 있으므로 timezone 변환 불필요
     const { rows } = await client.query(
       `
-      SELECT DISTINCT EXTRACT(YEAR FROM ended_at)::int AS year
+      SELECT EXTRACT(YEAR FROM ended_at)::int AS year
       FROM voice_sessions
       WHERE guild_id=$1 AND user_id=$2 AND ended_at IS NOT NULL
+      UNION
+      SELECT EXTRACT(YEAR FROM day)::int
+      FROM voice_session_rollups
+      WHERE guild_id=$1 AND user_id=$2 AND ended_sessions > 0
       ORDER BY year
       `,
       [guildId.toString(), userId.toString()]
@@ -861,12 +853,22 @@ export async function fetchMonthlyRankingPaged(
 
     const sql = `
       WITH month_sessions AS (
-        SELECT user_id, guild_id, SUM(duration_seconds) AS month_seconds
-        FROM voice_sessions
-        WHERE guild_id = $1
-          AND ended_at IS NOT NULL
-          AND ended_at >= $2::timestamp
-          AND ended_at < $3::timestamp
+        SELECT user_id, guild_id, SUM(seconds) AS month_seconds
+        FROM (
+          SELECT user_id, guild_id, duration_seconds AS seconds
+          FROM voice_sessions
+          WHERE guild_id = $1
+            AND ended_at IS NOT NULL
+            AND ended_at >= $2::timestamp
+            AND ended_at < $3::timestamp
+          UNION ALL
+          SELECT user_id, guild_id, ended_seconds
+          FROM voice_session_rollups
+          WHERE guild_id = $1
+            AND ended_sessions > 0
+            AND day >= $2::date
+            AND day < $3::date
+        ) t
         GROUP BY user_id, guild_id
       ),
       month_reactions AS (
@@ -925,9 +927,13 @@ export async function fetchAvailableMonths(guildId: bigint): Promise<string[]> {
   try {
     const { rows } = await client.query(
       `
-      SELECT DISTINCT to_char(ended_at, 'YYYY-MM') AS month
+      SELECT to_char(ended_at, 'YYYY-MM') AS month
       FROM voice_sessions
       WHERE guild_id = $1 AND ended_at IS NOT NULL
+      UNION
+      SELECT to_char(day, 'YYYY-MM')
+      FROM voice_session_rollups
+      WHERE guild_id = $1 AND ended_sessions > 0
       ORDER BY month DESC
       `,
       [guildId.toString()]
@@ -10,6 +10,7 @@ import random
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from dotenv import load_dotenv
+from core import change_feed, grass_cache, statements
 from core.database import create_pool, close_pool, get_pool
 
 # Load environment variables
@@ -94,19 +95,20 @@ async def add_test_sessions(user_id: int, guild_id: int) -> None:
                         
                         # Add daily streak
                         await conn.execute(
-                            """
-                            INSERT INTO daily_streaks (user_id, guild_id, streak_date)
-                            VALUES ($1, $2, $3)
-                            ON CONFLICT (user_id, guild_id, streak_date) DO NOTHING
-                            """,
+                            statements.get_statement_sql("streak_insert"),
                             user_id,
                             guild_id,
                             current_date.date(),
                         )
                 
                 current_date += timedelta(days=1)
+
+            # 커밋 시점에 실행 중인 봇의 조회 캐시 무효화
+            await change_feed.notify(conn, guild_id, [user_id], "session")
     
     print(f"✅ Successfully added {sessions_added} test sessions")
+    # 지난 연도 잔디 캐시가 새 세션을 가리지 않도록
+    grass_cache.invalidate(guild_id, user_id, 2025)
     
     # Show summary
     async with pool.acquire() as conn:
@@ -13,6 +13,7 @@ async def main() -> None:
 
 	from core.database import get_pool, close_pool
 	from core.leveling import calculate_level, get_level_title
+	from core.change_feed import notify
 
 	pool = await get_pool()
 	updated = 0
@@ -32,6 +33,7 @@ async def main() -> None:
 				gid,
 			)
 			updated += 1
+		await notify(conn, None, None, "levels")
 	print(f"Backfilled level fields for {updated} users")
 	await close_pool()
 
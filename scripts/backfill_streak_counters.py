@@ -0,0 +1,21 @@
+import asyncio
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+async def main() -> None:
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	from core.database import backfill_streak_counters, close_pool
+
+	updated = await backfill_streak_counters()
+	print(f"streak counters recomputed for {updated} users")
+	await close_pool()
+
+
+if __name__ == "__main__":
+	asyncio.run(main())
@@ -0,0 +1,108 @@
+import asyncio
+import argparse
+import json
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+def sample_args(user_id: int, guild_id: int, now, seconds_per_xp: int) -> dict[str, tuple]:
+	# Arguments that exercise each registered statement without lasting effect (run inside a rolled-back transaction)
+	return {
+		"voice_session_start": (user_id, guild_id, now, True),
+		"voice_session_close": (user_id, guild_id, now, 0, now, True),
+		"streak_insert": (user_id, guild_id, now.date()),
+		"voice_session_transition": (user_id, guild_id, now - timedelta(hours=1), now, 3600, False, False, seconds_per_xp, None),
+		"xp_add": (user_id, guild_id, 0, None),
+		"user_stats": (user_id, guild_id, now),
+		"period_totals_add": (user_id, guild_id, now, 0),
+	}
+
+
+async def planning_ms(conn, sql: str, args: tuple) -> float:
+	plan = await conn.fetchval("EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) " + sql, *args)
+	return float(json.loads(plan)[0]["Planning Time"])
+
+
+async def timed_calls(conn, name: str, args: tuple, user_id: int, guild_id: int, iterations: int) -> tuple[float, float]:
+	"""(first call ms, average ms over the following iterations) of statements.fetch, rolled back afterwards."""
+	from core import statements
+
+	tr = conn.transaction()
+	await tr.start()
+	try:
+		await conn.execute(
+			"INSERT INTO users (user_id, guild_id) VALUES ($1, $2) ON CONFLICT (user_id, guild_id) DO NOTHING",
+			user_id,
+			guild_id,
+		)
+		t0 = time.perf_counter()
+		await statements.fetch(conn, name, *args)
+		first_ms = (time.perf_counter() - t0) * 1000.0
+		t0 = time.perf_counter()
+		for _ in range(iterations):
+			await statements.fetch(conn, name, *args)
+		return first_ms, (time.perf_counter() - t0) * 1000.0 / iterations
+	finally:
+		await tr.rollback()
+
+
+async def main(user_id: int, guild_id: int, iterations: int) -> None:
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	import asyncpg
+	import core.database  # registers the hot statements
+	from core import statements
+	from core.database import get_database_url, now_kst_naive
+	from core.leveling import _get_seconds_per_xp
+
+	now = now_kst_naive()
+	dsn = get_database_url()
+	# baseline: statement_cache_size=0 is the pooler path, every call is parsed and planned again
+	text_conn = await asyncpg.connect(dsn=dsn, statement_cache_size=0)
+	# shipped path: a connection set up like the pools in prepared mode (cache size + init warm-up)
+	options = statements.pool_options("write")
+	registry_conn = await asyncpg.connect(dsn=dsn, statement_cache_size=options.get("statement_cache_size", 100))
+	try:
+		warmed = await statements.warm_statements(registry_conn)
+		print(f"warmed {warmed}/{len(statements.registered_statements())} statements on the registry connection")
+		print(f"{'statement':<26} {'text ms':>9} {'registry ms':>12} {'first ms':>9} {'saved ms':>9} {'plan ms':>8}")
+		known_args = sample_args(user_id, guild_id, now, _get_seconds_per_xp())
+		for name, sql in statements.registered_statements().items():
+			if name not in known_args:
+				print(f"{name:<26} skipped (no sample arguments)")
+				continue
+			args = known_args[name]
+			tr = text_conn.transaction()
+			await tr.start()
+			try:
+				await text_conn.execute(
+					"INSERT INTO users (user_id, guild_id) VALUES ($1, $2) ON CONFLICT (user_id, guild_id) DO NOTHING",
+					user_id,
+					guild_id,
+				)
+				plan = await planning_ms(text_conn, sql, args)
+			finally:
+				await tr.rollback()
+			_, text_ms = await timed_calls(text_conn, name, args, user_id, guild_id, iterations)
+			first_ms, registry_ms = await timed_calls(registry_conn, name, args, user_id, guild_id, iterations)
+			print(
+				f"{name:<26} {text_ms:>9.3f} {registry_ms:>12.3f} {first_ms:>9.3f} {text_ms - registry_ms:>9.3f} {plan:>8.3f}"
+			)
+	finally:
+		await text_conn.close()
+		await registry_conn.close()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare the statement registry (statements.fetch on a warmed connection) with uncached ad-hoc SQL")
+	parser.add_argument("--user", type=int, default=1)
+	parser.add_argument("--guild", type=int, default=1)
+	parser.add_argument("--iterations", type=int, default=200)
+	args = parser.parse_args()
+	asyncio.run(main(args.user, args.guild, args.iterations))
@@ -0,0 +1,79 @@
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+async def main(
+	days: int | None,
+	guild_id: int | None,
+	batch: int | None,
+	max_batches: int | None,
+	pause: float,
+	export_dir: str | None,
+	drop_partitions: bool,
+	dry_run: bool,
+) -> int:
+	# Ensure repo root import path
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	from core import compaction
+	from core.database import close_pool
+
+	export = Path(export_dir) if export_dir else compaction.get_export_dir()
+	cutoff = compaction.cutoff_for(days)
+	print(f"Compacting sessions ended before {cutoff:%Y-%m-%d} (export: {export or 'off'})")
+	try:
+		if dry_run:
+			# 첫 배치만 검증까지 실행하고 되돌림
+			result = await compaction.compact_batch(cutoff, batch, guild_id, export, dry_run=True)
+			print(f"Dry run: {result['sessions']} sessions -> {result['days']} user-days would move; rolled back.")
+			return 0
+		total = await compaction.compact_sessions(days, batch, guild_id, export, max_batches, pause)
+		print(f"Moved {total['sessions']} sessions in {total['batches']} batches ({total['days']} user-day upserts).")
+		if drop_partitions:
+			dropped = await compaction.drop_empty_partitions(cutoff)
+			print(f"Dropped empty partitions: {', '.join(dropped) or 'none'}")
+	except compaction.CompactionCheckError as exc:
+		print(f"Consistency check failed, batch rolled back: {exc}")
+		return 1
+	finally:
+		await close_pool()
+	return 0
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Move finished voice_sessions older than N days into daily rollups (voice_session_rollups)",
+	)
+	parser.add_argument("--days", type=int, help="age in days (default COMPACT_SESSIONS_AFTER_DAYS or 365)")
+	parser.add_argument("--guild", type=int, help="only this guild")
+	parser.add_argument("--batch", type=int, help="sessions per transaction (default COMPACT_BATCH_SIZE or 5000)")
+	parser.add_argument("--max-batches", type=int, help="stop after this many batches; rerun to continue")
+	parser.add_argument("--pause", type=float, default=0.5, help="seconds to sleep between batches")
+	parser.add_argument("--export-dir", help="write raw rows to gzip CSV here first (default COMPACT_EXPORT_DIR)")
+	parser.add_argument(
+		"--drop-empty-partitions",
+		action="store_true",
+		help="afterwards drop monthly voice_sessions partitions before the cutoff that are now empty",
+	)
+	parser.add_argument("--dry-run", action="store_true", help="check the first batch and roll it back")
+	args = parser.parse_args()
+	sys.exit(
+		asyncio.run(
+			main(
+				args.days,
+				args.guild,
+				args.batch,
+				args.max_batches,
+				args.pause,
+				args.export_dir,
+				args.drop_empty_partitions,
+				args.dry_run,
+			)
+		)
+	)
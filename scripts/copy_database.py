@@ -0,0 +1,175 @@
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+# public 스키마의 일반/파티션 부모 테이블 (파티션 자식과 마이그레이션 원장은 제외)
+TABLES_SQL = """
+	SELECT c.relname
+	FROM pg_class c
+	WHERE c.relnamespace = 'public'::regnamespace
+	  AND c.relkind IN ('r', 'p')
+	  AND NOT c.relispartition
+	  AND c.relname <> 'schema_migrations'
+"""
+
+FOREIGN_KEYS_SQL = """
+	SELECT c.conrelid::regclass::text AS child, c.confrelid::regclass::text AS parent
+	FROM pg_constraint c
+	WHERE c.contype = 'f' AND c.connamespace = 'public'::regnamespace
+"""
+
+COLUMNS_SQL = """
+	SELECT a.attname
+	FROM pg_attribute a
+	WHERE a.attrelid = to_regclass('public.' || quote_ident($1))
+	  AND a.attnum > 0 AND NOT a.attisdropped AND a.attgenerated = ''
+	ORDER BY a.attnum
+"""
+
+SEQUENCES_SQL = """
+	SELECT sequencename, last_value FROM pg_sequences
+	WHERE schemaname = 'public' AND last_value IS NOT NULL
+"""
+
+
+def resolve_dsn(name: str) -> str:
+	"""'hosted' = DATABASE_URL, 'embedded' = local server (core.embedded_db), anything else = a DSN."""
+	import os
+	from core import embedded_db
+
+	if name == "embedded":
+		return embedded_db.get_dsn()
+	if name == "hosted":
+		dsn = os.getenv("DATABASE_URL", "").strip()
+		if not dsn:
+			raise RuntimeError("DATABASE_URL is not set")
+		return dsn
+	return name
+
+
+def copy_order(tables: list[str], foreign_keys: list[tuple[str, str]]) -> list[str]:
+	"""Referenced tables before the tables referencing them."""
+	parents = {t: {p.removeprefix("public.") for c, p in foreign_keys if c.removeprefix("public.") == t} for t in tables}
+	ordered: list[str] = []
+	while len(ordered) < len(tables):
+		ready = sorted(t for t in tables if t not in ordered and parents[t] <= set(ordered) | {t})
+		if not ready:
+			raise RuntimeError(f"Circular foreign keys between {sorted(set(tables) - set(ordered))}")
+		ordered.extend(ready)
+	return ordered
+
+
+async def schema_version(conn) -> str | None:
+	if not await conn.fetchval("SELECT to_regclass('public.schema_migrations') IS NOT NULL"):
+		return None
+	return await conn.fetchval("SELECT MAX(version) FROM public.schema_migrations")
+
+
+async def stream_table(src, dst, table: str, columns: list[str]) -> str:
+	"""COPY one table from src to dst without buffering it in memory."""
+	queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+	column_list = ", ".join(f'"{c}"' for c in columns)
+
+	async def produce() -> None:
+		try:
+			await src.copy_from_query(f'SELECT {column_list} FROM public."{table}"', output=queue.put, format="binary")
+		finally:
+			await queue.put(None)
+
+	async def chunks():
+		while (chunk := await queue.get()) is not None:
+			yield chunk
+
+	producer = asyncio.create_task(produce())
+	try:
+		status = await dst.copy_to_table(table, source=chunks(), columns=columns, schema_name="public", format="binary")
+	except BaseException:
+		producer.cancel()
+		raise
+	await producer
+	return status
+
+
+async def main(source: str, target: str, replace: bool, drop_extra_columns: bool, dry_run: bool) -> int:
+	# Ensure repo root import path
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	import asyncpg
+
+	src_dsn, dst_dsn = resolve_dsn(source), resolve_dsn(target)
+	if src_dsn == dst_dsn:
+		print("Source and target are the same database.")
+		return 1
+	src = await asyncpg.connect(src_dsn, statement_cache_size=0)
+	dst = await asyncpg.connect(dst_dsn, statement_cache_size=0)
+	try:
+		# 스키마가 다르면 열 구성이 어긋나므로 양쪽 모두 같은 마이그레이션까지 적용되어 있어야 함
+		src_version, dst_version = await schema_version(src), await schema_version(dst)
+		if src_version is None or src_version != dst_version:
+			print(f"Schema mismatch: source at {src_version}, target at {dst_version}. Run scripts/migrate.py on both first.")
+			return 1
+
+		tables = [r["relname"] for r in await src.fetch(TABLES_SQL)]
+		foreign_keys = [(r["child"], r["parent"]) for r in await src.fetch(FOREIGN_KEYS_SQL)]
+		target_tables = {r["relname"] for r in await dst.fetch(TABLES_SQL)}
+		for table in sorted(set(tables) - target_tables):
+			print(f"skip {table}: missing on target")
+		order = copy_order([t for t in tables if t in target_tables], foreign_keys)
+
+		# 원본은 하나의 스냅샷으로 읽고, 대상은 하나의 트랜잭션으로 써서 중간 실패 시 아무것도 남기지 않음
+		async with src.transaction(isolation="repeatable_read", readonly=True):
+			async with dst.transaction():
+				# 마이그레이션이 넣는 기준 데이터(level_thresholds 등)는 원본 것으로 교체, 사용자 데이터는 --replace 필요
+				if not replace and await dst.fetchval("SELECT EXISTS (SELECT 1 FROM public.users)"):
+					print("Target already has users; pass --replace to overwrite its data.")
+					return 1
+				await dst.execute("TRUNCATE " + ", ".join(f'public."{t}"' for t in order) + " CASCADE")
+				for table in order:
+					columns = [r["attname"] for r in await src.fetch(COLUMNS_SQL, table)]
+					target_columns = {r["attname"] for r in await dst.fetch(COLUMNS_SQL, table)}
+					missing = [c for c in columns if c not in target_columns]
+					if missing and not drop_extra_columns:
+						raise RuntimeError(f"{table}: target lacks columns {missing} (pass --drop-extra-columns to leave them behind)")
+					if missing:
+						print(f"{table}: not copying columns {missing}")
+						columns = [c for c in columns if c in target_columns]
+					status = await stream_table(src, dst, table, columns)
+					print(f"{table:<30} {status}")
+				for r in await src.fetch(SEQUENCES_SQL):
+					if await dst.fetchval("SELECT to_regclass('public.' || quote_ident($1)) IS NOT NULL", r["sequencename"]):
+						await dst.execute("SELECT setval(('public.' || quote_ident($1))::regclass, $2)", r["sequencename"], r["last_value"])
+				if dry_run:
+					raise _DryRun()
+	except _DryRun:
+		print("Dry run: target rolled back.")
+	finally:
+		await src.close()
+		await dst.close()
+	return 0
+
+
+class _DryRun(Exception):
+	pass
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Copy all data between the hosted database and the embedded one (STORAGE_BACKEND=embedded)",
+	)
+	parser.add_argument("--from", dest="source", required=True, metavar="SRC", help="'hosted', 'embedded' or a postgres DSN")
+	parser.add_argument("--to", dest="target", required=True, metavar="DST", help="'hosted', 'embedded' or a postgres DSN")
+	parser.add_argument("--replace", action="store_true", help="overwrite a target that already has users")
+	parser.add_argument(
+		"--drop-extra-columns",
+		action="store_true",
+		help="skip source columns the target schema does not have (e.g. added by hand) instead of aborting",
+	)
+	parser.add_argument("--dry-run", action="store_true", help="copy inside a transaction and roll it back")
+	args = parser.parse_args()
+	sys.exit(asyncio.run(main(args.source, args.target, args.replace, args.drop_extra_columns, args.dry_run)))
@@ -0,0 +1,70 @@
+import asyncio
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+async def main(user_id: int, guild_id: int, year: int) -> None:
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	from core.database import VOICE_SESSION_MAX_SPAN, acquire, close_pool, now_kst_naive
+
+	now = now_kst_naive()
+	day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+	window_start = min(day_start - timedelta(days=now.weekday()), day_start.replace(day=1))
+	year_start = datetime(year, 1, 1)
+	year_end = datetime(year + 1, 1, 1)
+
+	checks = [
+		(
+			"sessions ended this week/month",
+			"""
+			SELECT count(*), COALESCE(SUM(duration_seconds), 0)
+			FROM voice_sessions
+			WHERE user_id=$1 AND guild_id=$2 AND ended_at IS NOT NULL
+			  AND ended_at >= $3 AND started_at >= $4
+			""",
+			(user_id, guild_id, window_start, window_start - VOICE_SESSION_MAX_SPAN),
+		),
+		(
+			f"calendar year {year}",
+			"""
+			SELECT count(*), COALESCE(SUM(duration_seconds), 0)
+			FROM voice_sessions
+			WHERE guild_id=$2 AND user_id=$1 AND ended_at IS NOT NULL
+			  AND ended_at >= $3 AND started_at < $4 AND started_at >= $5
+			""",
+			(user_id, guild_id, year_start, year_end, year_start - VOICE_SESSION_MAX_SPAN),
+		),
+	]
+
+	async with acquire("read") as conn:
+		total = await conn.fetchval("SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass('public.voice_sessions')")
+		print(f"voice_sessions partitions: {total}")
+		for title, sql, args in checks:
+			# asyncpg prepares the statement, so pruning shows up as executor-time "Subplans Removed"
+			rows = await conn.fetch("EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF) " + sql, *args)
+			plan = [r[0] for r in rows]
+			scanned = sorted({line.split(" on ")[1].split()[0] for line in plan if " on voice_sessions_" in line})
+			removed = [line.strip() for line in plan if "Subplans Removed" in line]
+			print(f"\n== {title}")
+			print(f"partitions scanned: {len(scanned)} {scanned}")
+			for line in removed:
+				print(line)
+			print("\n".join(plan))
+
+	await close_pool()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Show voice_sessions partition pruning for the stats queries")
+	parser.add_argument("--user", type=int, required=True)
+	parser.add_argument("--guild", type=int, required=True)
+	parser.add_argument("--year", type=int, default=datetime.now().year)
+	args = parser.parse_args()
+	asyncio.run(main(args.user, args.guild, args.year))
@@ -0,0 +1,26 @@
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+def main(guild_id: int | None, user_id: int | None, year: int | None) -> None:
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	from core import grass_cache
+
+	# 지난 연도 voice_sessions 를 직접 고친 뒤(백필, 수동 수정) 실행
+	removed = grass_cache.invalidate(guild_id, user_id, year)
+	print(f"removed {removed} cached grass years from {grass_cache.get_cache_dir()}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Drop cached past-year grass data/images (all of them without filters)")
+	parser.add_argument("--guild", type=int, help="only this guild")
+	parser.add_argument("--user", type=int, help="only this user")
+	parser.add_argument("--year", type=int, help="only this year")
+	args = parser.parse_args()
+	main(args.guild, args.user, args.year)
@@ -1,37 +1,58 @@
 import asyncio
+import argparse
 import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
 
-async def main() -> None:
+async def main(baseline: str | None, dry_run: bool, status: bool) -> int:
 	# Ensure repo root import path
 	repo_root = Path(__file__).resolve().parents[1]
 	if str(repo_root) not in sys.path:
 		sys.path.insert(0, str(repo_root))
 
 	load_dotenv(encoding="utf-8-sig")
-	from core.database import execute_sql_file, close_pool
+	import asyncpg
+	from core.database import get_database_url
+	from core.migrations import discover_migrations, fetch_applied, run_migrations
 
-	migrations = [
-		repo_root / "assets" / "db" / "migrations" / "migration_001_init.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_002_drop_user_achievements.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_003_drop_users_language.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_004_add_users_nickname.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_005_add_users_student_no.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_006_enable_rls.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_007_enable_rls_read_policies.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_008_drop_channels.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_009_add_users_status.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_010_add_users_level.sql",
-		repo_root / "assets" / "db" / "migrations" / "migration_011_add_users_level_name.sql",
-	]
-	for m in migrations:
-		await execute_sql_file(str(m))
-		print(f"Migration applied: {m.name}")
-	await close_pool()
+	migrations = discover_migrations()
+	# 마이그레이션은 세션 단위 advisory lock / CONCURRENTLY 인덱스를 쓰므로 풀이 아닌 전용 연결 사용
+	conn = await asyncpg.connect(get_database_url(), statement_cache_size=0)
+	try:
+		if status:
+			applied = await fetch_applied(conn)
+			for m in migrations:
+				row = applied.get(m.version)
+				if row is None:
+					state = "pending"
+				elif row["checksum"] != m.checksum:
+					state = "CHANGED"
+				else:
+					state = f"{'baseline' if row['baseline'] else 'applied'} {row['applied_at']:%Y-%m-%d %H:%M} ({row['execution_ms']} ms)"
+				print(f"{m.name:<50} {state}")
+			return 0
+		try:
+			pending = await run_migrations(conn, migrations, baseline=baseline, dry_run=dry_run)
+		except RuntimeError as exc:
+			print(f"Migration aborted: {exc}")
+			return 1
+		if not pending:
+			print("Schema is up to date.")
+		return 0
+	finally:
+		await conn.close()
 
 
 if __name__ == "__main__":
-	asyncio.run(main())
+	parser = argparse.ArgumentParser(description="Apply pending schema migrations (assets/db/migrations)")
+	parser.add_argument(
+		"--baseline",
+		metavar="VERSION",
+		help="record migrations up to VERSION as already applied without running them (existing databases, once)",
+	)
+	parser.add_argument("--dry-run", action="store_true", help="show what would run without changing anything")
+	parser.add_argument("--status", action="store_true", help="list migrations with their ledger state")
+	args = parser.parse_args()
+	sys.exit(asyncio.run(main(args.baseline, args.dry_run, args.status)))
@@ -0,0 +1,23 @@
+import asyncio
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+
+async def main() -> None:
+	repo_root = Path(__file__).resolve().parents[1]
+	if str(repo_root) not in sys.path:
+		sys.path.insert(0, str(repo_root))
+
+	load_dotenv(encoding="utf-8-sig")
+	from core.database import close_pool
+	from core.snapshots import rebuild_snapshots
+
+	# 봇도 시작 시와 매일 밤 같은 재계산을 하므로, 봇을 멈춘 채 데이터를 고쳤을 때 사용
+	guilds = await rebuild_snapshots()
+	print(f"guild snapshots rebuilt for {guilds} guilds")
+	await close_pool()
+
+
+if __name__ == "__main__":
+	asyncio.run(main())
@@ -12,6 +12,7 @@ async def main(user_id: int, guild_id: int, xp_value: int) -> None:
 
 	load_dotenv(encoding="utf-8-sig")
 	from core.database import get_pool, close_pool, ensure_user_exists
+	from core.change_feed import notify
 
 	pool = await get_pool()
 	async with pool.acquire() as conn:
@@ -22,6 +23,8 @@ async def main(user_id: int, guild_id: int, xp_value: int) -> None:
 			user_id,
 			guild_id,
 		)
+		# 실행 중인 봇의 조회 캐시 무효화
+		await notify(conn, guild_id, [user_id], "xp")
 		row = await conn.fetchrow(
 			"SELECT xp, total_seconds FROM users WHERE user_id=$1 AND guild_id=$2",
 			user_id,
@@ -1,11 +1,187 @@
 import asyncio
+import json
 import os
+import re
 import sys
+from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 
 
-async def main() -> None:
+def _full_scans(plan: dict, indexes: dict[str, tuple[str, bool]]) -> list[str]:
+	"""Relations read in full anywhere in an EXPLAIN (FORMAT JSON) plan tree.
+
+	That is a Seq Scan, or an index scan whose Index Cond does not constrain the
+	leading index column (a whole-index walk). A partial index without a condition
+	is fine, its predicate already does the filtering.
+	indexes maps index name -> (leading column, is partial).
+	"""
+	found = []
+	node = plan.get("Node Type")
+	if node == "Seq Scan":
+		found.append(plan.get("Relation Name", "?"))
+	elif node in ("Index Scan", "Index Only Scan", "Bitmap Index Scan"):
+		leading, partial = indexes.get(plan.get("Index Name", ""), ("", False))
+		cond = plan.get("Index Cond", "")
+		if cond:
+			bounded = re.search(rf"\b{re.escape(leading)}\s*(=|<|>|IS\b)", cond) is not None
+		else:
+			bounded = partial
+		if not bounded:
+			found.append(plan.get("Relation Name") or plan.get("Index Name", "?"))
+	for child in plan.get("Plans", []):
+		found.extend(_full_scans(child, indexes))
+	return found
+
+
+def _hot_queries(user_id: int, guild_id: int, now) -> list[tuple[str, tuple, str, tuple]]:
+	"""(label, tables, sql, sample args) for every hot query the bot and dashboard run."""
+	from core import statements
+	from core.database import VOICE_SESSION_MAX_SPAN
+
+	started_at = now - timedelta(hours=1)
+	window_start = now - timedelta(days=31)
+	# registered statements (core.database): tables they touch, sample arguments in positional order
+	sample_args = {
+		"voice_session_start": (("voice_sessions",), (user_id, guild_id, started_at, True)),
+		"voice_session_close": (("voice_sessions",), (user_id, guild_id, now, 3600, started_at, True)),
+		"streak_insert": (("users", "user_streak_bitsets"), (user_id, guild_id, now.date())),
+		"voice_session_transition": (
+			("voice_sessions", "users", "level_thresholds", "user_period_totals", "user_streak_bitsets"),
+			(user_id, guild_id, started_at, now, 3600, True, True, 60, None),
+		),
+		"xp_add": (("users", "level_thresholds"), (user_id, guild_id, 1, None)),
+		"period_totals_add": (("user_period_totals",), (user_id, guild_id, now, 3600)),
+		"user_stats": (("users", "user_period_totals"), (user_id, guild_id, now)),
+	}
+	queries = []
+	for name, sql in statements.registered_statements().items():
+		if name not in sample_args:
+			print(f"explain:{name} skipped (no sample arguments)")
+			continue
+		tables, args = sample_args[name]
+		queries.append((name, tables, sql, args))
+	queries += [
+		(
+			"voice_session_closed_at",
+			("voice_sessions",),
+			"SELECT 1 FROM voice_sessions WHERE user_id=$1 AND guild_id=$2 AND ended_at=$3 AND started_at BETWEEN $4 AND $3",
+			(user_id, guild_id, now, now - VOICE_SESSION_MAX_SPAN),
+		),
+		(
+			"open_sessions",
+			("voice_sessions",),
+			"SELECT session_id, started_at FROM voice_sessions WHERE user_id=$1 AND guild_id=$2 AND ended_at IS NULL",
+			(user_id, guild_id),
+		),
+		(
+			"calendar_year",
+			("voice_sessions",),
+			"""
+			SELECT started_at, ended_at FROM voice_sessions
+			WHERE guild_id=$2 AND user_id=$1 AND ended_at IS NOT NULL
+			  AND ended_at >= $3 AND started_at < $4 AND started_at >= $5
+			""",
+			(user_id, guild_id, window_start, now, window_start - VOICE_SESSION_MAX_SPAN),
+		),
+		(
+			"guild_sessions_range",
+			("voice_sessions",),
+			"""
+			SELECT user_id, SUM(duration_seconds) FROM voice_sessions
+			WHERE guild_id=$1 AND ended_at IS NOT NULL AND ended_at >= $2 AND ended_at < $3
+			GROUP BY user_id
+			""",
+			(guild_id, window_start, now),
+		),
+		(
+			"streak_bitsets",
+			("user_streak_bitsets",),
+			"SELECT year, days FROM user_streak_bitsets WHERE user_id=$1 AND guild_id=$2 AND year BETWEEN $3 AND $4",
+			(user_id, guild_id, window_start.year, now.year),
+		),
+		(
+			"chat_activity_range",
+			("chat_activity",),
+			"SELECT activity_date, COUNT(DISTINCT user_id) FROM chat_activity WHERE guild_id=$1 AND activity_date >= $2 GROUP BY activity_date",
+			(guild_id, window_start.date()),
+		),
+		(
+			"reaction_usage_range",
+			("reaction_usage",),
+			"SELECT user_id, SUM(count) FROM reaction_usage WHERE guild_id=$1 AND usage_date >= $2 GROUP BY user_id",
+			(guild_id, window_start.date()),
+		),
+	]
+	return queries
+
+
+async def explain_hot_queries(conn) -> int:
+	"""EXPLAIN every hot query and return how many would fall back to a full scan.
+
+	Test and freshly migrated databases are tiny, and there the planner prefers a
+	Seq Scan no matter which indexes exist. enable_seqscan=off makes it behave as
+	it would on realistic table sizes: a full scan that still shows up means no
+	index can serve the query. Nothing is executed (plain EXPLAIN, rolled back).
+	Queries on tables that do not exist yet (chat_activity, reaction_usage before
+	migration 023) are skipped, and each EXPLAIN runs in its own savepoint
+	so one error does not abort the checks after it.
+	"""
+	from core.database import now_kst_naive
+
+	row = await conn.fetchrow("SELECT user_id, guild_id FROM users LIMIT 1")
+	user_id, guild_id = (int(row["user_id"]), int(row["guild_id"])) if row else (0, 0)
+	indexes = {
+		r["indexname"]: (r["leading"], r["partial"])
+		for r in await conn.fetch(
+			"""
+			SELECT c.relname AS indexname, a.attname AS leading, i.indpred IS NOT NULL AS partial
+			FROM pg_index i
+			JOIN pg_class c ON c.oid = i.indexrelid
+			JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = 'public'
+			JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+			"""
+		)
+	}
+	# empty relations (e.g. future partitions) tie on every plan; a full scan there costs nothing
+	empty = {
+		r["relname"]
+		for r in await conn.fetch(
+			"""
+			SELECT c.relname
+			FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = 'public'
+			WHERE c.relkind = 'r' AND pg_relation_size(c.oid) = 0
+			"""
+		)
+	}
+	failures = 0
+	tr = conn.transaction()
+	await tr.start()
+	try:
+		await conn.execute("SET LOCAL enable_seqscan = off")
+		for label, tables, sql, args in _hot_queries(user_id, guild_id, now_kst_naive()):
+			missing = [t for t in tables if not await conn.fetchval("SELECT to_regclass('public.' || quote_ident($1)) IS NOT NULL", t)]
+			if missing:
+				print(f"explain:{label} skipped (missing {','.join(missing)})")
+				continue
+			try:
+				async with conn.transaction():
+					raw = await conn.fetchval("EXPLAIN (FORMAT JSON) " + sql, *args)
+			except Exception as exc:
+				print(f"explain:{label} error={exc}")
+				failures += 1
+				continue
+			plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+			full = sorted(set(_full_scans(plan, indexes)) - empty)
+			if full:
+				failures += 1
+			print(f"explain:{label} full_scan={','.join(full) if full else 'none'}")
+	finally:
+		await tr.rollback()
+	return failures
+
+
+async def main() -> int:
 	repo_root = Path(__file__).resolve().parents[1]
 	if str(repo_root) not in sys.path:
 		sys.path.insert(0, str(repo_root))
@@ -20,6 +196,16 @@ async def main() -> None:
 			"users",
 			"voice_sessions",
 			"daily_streaks",
+			"level_thresholds",
+			"user_period_totals",
+			"user_streak_bitsets",
+			"user_daily_totals",
+			"guild_daily_max",
+			"guild_leaderboards",
+			"guild_level_counts",
+			"voice_session_rollups",
+			"chat_activity",
+			"reaction_usage",
 		]
 		for tbl in tables:
 			exists = await conn.fetchval(
@@ -34,20 +220,36 @@ async def main() -> None:
 			)
 			print(f"table:{tbl} exists={bool(exists)}")
 
-		# Verify an index as sample
-		idx_exists = await conn.fetchval(
-			"""
-			SELECT EXISTS (
-				SELECT 1 FROM pg_indexes WHERE schemaname='public' AND indexname='idx_sessions_user_guild'
-			);
-			"""
-		)
-		print(f"index:idx_sessions_user_guild exists={bool(idx_exists)}")
+		indexes = [
+			"idx_sessions_user_guild",
+			"idx_sessions_open",
+			"idx_sessions_user_guild_ended",
+			"idx_sessions_guild_ended",
+			"idx_chat_activity_guild_date",
+			"idx_reaction_usage_guild_date",
+			"idx_level_thresholds_min_xp",
+			"idx_guild_leaderboards_rank",
+			"idx_session_rollups_guild_day",
+		]
+		for idx in indexes:
+			idx_exists = await conn.fetchval(
+				"""
+				SELECT EXISTS (
+					SELECT 1 FROM pg_indexes WHERE schemaname='public' AND indexname=$1
+				);
+				""",
+				idx,
+			)
+			print(f"index:{idx} exists={bool(idx_exists)}")
+
+		failures = await explain_hot_queries(conn)
 
 	await close_pool()
+	if failures:
+		print(f"FAIL: {failures} hot queries would scan a whole table or index")
+		return 1
+	return 0
 
 
 if __name__ == "__main__":
-	asyncio.run(main())
-
-
+	sys.exit(asyncio.run(main()))
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from pathlib import Path
 
 import discord
@@ -76,11 +77,29 @@ def pick_levelup_channel(guild: discord.Guild) -> Optional[discord.TextChannel]:
     return None
 
 
+def member_profile_fields(member: discord.Member) -> dict[str, object]:
+    """Collect the users profile columns for a member (see core.profile_sync for how None is handled)."""
+    from cogs.profile_cog import compute_student_no, pick_house_name
+
+    return {
+        "nickname": member.nick or member.display_name or str(member),
+        "student_no": compute_student_no(member),
+        "joined_at": member.joined_at.astimezone(KST).date() if member.joined_at else None,
+        "profile_image": str(member.display_avatar.url) if member.display_avatar else None,
+        "dormitory": pick_house_name(member),
+    }
+
+
 async def main() -> None:
     load_environment_variables()
     configure_logging()
     await run_startup_checks()
 
+    # Ensure repo root is importable so that 'core' and 'cogs' (at project root) can be found
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
     intents = discord.Intents.default()
     intents.members = True  # needed for member enumerate and join/remove events
     intents.message_content = True
@@ -119,171 +138,257 @@ async def main() -> None:
             kwargs["delete_after"] = levelup_delete_after_sec
         await channel.send(content, **kwargs)
 
+    async def sync_guild_on_ready(g: discord.Guild, now: datetime, sync_commands: bool) -> None:
+        """Startup sync for one guild: voice snapshot, member provisioning, profile sync, command sync.
+
+        Logs per-phase timings so slow guilds/phases are visible.
+        """
+        from core.database import ensure_users_for_guild, start_voice_sessions
+        from core.profile_sync import sync_guild_profiles
+        from core.student_numbers import build_join_index
+
+        timings: dict[str, float] = {}
+        t0 = time.perf_counter()
+
+        # Snapshot currently connected voice members and start fresh sessions immediately (one bulk insert)
+        try:
+            channels = []
+            channels.extend(getattr(g, "voice_channels", []) or [])
+            channels.extend(getattr(g, "stage_channels", []) or [])
+            voice_member_ids: list[int] = []
+            for ch in channels:
+                # Skip excluded channels
+                if ch.id in EXCLUDED_VOICE_CHANNEL_IDS:
+                    continue
+                for m in getattr(ch, "members", []) or []:
+                    if getattr(m, "bot", False):
+                        continue
+                    # avoid duplicate if somehow present
+                    if (g.id, m.id) in active_sessions:
+                        continue
+                    voice_member_ids.append(m.id)
+            if voice_member_ids:
+                # DB에 세션 시작 기록 (ended_at=NULL)
+                try:
+                    await start_voice_sessions(g.id, voice_member_ids, now)
+                except Exception as db_exc:
+                    logging.warning("Failed to start voice sessions in DB for guild %s: %s", g.id, db_exc)
+                for uid in voice_member_ids:
+                    active_sessions[(g.id, uid)] = now
+                logging.info("Started %s resumed voice sessions after restart snapshot in guild %s", len(voice_member_ids), g.id)
+        except Exception as gexc:
+            logging.warning("Snapshot voice members failed for guild %s: %s", g.id, gexc)
+        timings["voice_snapshot"] = time.perf_counter() - t0
+
+        # Pre-provision user records for all current guild members so /profile works immediately
+        t0 = time.perf_counter()
+        members = [m for m in g.members if not m.bot]
+        if not members:
+            # attempt fetch if cache empty
+            try:
+                async for m in g.fetch_members(limit=None):
+                    if not m.bot:
+                        members.append(m)
+            except Exception as fetch_exc:
+                logging.warning("Member fetch failed for guild %s: %s", g.id, fetch_exc)
+        # Join-date index for student numbers, built once from the member list
+        build_join_index(g.id, ((m.id, m.joined_at) for m in members if m.joined_at))
+        timings["members"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        try:
+            member_ids = [m.id for m in members]
+            await ensure_users_for_guild(g.id, member_ids)
+            logging.info("Ensured %s user records for guild %s", len(member_ids), g.id)
+        except Exception as ensure_exc:
+            logging.warning("Ensuring users failed for guild %s: %s", g.id, ensure_exc)
+        timings["ensure_users"] = time.perf_counter() - t0
+
+        # Sync nicknames, student numbers, joined_at, profile_image, and dormitory; only changed rows are written
+        t0 = time.perf_counter()
+        try:
+            profiles = {m.id: member_profile_fields(m) for m in members}
+            written = await sync_guild_profiles(g.id, profiles)
+            logging.info(
+                "Synced user data (nickname, joined_at, profile_image, dormitory) for guild %s: %s/%s rows changed",
+                g.id,
+                written,
+                len(profiles),
+            )
+        except Exception as nick_exc:
+            logging.warning("Profile sync failed for guild %s: %s", g.id, nick_exc)
+        timings["profiles"] = time.perf_counter() - t0
+
+        if sync_commands:
+            t0 = time.perf_counter()
+            try:
+                bot.tree.copy_global_to(guild=g)
+                await bot.tree.sync(guild=g)
+                logging.info("Slash commands synced to guild %s", g.id)
+            except Exception as sync_exc:
+                logging.warning("Guild sync failed for %s: %s", g.id, sync_exc)
+            timings["commands"] = time.perf_counter() - t0
+
+        logging.info(
+            "Startup sync for guild %s done (%s members): %s",
+            g.id,
+            len(members),
+            " ".join(f"{phase}={sec:.2f}s" for phase, sec in timings.items()),
+        )
+
+    heartbeat_interval = get_env_int("VOICE_HEARTBEAT_SEC", 300)
+    background_tasks: dict[str, asyncio.Task] = {}
+    # one-time startup steps already run in this process (on_ready fires again on every reconnect)
+    startup_steps: set[str] = set()
+
+    def live_voice_sessions() -> list[tuple[int, int, datetime]]:
+        """(user_id, guild_id, started_at) of the sessions tracked in active_sessions."""
+        return [(uid, gid, started) for (gid, uid), started in active_sessions.items()]
+
+    async def heartbeat_periodically(interval_sec: int) -> None:
+        """Checkpoint open voice sessions so crash recovery closes them at the last heartbeat."""
+        from core.database import heartbeat_open_sessions
+
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                touched = await heartbeat_open_sessions(now_kst_naive(), live_voice_sessions())
+                logging.debug("Voice heartbeat checkpointed %s open sessions", touched)
+            except Exception as exc:
+                logging.warning("Voice heartbeat failed: %s", exc)
+
+    async def maintain_partitions_periodically(interval_sec: int) -> None:
+        """Pre-create upcoming monthly voice_sessions partitions now and then once per interval."""
+        from core.database import ensure_voice_session_partitions
+
+        months_ahead = get_env_int("VOICE_PARTITION_MONTHS_AHEAD", 3)
+        while True:
+            try:
+                created = await ensure_voice_session_partitions(months_ahead)
+                if created:
+                    logging.info("Created voice_sessions partitions: %s", ", ".join(created))
+            except Exception as exc:
+                logging.warning("Partition maintenance failed: %s", exc)
+            await asyncio.sleep(interval_sec)
+
+    async def maintain_snapshots_periodically(interval_sec: int) -> None:
+        """Fold queued session closes into the guild snapshot tables; full rebuild at startup and once a night."""
+        from core.snapshots import flush_snapshots, rebuild_snapshots
+
+        rebuild_hour = get_env_int("SNAPSHOT_REBUILD_HOUR_KST", 4)
+        rebuilt_for = None
+        while True:
+            try:
+                # "snapshot day" turns over at rebuild_hour KST
+                snapshot_day = (now_kst_naive() - timedelta(hours=rebuild_hour)).date()
+                if rebuilt_for != snapshot_day:
+                    t0 = time.perf_counter()
+                    guilds = await rebuild_snapshots()
+                    rebuilt_for = snapshot_day
+                    logging.info("Rebuilt guild snapshots for %s guilds in %.2fs", guilds, time.perf_counter() - t0)
+                else:
+                    await flush_snapshots()
+            except Exception as exc:
+                logging.warning("Snapshot maintenance failed: %s", exc)
+            await asyncio.sleep(interval_sec)
+
     @bot.event
     async def on_ready():
         logging.info("Logged in as %s (ID: %s)", bot.user, bot.user.id)
+        ready_t0 = time.perf_counter()
         try:
-            # Finalize any open sessions from previous run
+            # Finalize any open sessions from previous run, once per process: on a reconnect
+            # the open rows belong to sessions still tracked in active_sessions
+            if "finalize" not in startup_steps:
+                startup_steps.add("finalize")
+                try:
+                    from core.database import finalize_open_sessions
+
+                    min_session_sec = get_env_int("VOICE_MIN_SESSION_SEC", 180)
+                    finalized = await finalize_open_sessions(
+                        min_duration_seconds=min_session_sec,
+                        use_heartbeat=heartbeat_interval > 0,
+                    )
+                    if finalized:
+                        logging.info("Finalized %s open sessions from previous run", finalized)
+                except Exception as finalize_exc:
+                    logging.warning("Finalize open sessions failed: %s", finalize_exc)
+
+            # Start checkpointing only after stale sessions are closed (on_ready may fire again on reconnect)
+            if heartbeat_interval > 0 and "heartbeat" not in background_tasks:
+                background_tasks["heartbeat"] = asyncio.create_task(heartbeat_periodically(heartbeat_interval))
+            if "partitions" not in background_tasks:
+                background_tasks["partitions"] = asyncio.create_task(maintain_partitions_periodically(24 * 3600))
+            if "snapshots" not in background_tasks:
+                background_tasks["snapshots"] = asyncio.create_task(
+                    maintain_snapshots_periodically(get_env_int("SNAPSHOT_FLUSH_SEC", 30))
+                )
+
+            # Warm the known-user cache so writes can skip the users existence upsert
             try:
-                from core.database import finalize_open_sessions
+                from core.database import load_known_users
 
-                min_session_sec = get_env_int("VOICE_MIN_SESSION_SEC", 180)
-                finalized = await finalize_open_sessions(min_duration_seconds=min_session_sec)
-                if finalized:
-                    logging.info("Finalized %s open sessions from previous run", finalized)
-            except Exception as finalize_exc:
-                logging.warning("Finalize open sessions failed: %s", finalize_exc)
+                known = await load_known_users()
+                logging.info("Loaded %s known user records", known)
+            except Exception as known_exc:
+                logging.warning("Loading known users failed: %s", known_exc)
 
-            # Snapshot currently connected voice members and start fresh sessions immediately
+            # Keep the DB level table in line with core/leveling.py (used by add_xp / transitions)
             try:
-                from core.database import start_voice_session
-                now = now_kst_naive()
-                started = 0
-                for g in bot.guilds:
-                    try:
-                        channels = []
-                        try:
-                            channels.extend(getattr(g, "voice_channels", []) or [])
-                        except Exception:
-                            pass
-                        try:
-                            channels.extend(getattr(g, "stage_channels", []) or [])
-                        except Exception:
-                            pass
-                        for ch in channels:
-                            # Skip excluded channels
-                            if ch.id in EXCLUDED_VOICE_CHANNEL_IDS:
-                                continue
-                            for m in getattr(ch, "members", []) or []:
-                                if getattr(m, "bot", False):
-                                    continue
-                                key = (g.id, m.id)
-                                # avoid duplicate if somehow present
-                                if key in active_sessions:
-                                    continue
-                                # ensure user exists and nickname stored
-                                try:
-                                    from core.database import ensure_user, set_user_nickname
-                                    await ensure_user(m.id, g.id)
-                                    nickname = m.nick or m.display_name or str(m)
-                                    await set_user_nickname(m.id, g.id, nickname)
-                                except Exception:
-                                    pass
-                                # DB에 세션 시작 기록 (ended_at=NULL)
-                                try:
-                                    await start_voice_session(m.id, g.id, now)
-                                except Exception as db_exc:
-                                    logging.warning("Failed to start voice session in DB: %s", db_exc)
-                                active_sessions[key] = now
-                                started += 1
-                    except Exception as gexc:
-                        logging.warning("Snapshot voice members failed for guild %s: %s", getattr(g, "id", "?"), gexc)
-                if started:
-                    logging.info("Started %s resumed voice sessions after restart snapshot", started)
-            except Exception as snap_exc:
-                logging.warning("Snapshot of active voice members failed: %s", snap_exc)
+                from core.database import sync_level_thresholds
 
+                await sync_level_thresholds()
+            except Exception as level_exc:
+                logging.warning("Syncing level thresholds failed: %s", level_exc)
+
+            now = now_kst_naive()
             dev_guild_id = os.getenv("DEV_GUILD_ID")
-            if dev_guild_id and dev_guild_id.isdigit():
+            use_dev_guild = bool(dev_guild_id and dev_guild_id.isdigit())
+            if use_dev_guild:
                 guild = discord.Object(id=int(dev_guild_id))
                 bot.tree.copy_global_to(guild=guild)
                 await bot.tree.sync(guild=guild)
                 logging.info("Slash commands synced to guild %s", dev_guild_id)
-            else:
-                # Immediate per-guild sync for all guilds the bot is currently in
-                if bot.guilds:
-                    for g in bot.guilds:
-                        try:
-                            bot.tree.copy_global_to(guild=g)
-                            await bot.tree.sync(guild=g)
-                            logging.info("Slash commands synced to guild %s", g.id)
-                        except Exception as sync_exc:
-                            logging.warning("Guild sync failed for %s: %s", g.id, sync_exc)
+
+            # Sync guilds concurrently (bounded) so time-to-ready follows the largest guild, not the sum
+            concurrency = max(1, get_env_int("STARTUP_SYNC_CONCURRENCY", 4))
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def _bounded_sync(g: discord.Guild) -> None:
+                async with semaphore:
+                    await sync_guild_on_ready(g, now, sync_commands=not use_dev_guild)
+
+            results = await asyncio.gather(*(_bounded_sync(g) for g in bot.guilds), return_exceptions=True)
+            for g, result in zip(bot.guilds, results):
+                if isinstance(result, Exception):
+                    logging.warning("Startup sync failed for guild %s: %s", g.id, result)
+
+            if not use_dev_guild:
                 # Also request global sync for eventual propagation
                 await bot.tree.sync()
                 logging.info("Global slash commands sync requested")
 
-            # Pre-provision user records for all current guild members so /profile works immediately
+            logging.info(
+                "Startup sync finished for %s guilds in %.2fs (concurrency=%s)",
+                len(bot.guilds),
+                time.perf_counter() - ready_t0,
+                concurrency,
+            )
+
             try:
-                from core.database import ensure_users_for_guild, set_user_nicknames, set_user_student_nos, set_user_joined_ats, set_user_profile_images, set_user_dormitories
-                from cogs.profile_cog import pick_house_name
-                for g in bot.guilds:
-                    member_ids = [m.id for m in g.members if not m.bot]
-                    # Upsert all users
-                    if not member_ids:
-                        member_ids = []
-                        try:
-                            async for m in g.fetch_members(limit=None):
-                                if not m.bot:
-                                    member_ids.append(m.id)
-                        except Exception as fetch_exc:
-                            logging.warning("Member fetch failed for guild %s: %s", g.id, fetch_exc)
-                    await ensure_users_for_guild(g.id, member_ids)
-                    logging.info("Ensured %s user records for guild %s", len(member_ids), g.id)
-
-                    # Upsert nicknames, student numbers, joined_at, profile_image, and dormitory for all existing members
-                    try:
-                        user_id_to_nick = {}
-                        user_id_to_stuno = {}
-                        user_id_to_joined_at = {}
-                        user_id_to_profile_image = {}
-                        user_id_to_dormitory = {}
-                        for m in g.members:
-                            if m.bot:
-                                continue
-                            user_id_to_nick[m.id] = m.nick or m.display_name or str(m)
-                            # Store profile image URL
-                            if m.display_avatar:
-                                user_id_to_profile_image[m.id] = str(m.display_avatar.url)
-                            # Store dormitory from role
-                            dormitory = pick_house_name(m)
-                            if dormitory:
-                                user_id_to_dormitory[m.id] = dormitory
-                            # compute student number base (YYMMDD + order) and joined_at
-                            if m.joined_at:
-                                joined_date_kst = m.joined_at.astimezone(KST).date()
-                                user_id_to_joined_at[m.id] = joined_date_kst
-                                base = m.joined_at.astimezone(KST).strftime("%y%m%d")
-                                same_day = [mm for mm in g.members if mm.joined_at and mm.joined_at.date() == m.joined_at.date() and not mm.bot]
-                                same_day_sorted = sorted(same_day, key=lambda mm: (mm.joined_at, mm.id))
-                                try:
-                                    idx = next(i for i, mm in enumerate(same_day_sorted) if mm.id == m.id)
-                                except StopIteration:
-                                    idx = 0
-                                suffix = f"{idx + 1:02d}"
-                                user_id_to_stuno[m.id] = f"{base}{suffix}"
-                        if not user_id_to_nick:
-                            # attempt fetch if cache empty
-                            async for m in g.fetch_members(limit=None):
-                                if not m.bot:
-                                    user_id_to_nick[m.id] = m.nick or m.display_name or str(m)
-                                    if m.display_avatar:
-                                        user_id_to_profile_image[m.id] = str(m.display_avatar.url)
-                                    dormitory = pick_house_name(m)
-                                    if dormitory:
-                                        user_id_to_dormitory[m.id] = dormitory
-                                    if m.joined_at:
-                                        joined_date_kst = m.joined_at.astimezone(KST).date()
-                                        user_id_to_joined_at[m.id] = joined_date_kst
-                                        base = m.joined_at.astimezone(KST).strftime("%y%m%d")
-                                        same_day = [mm for mm in g.members if mm.joined_at and mm.joined_at.date() == m.joined_at.date() and not mm.bot]
-                                        same_day_sorted = sorted(same_day, key=lambda mm: (mm.joined_at, mm.id))
-                                        try:
-                                            idx = next(i for i, mm in enumerate(same_day_sorted) if mm.id == m.id)
-                                        except StopIteration:
-                                            idx = 0
-                                        suffix = f"{idx + 1:02d}"
-                                        user_id_to_stuno[m.id] = f"{base}{suffix}"
-                        await set_user_nicknames(g.id, user_id_to_nick)
-                        await set_user_student_nos(g.id, user_id_to_stuno)
-                        await set_user_joined_ats(g.id, user_id_to_joined_at)
-                        await set_user_profile_images(g.id, user_id_to_profile_image)
-                        await set_user_dormitories(g.id, user_id_to_dormitory)
-                        logging.info("Upserted user data (nickname, joined_at, profile_image, dormitory) for %s users in guild %s", len(user_id_to_nick), g.id)
-                    except Exception as nick_exc:
-                        logging.warning("Nickname upsert failed for guild %s: %s", g.id, nick_exc)
-            except Exception as prov_exc:
-                logging.warning("Member pre-provision failed: %s", prov_exc)
+                from core.database import get_known_user_stats
+
+                known_stats = get_known_user_stats()
+                logging.info(
+                    "Known-user cache: size=%s hits=%s misses=%s fk_fallbacks=%s hit_rate=%.1f%%",
+                    known_stats["size"],
+                    known_stats["hits"],
+                    known_stats["misses"],
+                    known_stats["fk_fallbacks"],
+                    known_stats["hit_rate"] * 100,
+                )
+            except Exception:
+                pass
         except Exception as exc:
             logging.warning("Failed to sync commands: %s", exc)
 
@@ -293,13 +398,18 @@ async def main() -> None:
     @bot.event
     async def on_member_join(member: discord.Member):
         try:
-            from core.database import ensure_user, set_user_nickname, set_user_student_no, set_user_joined_at, set_user_profile_image
+            from core.database import ensure_user
+            from core.profile_sync import forget_profile, sync_user_profile
+            # A rejoining member's row may have been deleted on leave; write the full profile again
+            forget_profile(member.id, member.guild.id)
+            if not member.bot:
+                from core.student_numbers import add_member_to_index
+                add_member_to_index(member.guild.id, member.id, member.joined_at)
             await ensure_user(member.id, member.guild.id)
             # Mark status active on join
             try:
-                from core.database import get_pool
-                pool = await get_pool()
-                async with pool.acquire() as conn:
+                from core.database import acquire
+                async with acquire() as conn:
                     await conn.execute(
                         "UPDATE users SET status='active' WHERE user_id=$1 AND guild_id=$2",
                         member.id,
@@ -307,36 +417,22 @@ async def main() -> None:
                     )
             except Exception:
                 pass
-            # Store current nickname/display name into DB
-            nickname = member.nick or member.display_name or str(member)
-            await set_user_nickname(member.id, member.guild.id, nickname)
-            # Store profile image URL
-            if member.display_avatar:
-                await set_user_profile_image(member.id, member.guild.id, str(member.display_avatar.url))
-            # Store student number and joined_at
-            if member.joined_at:
-                joined_date_kst = member.joined_at.astimezone(KST).date()
-                # Save joined_at to DB
-                await set_user_joined_at(member.id, member.guild.id, joined_date_kst)
-                # Compute student number
-                base = member.joined_at.astimezone(KST).strftime("%y%m%d")
-                same_day = [m for m in member.guild.members if m.joined_at and m.joined_at.date() == member.joined_at.date() and not m.bot]
-                same_day_sorted = sorted(same_day, key=lambda m: (m.joined_at, m.id))
-                try:
-                    idx = next(i for i, m in enumerate(same_day_sorted) if m.id == member.id)
-                except StopIteration:
-                    idx = 0
-                suffix = f"{idx + 1:02d}"
-                await set_user_student_no(member.id, member.guild.id, f"{base}{suffix}")
+            # Store nickname, profile image, joined_at and student number (changed fields only)
+            await sync_user_profile(member.id, member.guild.id, **member_profile_fields(member))
             logging.info("Ensured user record for joined member %s in guild %s", member.id, member.guild.id)
         except Exception as exc:
             logging.warning("Failed to ensure user on join: %s", exc)
 
     @bot.event
     async def on_member_remove(member: discord.Member):
+        try:
+            from core.student_numbers import remove_member_from_index
+            remove_member_from_index(member.guild.id, member.id, member.joined_at)
+        except Exception:
+            pass
         try:
             # If total study time is within threshold, delete all data; otherwise keep or purge via env flag
-            from core.database import fetch_user_total_seconds, delete_user_all_data, purge_user_non_session_data, get_pool
+            from core.database import fetch_user_total_seconds, delete_user_all_data, purge_user_non_session_data, acquire
 
             threshold_sec = get_env_int("LEAVE_DELETE_THRESHOLD_SEC", 1800)
             try:
@@ -375,8 +471,7 @@ async def main() -> None:
                 )
             # Also mark status left
             try:
-                pool = await get_pool()
-                async with pool.acquire() as conn:
+                async with acquire() as conn:
                     await conn.execute(
                         "UPDATE users SET status='left' WHERE user_id=$1 AND guild_id=$2",
                         member.id,
@@ -391,7 +486,8 @@ async def main() -> None:
     async def on_member_update(before: discord.Member, after: discord.Member):
         """Update DB immediately when a member's server nickname or roles change."""
         try:
-            from core.database import ensure_user, set_user_nickname, set_user_dormitory
+            from core.database import ensure_user
+            from core.profile_sync import sync_user_profile
             from cogs.profile_cog import pick_house_name
 
             nickname_changed = before.nick != after.nick
@@ -405,16 +501,16 @@ async def main() -> None:
             # Update nickname if changed
             if nickname_changed:
                 nickname = after.nick or after.display_name or str(after)
-                await set_user_nickname(after.id, after.guild.id, nickname)
-                logging.info(
-                    "Updated nickname for member %s in guild %s to '%s'", after.id, after.guild.id, nickname
-                )
+                if await sync_user_profile(after.id, after.guild.id, nickname=nickname):
+                    logging.info(
+                        "Updated nickname for member %s in guild %s to '%s'", after.id, after.guild.id, nickname
+                    )
 
             # Update dormitory if roles changed
             if roles_changed:
                 dormitory = pick_house_name(after)
-                if dormitory:
-                    await set_user_dormitory(after.id, after.guild.id, dormitory)
+                # None (house role removed) clears the stored dormitory
+                if await sync_user_profile(after.id, after.guild.id, dormitory=dormitory):
                     logging.info(
                         "Updated dormitory for member %s in guild %s to '%s'", after.id, after.guild.id, dormitory
                     )
@@ -428,14 +524,13 @@ async def main() -> None:
             # Only proceed if avatar changed
             if before.avatar == after.avatar:
                 return
-            from core.database import set_user_profile_image
+            from core.profile_sync import sync_user_profile
             # Update profile image for all guilds the user is in
             for guild in bot.guilds:
                 member = guild.get_member(after.id)
                 if member and not member.bot:
                     avatar_url = str(member.display_avatar.url) if member.display_avatar else None
-                    if avatar_url:
-                        await set_user_profile_image(after.id, guild.id, avatar_url)
+                    if avatar_url and await sync_user_profile(after.id, guild.id, profile_image=avatar_url):
                         logging.info(
                             "Updated profile_image for user %s in guild %s", after.id, guild.id
                         )
@@ -453,6 +548,138 @@ async def main() -> None:
     # In-memory set for today's chat activity (to avoid redundant DB calls)
     _chat_activity_recorded: set[tuple[int, int, str]] = set()
 
+    # DB work for gateway events runs in core.ingest workers (keyed by guild/user) so a slow
+    # database round trip does not hold up the following events.
+    from core.ingest import ChatActivity, PostXp, ReactionUsage, VoiceTransition, enqueue, register_handler
+    from core.voice_journal import append_voice_event
+
+    async def handle_chat_activity(event: ChatActivity) -> None:
+        from core.database import record_chat_activity
+        try:
+            await record_chat_activity(event.user_id, event.guild_id, event.activity_date)
+        except Exception as exc:
+            logging.warning("Failed to record chat activity: %s", exc)
+
+    async def handle_reaction_usage(event: ReactionUsage) -> None:
+        from core.database import record_reaction_usage
+        try:
+            await record_reaction_usage(event.user_id, event.guild_id, event.emoji, event.usage_date)
+        except Exception as exc:
+            logging.warning("Failed to record reaction usage: %s", exc)
+
+    async def handle_post_xp(event: PostXp) -> None:
+        from core.database import add_xp
+        try:
+            result = await add_xp(event.user_id, event.guild_id, event.amount)
+            if not event.announce:
+                return
+            if result and result.get("new_level", 0) > result.get("old_level", 0):
+                guild = bot.get_guild(event.guild_id)
+                channel = pick_levelup_channel(guild) if guild else None
+                if channel:
+                    _, title = resolve_level_info(result)
+                    await send_levelup_message(
+                        channel,
+                        f"🦉 <@{event.user_id}> 님이 {title}로 전직하셨습니다! `{result['total_xp']}XP`",
+                    )
+                else:
+                    logging.warning("No available channel to send level-up message in guild %s", event.guild_id)
+        except Exception as exc:
+            logging.warning("Failed to add post XP: %s", exc)
+
+    async def handle_voice_transition(event: VoiceTransition) -> None:
+        from core.voice_journal import ack_voice_event, held_back, mark_voice_event_failed
+
+        # 같은 사용자의 이전 이벤트가 재시도 대기 중이면 순서를 지키도록 함께 재시도로 넘김
+        if event.journal_seq and held_back(event.journal_seq):
+            return
+        member_id, guild_id = event.user_id, event.guild_id
+        applied = True
+        if event.kind == "move":
+            # 채널 이동: 이전 세션 마감과 새 세션 시작을 한 번의 왕복으로 처리
+            from core.database import transition_voice_session
+
+            try:
+                await transition_voice_session(
+                    member_id,
+                    guild_id,
+                    event.started_at,
+                    event.at,
+                    close_previous=event.record_previous,
+                    open_next=event.start_next,
+                )
+                if event.record_previous and event.started_at:
+                    logging.info(
+                        "Voice session moved: user=%s guild=%s duration=%ss (from %s to %s)",
+                        member_id,
+                        guild_id,
+                        int((event.at - event.started_at).total_seconds()),
+                        event.before_channel,
+                        event.after_channel,
+                    )
+            except Exception as exc:
+                applied = False
+                logging.warning("Failed to record voice move session: %s", exc)
+        else:
+            applied = await _apply_voice_close_and_start(event)
+
+        # 성공하면 저널에서 확인 처리, 실패하면 재시도 대상으로 남김
+        if event.journal_seq:
+            if applied:
+                ack_voice_event(event.journal_seq)
+            else:
+                mark_voice_event_failed(event.journal_seq)
+
+    async def _apply_voice_close_and_start(event: VoiceTransition) -> bool:
+        """Apply a join/leave; returns False if any DB write failed."""
+        from core.database import discard_voice_session, record_voice_session, start_voice_session
+
+        member_id, guild_id = event.user_id, event.guild_id
+        applied = True
+        if event.record_previous and event.started_at:
+            duration = int((event.at - event.started_at).total_seconds())
+            try:
+                result = await record_voice_session(member_id, guild_id, event.started_at, event.at, duration)
+                if result and result.get("new_level", 0) > result.get("old_level", 0):
+                    # Level-up! Send an ephemeral congrats to the user in a text channel if possible
+                    try:
+                        guild = bot.get_guild(guild_id)
+                        channel = pick_levelup_channel(guild) if guild else None
+                        if channel:
+                            _, title = resolve_level_info(result)
+                            await send_levelup_message(
+                                channel,
+                                f"🦉 <@{member_id}> 님이 **{title}**로 전직하셨습니다! `{result['total_xp']}XP`",
+                            )
+                        else:
+                            logging.warning("No available channel to send level-up message in guild %s", guild_id)
+                    except Exception as send_exc:
+                        logging.warning("Failed to send level-up message: %s", send_exc)
+            except Exception as exc:
+                applied = False
+                logging.warning("Failed to record voice session: %s", exc)
+
+        if event.discard_previous and event.started_at:
+            try:
+                await discard_voice_session(member_id, guild_id, event.started_at)
+            except Exception as exc:
+                applied = False
+                logging.warning("Failed to discard short voice session: %s", exc)
+
+        if event.start_next:
+            # DB에 세션 시작 기록 (ended_at=NULL)
+            try:
+                await start_voice_session(member_id, guild_id, event.at)
+            except Exception as db_exc:
+                applied = False
+                logging.warning("Failed to start voice session in DB: %s", db_exc)
+        return applied
+
+    register_handler(ChatActivity, handle_chat_activity)
+    register_handler(ReactionUsage, handle_reaction_usage)
+    register_handler(PostXp, handle_post_xp)
+    register_handler(VoiceTransition, handle_voice_transition)
+
     @bot.event
     async def on_message(message: discord.Message):
         # Ignore bot/self
@@ -469,11 +696,9 @@ async def main() -> None:
             chat_key = (message.guild.id, message.author.id, today_str)
             if chat_key not in _chat_activity_recorded:
                 _chat_activity_recorded.add(chat_key)
-                try:
-                    from core.database import record_chat_activity
-                    await record_chat_activity(message.author.id, message.guild.id, today)
-                except Exception as exc:
-                    logging.warning("Failed to record chat activity: %s", exc)
+                if not await enqueue(ChatActivity(guild_id=message.guild.id, user_id=message.author.id, activity_date=today)):
+                    # dropped under load; allow a later message to retry
+                    _chat_activity_recorded.discard(chat_key)
 
         # Only handle plain text channels here. Threads (forum posts & replies) are handled separately.
         if not isinstance(message.channel, discord.TextChannel):
@@ -491,21 +716,7 @@ async def main() -> None:
             return
         _last_post_ts[key] = now_ts
 
-        try:
-            from core.database import add_xp
-            result = await add_xp(message.author.id, message.guild.id, POST_XP_AMOUNT)
-            if result and result.get("new_level", 0) > result.get("old_level", 0):
-                channel = pick_levelup_channel(message.guild)
-                if channel:
-                    _, title = resolve_level_info(result)
-                    await send_levelup_message(
-                        channel,
-                        f"🦉 {message.author.mention} 님이 {title}로 전직하셨습니다! `{result['total_xp']}XP`",
-                    )
-                else:
-                    logging.warning("No available channel to send level-up message in guild %s", message.guild.id)
-        except Exception as exc:
-            logging.warning("Failed to add post XP: %s", exc)
+        await enqueue(PostXp(guild_id=message.guild.id, user_id=message.author.id, amount=POST_XP_AMOUNT, announce=True))
 
     @bot.event
     async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
@@ -516,14 +727,10 @@ async def main() -> None:
         if not payload.guild_id:
             return
 
-        try:
-            from core.database import record_reaction_usage
-            today = now_kst_naive().date()
-            # Get emoji string representation
-            emoji_str = str(payload.emoji)
-            await record_reaction_usage(payload.user_id, payload.guild_id, emoji_str, today)
-        except Exception as exc:
-            logging.warning("Failed to record reaction usage: %s", exc)
+        today = now_kst_naive().date()
+        # Get emoji string representation
+        emoji_str = str(payload.emoji)
+        await enqueue(ReactionUsage(guild_id=payload.guild_id, user_id=payload.user_id, emoji=emoji_str, usage_date=today))
 
     @bot.event
     async def on_thread_create(thread: discord.Thread):
@@ -549,20 +756,13 @@ async def main() -> None:
             if author_id is None:
                 return
 
-            from core.database import add_xp
-            await add_xp(author_id, guild.id, POST_XP_AMOUNT)
+            await enqueue(PostXp(guild_id=guild.id, user_id=author_id, amount=POST_XP_AMOUNT))
         except Exception as exc:
             logging.warning("Failed to add XP for thread create: %s", exc)
 
 
     @bot.event
     async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        try:
-            from core.database import record_voice_session, start_voice_session
-        except Exception:
-            record_voice_session = None  # type: ignore
-            start_voice_session = None  # type: ignore
-
         guild_id = member.guild.id if member.guild else None
         if guild_id is None:
             return
@@ -581,22 +781,27 @@ async def main() -> None:
             if is_after_excluded:
                 logging.info("Voice session NOT started (excluded channel): user=%s guild=%s channel=%s", member.id, guild_id, after_channel)
                 return
-            # ensure user exists on first activity as well (safety)
+            # ensure user exists on first activity as well (safety); the nickname upsert creates the row
             try:
-                from core.database import ensure_user, set_user_nickname
-                await ensure_user(member.id, guild_id)
+                from core.profile_sync import sync_user_profile
                 nickname = member.nick or member.display_name or str(member)
-                await set_user_nickname(member.id, guild_id, nickname)
+                await sync_user_profile(member.id, guild_id, nickname=nickname)
             except Exception:
                 pass
             now = now_kst_naive()
-            # DB에 세션 시작 기록 (ended_at=NULL)
-            if start_voice_session:
-                try:
-                    await start_voice_session(member.id, guild_id, now)
-                except Exception as db_exc:
-                    logging.warning("Failed to start voice session in DB: %s", db_exc)
             active_sessions[key] = now
+            seq = append_voice_event("join", guild_id, member.id, now, start_next=True)
+            await enqueue(
+                VoiceTransition(
+                    guild_id=guild_id,
+                    user_id=member.id,
+                    kind="join",
+                    at=now,
+                    start_next=True,
+                    after_channel=after_channel,
+                    journal_seq=seq,
+                )
+            )
             logging.info("Voice session started: user=%s guild=%s", member.id, guild_id)
             return
 
@@ -609,34 +814,38 @@ async def main() -> None:
             now = now_kst_naive()
             started_at = active_sessions.pop(key, None)
 
-            # Record the previous session only if it wasn't in an excluded channel
-            if started_at and record_voice_session and not is_before_excluded:
-                try:
-                    duration = int((now - started_at).total_seconds())
-                    await record_voice_session(member.id, guild_id, started_at, now, duration)
-                    logging.info(
-                        "Voice session moved: user=%s guild=%s duration=%ss (from %s to %s)",
-                        member.id,
-                        guild_id,
-                        duration,
-                        before_channel,
-                        after_channel,
-                    )
-                except Exception as exc:
-                    logging.warning("Failed to record voice move session: %s", exc)
-
-            # Start new session at the new channel only if it's not excluded
+            # Record the previous session only if it wasn't in an excluded channel;
+            # start a new session at the new channel only if it's not excluded
+            record_previous = bool(started_at) and not is_before_excluded
             if not is_after_excluded:
-                # DB에 새 세션 시작 기록 (ended_at=NULL)
-                if start_voice_session:
-                    try:
-                        await start_voice_session(member.id, guild_id, now)
-                    except Exception as db_exc:
-                        logging.warning("Failed to start voice session in DB: %s", db_exc)
                 active_sessions[key] = now
                 logging.info("Voice session restarted at new channel: user=%s guild=%s", member.id, guild_id)
             else:
                 logging.info("Voice session NOT restarted (excluded channel): user=%s guild=%s channel=%s", member.id, guild_id, after_channel)
+            if record_previous or not is_after_excluded:
+                seq = append_voice_event(
+                    "move",
+                    guild_id,
+                    member.id,
+                    now,
+                    started_at=started_at if record_previous else None,
+                    record_previous=record_previous,
+                    start_next=not is_after_excluded,
+                )
+                await enqueue(
+                    VoiceTransition(
+                        guild_id=guild_id,
+                        user_id=member.id,
+                        kind="move",
+                        at=now,
+                        started_at=started_at,
+                        record_previous=record_previous,
+                        start_next=not is_after_excluded,
+                        before_channel=before_channel,
+                        after_channel=after_channel,
+                        journal_seq=seq,
+                    )
+                )
             return
 
         # Left a voice channel completely
@@ -657,29 +866,101 @@ async def main() -> None:
             )
             # Persist to DB for sessions meeting the minimum duration threshold
             min_session_sec = get_env_int("VOICE_MIN_SESSION_SEC", 180)
-            if duration >= min_session_sec and record_voice_session:
-                try:
-                    result = await record_voice_session(
-                        member.id, guild_id, started_at, ended_at, duration
-                    )
-                    if result and result.get("new_level", 0) > result.get("old_level", 0):
-                        # Level-up! Send an ephemeral congrats to the user in a text channel if possible
-                        try:
-                            channel = pick_levelup_channel(member.guild)
-                            if channel:
-                                _, title = resolve_level_info(result)
-                                await send_levelup_message(
-                                    channel,
-                                    f"🦉 {member.mention} 님이 **{title}**로 전직하셨습니다! `{result['total_xp']}XP`",
-                                )
-                            else:
-                                logging.warning("No available channel to send level-up message in guild %s", member.guild.id)
-                        except Exception as send_exc:
-                            logging.warning("Failed to send level-up message: %s", send_exc)
-                except Exception as exc:
-                    logging.warning("Failed to record voice session: %s", exc)
+            # Shorter sessions are dropped: their open row is deleted (in order, after the join's insert)
+            record_previous = duration >= min_session_sec
+            seq = append_voice_event(
+                "leave",
+                guild_id,
+                member.id,
+                ended_at,
+                started_at=started_at,
+                record_previous=record_previous,
+                discard_previous=not record_previous,
+            )
+            await enqueue(
+                VoiceTransition(
+                    guild_id=guild_id,
+                    user_id=member.id,
+                    kind="leave",
+                    at=ended_at,
+                    started_at=started_at,
+                    record_previous=record_previous,
+                    discard_previous=not record_previous,
+                    before_channel=before_channel,
+                    journal_seq=seq,
+                )
+            )
             return
 
+    async def log_metrics_periodically(interval_sec: int) -> None:
+        """Log ingestion queue and cache metrics at a fixed interval."""
+        from core.database import get_known_user_stats, get_pool_stats
+        from core.ingest import get_ingest_stats
+        from core.locks import get_lock_stats
+        from core.query_stats import get_query_stats
+        from core.read_cache import get_read_cache_stats
+        from core.change_feed import get_change_feed_stats
+
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                q = get_ingest_stats()
+                k = get_known_user_stats()
+                lk = get_lock_stats()
+                rc = get_read_cache_stats()
+                cf = get_change_feed_stats()
+                logging.info(
+                    "Metrics: ingest depth=%s max_partition=%s enqueued=%s processed=%s failed=%s dropped=%s "
+                    "backpressure=%s lag_avg=%.1fms lag_max=%.1fms | known_users hit_rate=%.1f%% | user_locks contended=%s/%s "
+                    "| read_cache entries=%s hit_rate=%.1f%% evictions=%s invalidations=%s "
+                    "| change_feed listening=%s received=%s published=%s failed=%s",
+                    q["depth"],
+                    q["max_partition_depth"],
+                    q["enqueued"],
+                    q["processed"],
+                    q["failed"],
+                    q["dropped"],
+                    q["backpressure_waits"],
+                    q["lag_ms_avg"],
+                    q["lag_ms_max"],
+                    k["hit_rate"] * 100,
+                    lk["contended"],
+                    lk["acquired"],
+                    rc["entries"],
+                    rc["hit_rate"] * 100,
+                    rc["evictions"],
+                    rc["invalidations"],
+                    cf["listening"],
+                    cf["received"],
+                    cf["published"],
+                    cf["publish_failed"],
+                )
+                for qs in get_query_stats(top=5):
+                    logging.info(
+                        "Metrics: query site=%s calls=%s avg=%.1fms p95<=%sms max=%.1fms rows=%s pool_wait=%.1fms errors=%s",
+                        qs["site"],
+                        qs["calls"],
+                        qs["avg_ms"],
+                        qs["p95_ms"],
+                        qs["max_ms"],
+                        qs["rows"],
+                        qs["pool_wait_ms"],
+                        qs["errors"],
+                    )
+                for kind, p in get_pool_stats().items():
+                    logging.info(
+                        "Metrics: pool=%s size=%s/%s idle=%s acquires=%s wait_avg=%.1fms wait_max=%.1fms",
+                        kind,
+                        p["size"],
+                        p["max"],
+                        p["idle"],
+                        p["acquires"],
+                        p["wait_ms_avg"],
+                        p["wait_ms_max"],
+                    )
+            except Exception as exc:
+                logging.warning("Metrics logging failed: %s", exc)
+
     token = os.getenv("DISCORD_BOT_TOKEN", "")
     if not token:
         logging.info("No DISCORD_BOT_TOKEN provided. Starting dummy loop then exit.")
@@ -687,19 +968,86 @@ async def main() -> None:
         await asyncio.sleep(0.1)
         return
 
-    # Ensure repo root is importable so that 'cogs' (at project root) can be found
-    repo_root = Path(__file__).resolve().parents[1]
-    if str(repo_root) not in sys.path:
-        sys.path.insert(0, str(repo_root))
+    # Load the profile slash commands and the admin-only diagnostics command
+    for extension in ("cogs.profile_cog", "cogs.admin_cog"):
+        try:
+            await bot.load_extension(extension)
+            logging.info("Loaded extension %s", extension)
+        except Exception as exc:
+            logging.warning("Failed to load extension %s: %s", extension, exc)
+
+    from core.ingest import start_ingest_workers, stop_ingest_workers
+    from core.voice_journal import (
+        close_voice_journal,
+        open_voice_journal,
+        replay_voice_journal,
+        run_voice_journal_maintenance,
+    )
 
-    # Load only the profile slash command
     try:
-        await bot.load_extension("cogs.profile_cog")
-        logging.info("Loaded extension cogs.profile_cog")
-    except Exception as exc:
-        logging.warning("Failed to load extension cogs.profile_cog: %s", exc)
+        pending = open_voice_journal()
+        if pending:
+            logging.info("Voice journal has %s unacknowledged events to replay", pending)
+    except Exception as journal_exc:
+        logging.warning("Failed to open voice journal (continuing without it): %s", journal_exc)
+    # Replay once per process, before on_ready finalizes open sessions and before the ingest
+    # workers run: on a gateway reconnect on_ready fires again while journaled events are
+    # still queued there, and replaying those would apply them twice.
+    try:
+        applied, failed = await replay_voice_journal()
+        if applied or failed:
+            logging.info("Voice journal replay: applied=%s failed=%s", applied, failed)
+    except Exception as replay_exc:
+        logging.warning("Voice journal replay failed: %s", replay_exc)
+    journal_task = asyncio.create_task(
+        run_voice_journal_maintenance(
+            fsync_interval_ms=get_env_int("VOICE_JOURNAL_FSYNC_MS", 200),
+            retry_interval_sec=get_env_int("VOICE_JOURNAL_RETRY_SEC", 60),
+        )
+    )
+    start_ingest_workers(
+        num_workers=get_env_int("INGEST_WORKERS", 4),
+        queue_size=get_env_int("INGEST_QUEUE_SIZE", 1000),
+    )
+    metrics_interval = get_env_int("METRICS_LOG_INTERVAL_SEC", 300)
+    metrics_task = asyncio.create_task(log_metrics_periodically(metrics_interval)) if metrics_interval > 0 else None
+    # 스크립트/다른 프로세스의 쓰기를 LISTEN 으로 받아 조회 캐시 무효화
+    from core import change_feed
+
+    change_task = asyncio.create_task(change_feed.run_listener()) if change_feed.enabled() else None
+    try:
+        await bot.start(token)
+    finally:
+        if metrics_task:
+            metrics_task.cancel()
+        if change_task:
+            change_task.cancel()
+        await stop_ingest_workers()
+        partition_task = background_tasks.pop("partitions", None)
+        if partition_task:
+            partition_task.cancel()
+        snapshot_task = background_tasks.pop("snapshots", None)
+        if snapshot_task:
+            snapshot_task.cancel()
+            # 대시보드가 봇이 내려가 있는 동안에도 마지막 세션까지 보도록 남은 큐를 반영
+            try:
+                from core.snapshots import flush_snapshots
+
+                await flush_snapshots()
+            except Exception as exc:
+                logging.warning("Final snapshot flush failed: %s", exc)
+        heartbeat_task = background_tasks.pop("heartbeat", None)
+        if heartbeat_task:
+            heartbeat_task.cancel()
+            # 정상 종료 시 마지막 체크포인트를 남겨 재시작 때 손실을 줄임
+            try:
+                from core.database import heartbeat_open_sessions
 
-    await bot.start(token)
+                await heartbeat_open_sessions(now_kst_naive(), live_voice_sessions())
+            except Exception as exc:
+                logging.warning("Final voice heartbeat failed: %s", exc)
+        journal_task.cancel()
+        await close_voice_journal()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""Shared fixtures: tests run against the embedded Postgres backend (STORAGE_BACKEND=embedded).
+
+One server is started in a temporary directory per test session and every
+migration is applied to it once. Tests use their own (user_id, guild_id)
+pairs instead of truncating tables, so the module-level caches in
+core.database stay valid between tests. Without the optional `pgserver`
+package (requirements-embedded.txt) the database tests are skipped.
+"""
+import asyncio
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+_ids = itertools.count(1)
+
+
+def run(coro):
+    """Run a coroutine on a fresh event loop. Pools are bound to their loop, so they are closed afterwards."""
+
+    async def main():
+        from core.database import close_pool
+
+        try:
+            return await coro
+        finally:
+            await close_pool()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session")
+def embedded_db(tmp_path_factory):
+    pytest.importorskip("pgserver")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("STORAGE_BACKEND", "embedded")
+    patch.setenv("EMBEDDED_DB_DIR", str(tmp_path_factory.mktemp("pgdata")))
+    patch.delenv("DATABASE_READ_URL", raising=False)
+    patch.setenv("GRASS_CACHE_DIR", "off")
+    patch.setenv("VOICE_JOURNAL_PATH", "off")
+
+    async def migrate():
+        import asyncpg
+
+        from core.database import get_database_url, sync_level_thresholds
+        from core.migrations import discover_migrations, run_migrations
+
+        conn = await asyncpg.connect(get_database_url(), statement_cache_size=0)
+        try:
+            await run_migrations(conn, discover_migrations(), log=lambda _msg: None)
+        finally:
+            await conn.close()
+        # the bot does this on startup; add_xp and transitions read levels from the table
+        await sync_level_thresholds()
+
+    run(migrate())
+    yield
+    patch.undo()
+
+
+@pytest.fixture
+def member(embedded_db):
+    """A (user_id, guild_id) pair no other test uses."""
+    n = next(_ids)
+    return 900_000 + n, 800_000 + n
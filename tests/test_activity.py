@@ -0,0 +1,23 @@
+from datetime import date
+
+from conftest import run
+
+
+def test_chat_and_reaction_writes_on_a_fresh_database(member):
+    from core.database import acquire, record_chat_activity, record_reaction_usage
+
+    user_id, guild_id = member
+    day = date(2026, 3, 6)
+
+    async def scenario():
+        first = await record_chat_activity(user_id, guild_id, day)
+        second = await record_chat_activity(user_id, guild_id, day)
+        await record_reaction_usage(user_id, guild_id, "👍", day)
+        await record_reaction_usage(user_id, guild_id, "👍", day)
+        async with acquire() as conn:
+            count = await conn.fetchval(
+                "SELECT count FROM reaction_usage WHERE user_id=$1 AND guild_id=$2 AND usage_date=$3", user_id, guild_id, day
+            )
+        return first, second, count
+
+    assert run(scenario()) == (True, False, 2)
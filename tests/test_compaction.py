@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import run
+from core import compaction, database
+
+CUTOFF = datetime(2025, 1, 1)
+# (started_at, ended_at): a plain day, one across midnight, two on the same day
+SESSIONS = [
+    (datetime(2024, 5, 2, 9, 0), datetime(2024, 5, 2, 11, 30)),
+    (datetime(2024, 5, 2, 23, 0), datetime(2024, 5, 3, 1, 15)),
+    (datetime(2024, 5, 3, 14, 0), datetime(2024, 5, 3, 14, 40)),
+]
+
+
+async def _record(user_id, guild_id):
+    for started_at, ended_at in SESSIONS:
+        seconds = int((ended_at - started_at).total_seconds())
+        await database.record_voice_session(user_id, guild_id, started_at, ended_at, seconds)
+
+
+async def _calendar(user_id, guild_id):
+    # bypass the read cache: compaction leaves every total unchanged, so it does not invalidate
+    return await database.fetch_user_calendar_year_kst.__wrapped__(user_id, guild_id, 2024)
+
+
+async def _session_rows(guild_id):
+    async with database.acquire() as conn:
+        return await conn.fetchval("SELECT COUNT(*) FROM voice_sessions WHERE guild_id=$1", guild_id)
+
+
+def test_compaction_keeps_the_calendar_and_empties_voice_sessions(member):
+    user_id, guild_id = member
+
+    async def scenario():
+        await _record(user_id, guild_id)
+        before = await _calendar(user_id, guild_id)
+        result = await compaction.compact_batch(CUTOFF, guild_id=guild_id)
+        again = await compaction.compact_batch(CUTOFF, guild_id=guild_id)
+        return before, result, again, await _calendar(user_id, guild_id), await _session_rows(guild_id)
+
+    before, result, again, after, left = run(scenario())
+    assert result == {"sessions": 3, "days": 2}
+    assert again["sessions"] == 0
+    assert left == 0
+    assert after == before
+    assert [(d["date"], d["sessions"]) for d in after] == [("2024-05-02", 2), ("2024-05-03", 2)]
+
+
+def test_digest_mismatch_rolls_the_batch_back(member, monkeypatch):
+    user_id, guild_id = member
+    # a broken rollup that loses a second per user-day must be caught by the before/after digest
+    broken = compaction._MOVE_BATCH.replace("SUM(seconds)::bigint AS seconds", "SUM(seconds)::bigint - 1 AS seconds")
+    assert broken != compaction._MOVE_BATCH
+    monkeypatch.setattr(compaction, "_MOVE_BATCH", broken)
+
+    async def scenario():
+        await _record(user_id, guild_id)
+        before = await _calendar(user_id, guild_id)
+        with pytest.raises(compaction.CompactionCheckError):
+            await compaction.compact_batch(CUTOFF, guild_id=guild_id)
+        return before, await _calendar(user_id, guild_id), await _session_rows(guild_id)
+
+    before, after, left = run(scenario())
+    assert left == len(SESSIONS)
+    assert after == before
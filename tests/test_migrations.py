@@ -0,0 +1,27 @@
+from conftest import run
+from core.migrations import discover_migrations, split_statements
+
+
+def test_split_statements_keeps_dollar_quoted_bodies_and_drops_comments():
+    sql = "-- header\nCREATE INDEX a ON t(x);\nDO $$ BEGIN PERFORM 1; END $$;\n-- trailing comment\n"
+    assert split_statements(sql) == ["-- header\nCREATE INDEX a ON t(x)", "DO $$ BEGIN PERFORM 1; END $$"]
+
+
+def test_concurrent_index_migration_runs_outside_a_transaction(embedded_db):
+    from core.database import acquire
+
+    migration = next(m for m in discover_migrations() if m.name == "migration_024_index_activity_tables.sql")
+    assert not migration.transactional
+
+    async def valid_indexes():
+        async with acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = ANY($1::text[]) AND i.indisvalid
+                """,
+                ["idx_chat_activity_guild_date", "idx_reaction_usage_guild_date"],
+            )
+        return sorted(r["relname"] for r in rows)
+
+    assert run(valid_indexes()) == ["idx_chat_activity_guild_date", "idx_reaction_usage_guild_date"]
@@ -0,0 +1,62 @@
+from datetime import date
+
+from conftest import run
+from core import profile_sync
+
+
+async def _profile(user_id, guild_id):
+    from core.database import acquire
+
+    async with acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT nickname, student_no, joined_at, dormitory FROM users WHERE user_id=$1 AND guild_id=$2",
+            user_id,
+            guild_id,
+        )
+    return tuple(row)
+
+
+def test_none_clears_dormitory_but_keeps_student_no(member):
+    user_id, guild_id = member
+    joined = date(2025, 9, 1)
+
+    async def scenario():
+        await profile_sync.sync_user_profile(
+            user_id, guild_id, nickname="kim", student_no="25001", joined_at=joined, dormitory="Gryffindor"
+        )
+        # house role removed; student_no/joined_at unknown this time
+        wrote = await profile_sync.sync_user_profile(
+            user_id, guild_id, nickname="kim", student_no=None, joined_at=None, dormitory=None
+        )
+        # nothing changed since the last write
+        again = await profile_sync.sync_user_profile(user_id, guild_id, nickname="kim", dormitory=None)
+        return wrote, again, await _profile(user_id, guild_id)
+
+    assert run(scenario()) == (True, False, ("kim", "25001", joined, None))
+
+
+def test_guild_sync_writes_only_the_columns_each_row_changed(member):
+    user_id, guild_id = member
+    other = user_id + 50_000
+
+    async def scenario():
+        await profile_sync.sync_guild_profiles(
+            guild_id,
+            {
+                user_id: {"nickname": "a", "student_no": "25002", "dormitory": "Hufflepuff"},
+                other: {"nickname": "b", "dormitory": "Ravenclaw"},
+            },
+        )
+        written = await profile_sync.sync_guild_profiles(
+            guild_id,
+            {
+                user_id: {"nickname": "a2", "student_no": "25002", "dormitory": "Hufflepuff"},
+                other: {"nickname": "b", "dormitory": None},
+            },
+        )
+        return written, await _profile(user_id, guild_id), await _profile(other, guild_id)
+
+    written, first, second = run(scenario())
+    assert written == 2
+    assert first == ("a2", "25002", None, "Hufflepuff")
+    assert second == ("b", None, None, None)
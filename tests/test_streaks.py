@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from conftest import run
+from core import database
+
+
+def test_streak_reads_use_the_kst_day(member, monkeypatch):
+    user_id, guild_id = member
+    # 00:30 KST on 1 April is still 31 March in UTC
+    monkeypatch.setattr(database, "now_kst_naive", lambda: datetime(2026, 4, 1, 0, 30))
+
+    async def scenario():
+        recent = await database.fetch_recent_streak_days(user_id, guild_id, days=7)
+        month = await database.fetch_month_streak_days(user_id, guild_id)
+        return recent["today"], (month["year"], month["month"], month["today"])
+
+    assert run(scenario()) == ("2026-04-01", (2026, 4, 1))
+
+
+def test_period_totals_roll_over_day_week_and_month(member, monkeypatch):
+    user_id, guild_id = member
+    clock = {"now": datetime(2026, 3, 31, 12, 0)}
+    monkeypatch.setattr(database, "now_kst_naive", lambda: clock["now"])
+
+    async def close(ended_at, seconds):
+        started_at = ended_at - timedelta(seconds=seconds)
+        await database.record_voice_session(user_id, guild_id, started_at, ended_at, seconds)
+
+    async def stats_at(now):
+        clock["now"] = now
+        s = await database.fetch_user_stats(user_id, guild_id)
+        return s["today_seconds"], s["week_seconds"], s["month_seconds"]
+
+    async def scenario():
+        seen = []
+        await close(datetime(2026, 3, 29, 23, 0), 1200)  # Sunday: previous week, same month
+        await close(datetime(2026, 3, 30, 10, 0), 3600)  # Monday
+        await close(datetime(2026, 3, 31, 10, 0), 1800)  # Tuesday
+        seen.append(await stats_at(datetime(2026, 3, 31, 12, 0)))
+        # a replayed Monday session arriving late counts for week and month, not for today
+        await close(datetime(2026, 3, 30, 20, 0), 600)
+        seen.append(await stats_at(datetime(2026, 3, 31, 12, 5)))
+        seen.append(await stats_at(datetime(2026, 4, 1, 9, 0)))  # new day and month, same week
+        await close(datetime(2026, 4, 1, 10, 0), 300)
+        seen.append(await stats_at(datetime(2026, 4, 1, 11, 0)))
+        seen.append(await stats_at(datetime(2026, 4, 6, 9, 0)))  # next Monday
+        return seen
+
+    assert run(scenario()) == [
+        (1800, 5400, 6600),
+        (1800, 6000, 7200),
+        (0, 6000, 0),
+        (300, 6300, 300),
+        (0, 0, 300),
+    ]
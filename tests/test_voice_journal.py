@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import run
+from core import voice_journal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    voice_journal.open_voice_journal(tmp_path / "voice_journal.jsonl")
+    yield
+    run(voice_journal.close_voice_journal())
+    voice_journal._pending.clear()
+    voice_journal._failed.clear()
+
+
+async def _sessions(user_id, guild_id):
+    from core.database import acquire
+
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT started_at, ended_at, duration_seconds FROM voice_sessions WHERE user_id=$1 AND guild_id=$2 ORDER BY started_at",
+            user_id,
+            guild_id,
+        )
+        total = await conn.fetchval("SELECT total_seconds FROM users WHERE user_id=$1 AND guild_id=$2", user_id, guild_id)
+    return [tuple(r) for r in rows], total
+
+
+def test_leave_is_held_back_behind_failed_join(journal, member):
+    user_id, guild_id = member
+    joined = datetime(2026, 3, 2, 10, 0, 0)
+    left = joined + timedelta(minutes=40)
+
+    # the join's DB write fails transiently in the ingest worker
+    join_seq = voice_journal.append_voice_event("join", guild_id, user_id, joined, start_next=True)
+    voice_journal.mark_voice_event_failed(join_seq)
+    # the leave arrives next; the worker must not apply it ahead of the join
+    leave_seq = voice_journal.append_voice_event("leave", guild_id, user_id, left, started_at=joined, record_previous=True)
+    assert voice_journal.held_back(leave_seq)
+
+    # an unrelated user's event is not held back
+    other_seq = voice_journal.append_voice_event("join", guild_id + 1, user_id, joined, start_next=True)
+    assert not voice_journal.held_back(other_seq)
+    voice_journal.ack_voice_event(other_seq)
+
+    assert run(voice_journal.replay_voice_journal(only_failed=True)) == (2, 0)
+    sessions, total = run(_sessions(user_id, guild_id))
+    assert sessions == [(joined, left, 2400)]
+    assert total == 2400
+    assert voice_journal.get_voice_journal_stats()["pending"] == 0
+
+
+def test_replay_keeps_later_events_behind_a_failure(journal, member, monkeypatch):
+    user_id, guild_id = member
+    joined = datetime(2026, 3, 3, 9, 0, 0)
+    join_seq = voice_journal.append_voice_event("join", guild_id, user_id, joined, start_next=True)
+    leave_seq = voice_journal.append_voice_event(
+        "leave", guild_id, user_id, joined + timedelta(hours=1), started_at=joined, record_previous=True
+    )
+
+    real_apply = voice_journal.apply_voice_event
+    applied = []
+
+    async def flaky_apply(record):
+        if record["seq"] == join_seq:
+            raise ConnectionError("database unavailable")
+        applied.append(record["seq"])
+        await real_apply(record)
+
+    monkeypatch.setattr(voice_journal, "apply_voice_event", flaky_apply)
+    assert run(voice_journal.replay_voice_journal()) == (0, 2)
+    assert applied == []
+    assert voice_journal.get_voice_journal_stats()["failed"] == 2
+
+    monkeypatch.setattr(voice_journal, "apply_voice_event", real_apply)
+    assert run(voice_journal.replay_voice_journal(only_failed=True)) == (2, 0)
+    sessions, total = run(_sessions(user_id, guild_id))
+    assert sessions == [(joined, joined + timedelta(hours=1), 3600)]
+    assert total == 3600
+    assert leave_seq not in voice_journal._pending
+
+
+def test_short_leave_discards_the_open_session(journal, member):
+    from core.database import heartbeat_open_sessions
+
+    user_id, guild_id = member
+    joined = datetime(2026, 3, 4, 8, 0, 0)
+    voice_journal.append_voice_event("join", guild_id, user_id, joined, start_next=True)
+    voice_journal.append_voice_event(
+        "leave", guild_id, user_id, joined + timedelta(seconds=20), started_at=joined, discard_previous=True
+    )
+    assert run(voice_journal.replay_voice_journal()) == (2, 0)
+    assert run(_sessions(user_id, guild_id))[0] == []
+    # the session is gone from active_sessions too, so nothing is left to checkpoint
+    assert run(heartbeat_open_sessions(joined + timedelta(minutes=5), [(user_id, guild_id, joined)])) == 0
+
+
+def test_heartbeat_touches_only_live_sessions(journal, member):
+    from core.database import acquire, heartbeat_open_sessions, start_voice_session
+
+    user_id, guild_id = member
+    orphan, live = datetime(2026, 3, 5, 8, 0, 0), datetime(2026, 3, 5, 9, 0, 0)
+    at = live + timedelta(minutes=1)
+
+    async def scenario():
+        await start_voice_session(user_id, guild_id, orphan)
+        await start_voice_session(user_id, guild_id + 1, live)
+        touched = await heartbeat_open_sessions(at, [(user_id, guild_id + 1, live)])
+        async with acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT guild_id, last_heartbeat_at FROM voice_sessions WHERE user_id=$1 ORDER BY guild_id", user_id
+            )
+        return touched, [tuple(r) for r in rows]
+
+    assert run(scenario()) == (1, [(guild_id, None), (guild_id + 1, at)])
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from conftest import run
+from core import database
+
+
+async def _state(user_id, guild_id):
+    """Everything a session close writes for one user, in comparable form."""
+    async with database.acquire() as conn:
+        sessions = await conn.fetch(
+            "SELECT started_at, ended_at, duration_seconds FROM voice_sessions WHERE user_id=$1 AND guild_id=$2 ORDER BY started_at",
+            user_id,
+            guild_id,
+        )
+        user = await conn.fetchrow(
+            """
+            SELECT total_seconds, xp, level, level_name, current_streak, longest_streak, last_streak_date
+            FROM users WHERE user_id=$1 AND guild_id=$2
+            """,
+            user_id,
+            guild_id,
+        )
+        streak_days = await conn.fetch(
+            "SELECT streak_date FROM daily_streaks WHERE user_id=$1 AND guild_id=$2 ORDER BY streak_date", user_id, guild_id
+        )
+        periods = await conn.fetchrow(
+            """
+            SELECT day_start, day_seconds, week_start, week_seconds, month_start, month_seconds
+            FROM user_period_totals WHERE user_id=$1 AND guild_id=$2
+            """,
+            user_id,
+            guild_id,
+        )
+    bitsets = await database.fetch_streak_bitsets(user_id, guild_id, kind="write")
+    return {
+        "sessions": [tuple(r) for r in sessions],
+        "user": tuple(user),
+        "streak_days": [r["streak_date"] for r in streak_days],
+        "periods": tuple(periods),
+        "bitsets": bitsets,
+    }
+
+
+def test_transition_matches_record_then_start(member):
+    two_step = member
+    one_statement = (member[0] + 50_000, member[1])
+    joined = datetime(2026, 3, 9, 22, 0, 0)
+    # a move after midnight (two streak days, several XP), then a short hop
+    moves = [datetime(2026, 3, 10, 3, 10, 0), datetime(2026, 3, 10, 3, 40, 0)]
+
+    async def scenario():
+        results = []
+        for user_id, guild_id in (two_step, one_statement):
+            await database.start_voice_session(user_id, guild_id, joined)
+        started = joined
+        for at in moves:
+            duration = int((at - started).total_seconds())
+            before = await database.record_voice_session(*two_step, started, at, duration, match_started_at=True)
+            await database.start_voice_session(*two_step, at)
+            after = await database.transition_voice_session(*one_statement, started, at, True, True)
+            results.append((before, after))
+            started = at
+        return results, await _state(*two_step), await _state(*one_statement)
+
+    results, expected, actual = run(scenario())
+    assert actual == expected
+    assert expected["sessions"][-1][1] is None  # the last session is still open
+    for before, after in results:
+        assert after.pop("session_id") > 0
+        assert after == before
+
+
+def test_transition_into_an_excluded_channel_only_closes(member):
+    user_id, guild_id = member
+    joined = datetime(2026, 3, 11, 9, 0, 0)
+    left = datetime(2026, 3, 11, 11, 0, 0)
+
+    async def scenario():
+        await database.start_voice_session(user_id, guild_id, joined)
+        result = await database.transition_voice_session(user_id, guild_id, joined, left, True, False)
+        return result, await _state(user_id, guild_id)
+
+    result, state = run(scenario())
+    assert result["session_id"] == 0
+    assert state["sessions"] == [(joined, left, 7200)]
+    assert state["user"][0] == 7200
@@ -0,0 +1,35 @@
+from conftest import run
+from core import database
+from core.leveling import MAX_LEVEL, calculate_level, get_level_title, total_xp_required_for_level
+
+
+def test_add_xp_derives_level_from_thresholds_like_leveling(member):
+    user_id, guild_id = member
+    # just below and exactly at every level boundary, past the cap, then floored at 0
+    targets = []
+    for level in range(2, MAX_LEVEL + 1):
+        boundary = total_xp_required_for_level(level)
+        targets += [boundary - 1, boundary]
+    targets += [total_xp_required_for_level(MAX_LEVEL) + 1000, 0]
+
+    async def scenario():
+        results = []
+        total = 0
+        for target in targets:
+            result = await database.add_xp(user_id, guild_id, target - total)
+            total = result["total_xp"]
+            results.append((target, result))
+        await database.add_xp(user_id, guild_id, -5)  # below zero stays at 0
+        async with database.acquire() as conn:
+            row = await conn.fetchrow("SELECT xp, level, level_name FROM users WHERE user_id=$1 AND guild_id=$2", user_id, guild_id)
+        return results, tuple(row)
+
+    results, final = run(scenario())
+    previous = 0
+    for target, result in results:
+        assert result["total_xp"] == target
+        assert result["old_level"] == calculate_level(previous)
+        assert result["new_level"] == calculate_level(target)
+        assert result["level_name"] == get_level_title(calculate_level(target))
+        previous = target
+    assert final == (0, 1, get_level_title(1))